@@ -17,6 +17,14 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD')
 }
 
+# Connection Pool Configuration
+DB_POOL_CONFIG = {
+    'min_size': int(os.getenv('DB_POOL_MIN', '1')),
+    'max_size': int(os.getenv('DB_POOL_MAX', '5')),
+    'checkout_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+    'health_check_after': float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '30'))
+}
+
 # API Configuration  
 API_CONFIG = {
     'url': os.getenv('GRAPHQL_API_URL'),
@@ -24,6 +32,83 @@ API_CONFIG = {
     'location_id': os.getenv('LOCATION_ID')
 }
 
+# HTTP Client Configuration (retries/backoff on 429 + 5xx, timeouts as (connect, read) seconds)
+HTTP_CONFIG = {
+    'retries': int(os.getenv('HTTP_RETRIES', '3')),
+    'backoff_factor': float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5')),
+    'pool_maxsize': int(os.getenv('HTTP_POOL_MAXSIZE', '10')),
+    'timeouts': {
+        'teburio': (5, float(os.getenv('TEBURIO_TIMEOUT', '30'))),
+        'openmeteo_forecast': (5, float(os.getenv('OPENMETEO_TIMEOUT', '30'))),
+        'openmeteo_archive': (5, float(os.getenv('OPENMETEO_ARCHIVE_TIMEOUT', '60'))),
+        'default': (5, 30)
+    }
+}
+
+# Walk-in forecast horizon in days (predict_walkins, backtest, booking sync hot window)
+FORECAST_HORIZON_DAYS = 16
+
+# Booking Sync Configuration (incremental mode)
+SYNC_CONFIG = {
+    'past_days': int(os.getenv('BOOKING_SYNC_PAST_DAYS', '3')),
+    'future_days': int(os.getenv('BOOKING_SYNC_FUTURE_DAYS', '60')),
+    # Daily window ahead; never shorter than the forecast horizon, else the last forecast days use stale reservations
+    'hot_future_days': max(
+        int(os.getenv('BOOKING_SYNC_HOT_FUTURE_DAYS', str(FORECAST_HORIZON_DAYS))), FORECAST_HORIZON_DAYS
+    ),
+    'full_sync_interval_days': int(os.getenv('BOOKING_SYNC_FULL_INTERVAL_DAYS', '7')),
+    # Checkpoints of sync runs that were never resumed are dropped after this many days
+    'checkpoint_ttl_days': int(os.getenv('BOOKING_SYNC_CHECKPOINT_TTL_DAYS', '7'))
+}
+
+# Booking page cache (src/booking_cache.py): SQLite store, entry TTL and size limit
+BOOKING_CACHE_CONFIG = {
+    'path': os.getenv('BOOKING_CACHE_FILE', 'data/bookings_cache.sqlite'),
+    'ttl_hours': float(os.getenv('BOOKING_CACHE_TTL_HOURS', '24')),
+    'max_mb': float(os.getenv('BOOKING_CACHE_MAX_MB', '256'))
+}
+
+# Historical Weather Backfill (ERA5 archive)
+WEATHER_BACKFILL_CONFIG = {
+    'chunk_months': int(os.getenv('WEATHER_BACKFILL_CHUNK_MONTHS', '12')),
+    'max_workers': int(os.getenv('WEATHER_BACKFILL_WORKERS', '3')),
+    'requests_per_second': float(os.getenv('WEATHER_BACKFILL_RPS', '1.0')),
+    # Gap refill: daily lookback window, present days re-fetched to merge two gaps into one call
+    'gap_lookback_days': int(os.getenv('WEATHER_GAP_LOOKBACK_DAYS', '60')),
+    'gap_merge_days': int(os.getenv('WEATHER_GAP_MERGE_DAYS', '3'))
+}
+
+# Raw payload archive (Parquet, needs pyarrow); BACKUP_FORMAT=parquet replaces the JSON backups
+ARCHIVE_CONFIG = {
+    'dir': os.getenv('ARCHIVE_DIR', 'data/archive'),
+    'compression': os.getenv('ARCHIVE_COMPRESSION', 'zstd'),
+    'backup_format': os.getenv('BACKUP_FORMAT', 'json')
+}
+
+# Calendar features: school holiday ranges per state (update the file once a year)
+CALENDAR_CONFIG = {
+    'school_holidays_file': os.getenv(
+        'SCHOOL_HOLIDAYS_FILE',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'school_holidays.json')
+    )
+}
+
+# Walk-in model artifact (loaded once per process, reloaded when the file changes)
+MODEL_CONFIG = {
+    'path': os.getenv('MODEL_PATH', 'models/walkin_ridge_prod.pkl'),
+    # joblib mmap_mode ('r' = read-only memory map for large arrays); empty = load into RAM
+    'mmap_mode': os.getenv('MODEL_MMAP_MODE') or None,
+    # Reduced-form export (python src/ridge_scorer.py export): scored without sklearn if present
+    'scorer_path': os.getenv('MODEL_SCORER_PATH', 'models/walkin_ridge_prod.npz'),
+    # Residuals by forecast horizon from the backtest → p10/p50/p90 bands in walkin_forecast
+    'residuals_path': os.getenv('MODEL_RESIDUALS_PATH', 'models/walkin_residuals.npz')
+}
+
+# Backtest (python src/backtest.py): worker processes for the rolling-origin evaluation (0 = all CPUs)
+BACKTEST_CONFIG = {
+    'workers': int(os.getenv('BACKTEST_WORKERS', '0'))
+}
+
 # Date Configuration
 DATE_CONFIG = {
     'default_start': os.getenv('DEFAULT_START_DATE'),
@@ -12,7 +12,7 @@ load_dotenv()
 # Pfad-Setup
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.dashboard_data import get_forecast_view
+from src.dashboard_data import get_forecast_view, get_walkin_scenarios
 from src.booking_sync import sync_bookings
 from src.weather_forecast import sync_weather
 from src import predict_walkins
@@ -221,7 +221,14 @@ def staff_box(col, role, count):
 
 # Helper for Uncertainty Calculation
 today = datetime.now().date()
-def get_confidence_badge(days):
+def get_confidence_badge(days, p10=None, p90=None, pred=None):
+    # Echte Bandbreite (p10-p90 aus dem Backtest), sonst Schätzung über den Abstand in Tagen
+    if p10 is not None and p90 is not None and not (pd.isna(p10) or pd.isna(p90)):
+        band = f" ({p10:.0f}–{p90:.0f})"
+        spread = (p90 - p10) / max(pred or 0, 10)
+        if spread <= 0.5: return ('Hohe Sicherheit' + band, 'conf-high')
+        if spread <= 1.0: return ('Mittlere Sicherheit' + band, 'conf-med')
+        return ('Geringe Sicherheit' + band, 'conf-low')
     if days <= 1: return ('Hohe Sicherheit', 'conf-high')
     if days <= 3: return ('Mittlere Sicherheit', 'conf-med')
     return ('Geringe Sicherheit', 'conf-low')
@@ -319,7 +326,9 @@ if next_days.empty:
 else:
     cols = st.columns(3)
     for i, (index, r_next) in enumerate(next_days.head(3).iterrows()):
-        conf_text, conf_class = get_confidence_badge(r_next['days_diff'])
+        conf_text, conf_class = get_confidence_badge(
+            r_next['days_diff'], r_next.get('walkins_p10'), r_next.get('walkins_p90'), r_next['walkins_pred']
+        )
         with cols[i]:
             st.markdown(f"""<div class="day-card"><div class="day-header">{r_next['wochentag']}</div><div class="day-date">{r_next['datum'].strftime('%d.%m.')}</div><div style="font-size: 1.5rem; font-weight: bold; color: #1a1a1a;">{int(r_next['total_guests'])} <span style="font-size: 0.8rem; color: #666;">Gäste</span></div><div style="margin: 5px 0; font-size: 0.8rem;">{r_next['revenue']:,.0f} €</div><div style="font-size: 0.8rem; color: #555;">{r_next['temp']:.0f}°C | {'🌧️' if r_next['rain'] > 2 else '☀️'}</div><span class="confidence-badge {conf_class}">{conf_text}</span></div>""", unsafe_allow_html=True)
 
@@ -328,7 +337,7 @@ else:
 st.markdown("---")
 st.markdown("### 3. Wochentrend")
 
-tab1, tab2 = st.tabs(["Chart", "Tabelle"])
+tab1, tab2, tab3 = st.tabs(["Chart", "Tabelle", "Wetter-Szenarien"])
 
 with tab1:
     fig = go.Figure()
@@ -375,4 +384,35 @@ with tab2:
             "datum": "Datum", "revenue": st.column_config.NumberColumn("Umsatz €", format="%.0f €"),
             "total_guests": "Gäste", "reservations": "Res.", "walkins_pred": "Lauf."
         }, hide_index=True, use_container_width=True
-    )
\ No newline at end of file
+    )
+
+with tab3:
+    st.caption("Walk-In Prognose, wenn das Wetter anders kommt als vorhergesagt")
+    scenarios = get_walkin_scenarios(days_ahead=7)
+    if scenarios.empty:
+        st.info("Keine Szenarien verfügbar (erst Daten aktualisieren).")
+    else:
+        labels = {d: lbl for d, lbl in zip(df['datum'], df['display_date'])}
+        x = [labels.get(d, d.strftime('%d.%m.')) for d in scenarios.index]
+        scenario_colors = {'-3°C': '#3498DB', '+3°C': '#E67E22', 'Trocken': '#F1C40F', 'Regen': '#7F8C8D'}
+
+        fig_sc = go.Figure()
+        for name in scenarios.columns:
+            is_base = name == 'Prognose'
+            fig_sc.add_trace(go.Scatter(
+                x=x, y=scenarios[name], name=name, mode='lines+markers',
+                line=dict(color=PRIMARY_COLOR if is_base else scenario_colors.get(name, SECONDARY_COLOR),
+                          width=3 if is_base else 2, dash=None if is_base else 'dot'),
+                hovertemplate=f'{name}: %{{y:.0f}} Walk-Ins<extra></extra>'
+            ))
+
+        fig_sc.update_layout(
+            height=400,
+            margin=dict(t=20, b=0, l=0, r=0),
+            paper_bgcolor='white',
+            plot_bgcolor='white',
+            yaxis=dict(title="Walk-Ins", showgrid=True, gridcolor='#eee'),
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            hovermode="x unified"
+        )
+        st.plotly_chart(fig_sc, use_container_width=True)
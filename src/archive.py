@@ -0,0 +1,407 @@
+"""
+Archive - compressed columnar storage for raw API payloads (weather + bookings)
+Parquet files partitioned by month (data/archive/<kind>/month=YYYY-MM/data.parquet),
+replayable into the existing import pipelines
+
+Usage:
+    python src/archive.py convert [data_dir] [--remove]
+    python src/archive.py archive-bookings START END
+    python src/archive.py replay-weather [START END]
+    python src/archive.py replay-bookings [START END]
+"""
+import sys
+import os
+import json
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    # Optional: without pyarrow the pipelines keep writing JSON backups
+    pa = None
+    pc = None
+    pq = None
+
+from config.settings import ARCHIVE_CONFIG, BOOKING_CACHE_CONFIG
+
+logger = logging.getLogger("archive")
+
+_write_lock = threading.Lock()
+
+# Integer-valued weather variables; everything else is stored as float64
+WEATHER_INT_FIELDS = {'weathercode'}
+
+# Nested / loosely typed booking fields are kept as JSON text
+BOOKING_JSON_FIELDS = ('tracking', 'rating', 'bookingTagsCount', 'payment')
+
+
+def archive_available():
+    return pa is not None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed (pip install pyarrow) - archive format unavailable")
+
+
+def _partition_path(kind, month, root=None):
+    return Path(root or ARCHIVE_CONFIG['dir']) / kind / f"month={month}" / "data.parquet"
+
+
+def _months_between(start, end):
+    """'YYYY-MM' keys of all months overlapping [start, end]"""
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _list_months(kind, root=None):
+    base = Path(root or ARCHIVE_CONFIG['dir']) / kind
+    if not base.exists():
+        return []
+    return sorted(p.name.split("=", 1)[1] for p in base.glob("month=*") if (p / "data.parquet").exists())
+
+
+def _conform(table, schema):
+    """Table in the column order/types of schema, missing columns null-filled"""
+    return pa.table({
+        field.name: (
+            table.column(field.name).cast(field.type) if field.name in table.column_names
+            else pa.nulls(table.num_rows, field.type)
+        )
+        for field in schema
+    }, schema=schema)
+
+
+def _merge_partition(kind, month, table, key, root=None):
+    """
+    Merge new rows into a month file (last version per key wins), written atomically
+
+    Returns:
+        int: Rows in the partition after the merge
+    """
+    path = _partition_path(kind, month, root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with _write_lock:
+        if path.exists():
+            existing = pq.read_table(path)
+            # Variablenliste kann sich ändern (ältere Backups, neue API-Felder): Schemas vereinigen
+            # Bestehende Spaltentypen gewinnen, neue Spalten werden angehängt
+            schema = existing.schema
+            for field in table.schema:
+                if field.name not in schema.names:
+                    schema = schema.append(field)
+            table = pa.concat_tables([_conform(existing, schema), _conform(table, schema)])
+
+        # Letzte Version je Schlüssel behalten, nach Schlüssel sortiert ablegen
+        keys = table.column(key).to_pylist()
+        last_index = {k: i for i, k in enumerate(keys)}
+        order = [last_index[k] for k in sorted(last_index)]
+        table = table.take(pa.array(order, type=pa.int64()))
+
+        tmp_path = path.with_suffix(".parquet.tmp")
+        pq.write_table(
+            table, tmp_path, compression=ARCHIVE_CONFIG['compression'],
+            write_statistics=False, store_schema=False
+        )
+        os.replace(tmp_path, path)
+
+    return table.num_rows
+
+
+# ---------------------------------------------------------------------------
+# Weather
+# ---------------------------------------------------------------------------
+
+def _weather_table(api_data, fetched_at):
+    daily = api_data['daily']
+    n = len(daily['time'])
+    columns = {
+        'date': pa.array([date.fromisoformat(d) for d in daily['time']], type=pa.date32()),
+        'fetched_at': pa.array([fetched_at] * n, type=pa.timestamp('s'))
+    }
+    for name in sorted(k for k in daily if k != 'time'):
+        field_type = pa.int64() if name in WEATHER_INT_FIELDS else pa.float64()
+        columns[name] = pa.array(daily[name], type=field_type, from_pandas=True)
+    return pa.table(columns)
+
+
+def write_weather_archive(api_data, fetched_at=None, root=None):
+    """
+    Store an OpenMeteo daily payload in the monthly weather partitions
+
+    Returns:
+        list: Partition files written
+    """
+    _require_pyarrow()
+    fetched_at = fetched_at or datetime.now()
+    table = _weather_table(api_data, fetched_at.replace(microsecond=0))
+
+    months = pa.array([d.strftime("%Y-%m") for d in table.column('date').to_pylist()])
+    written = []
+    for month in sorted(set(months.to_pylist())):
+        part = table.filter(pc.equal(months, month))
+        _merge_partition("weather", month, part, "date", root)
+        written.append(str(_partition_path("weather", month, root)))
+    return written
+
+
+def iter_weather_archive(start_date=None, end_date=None, root=None):
+    """
+    Yield archived weather month by month in OpenMeteo shape ({'daily': {...}}),
+    ready for weather_pipeline.process_weather_data
+    """
+    _require_pyarrow()
+    months = _list_months("weather", root)
+    if start_date or end_date:
+        wanted = set(_months_between(start_date or date(1900, 1, 1), end_date or date.today()))
+        months = [m for m in months if m in wanted]
+
+    for month in months:
+        table = pq.read_table(_partition_path("weather", month, root))
+        dates = table.column('date').to_pylist()
+        keep = [i for i, d in enumerate(dates)
+                if (not start_date or d >= start_date) and (not end_date or d <= end_date)]
+        if not keep:
+            continue
+        table = table.take(pa.array(keep, type=pa.int64()))
+
+        daily = {'time': [d.isoformat() for d in table.column('date').to_pylist()]}
+        for name in table.column_names:
+            if name not in ('date', 'fetched_at'):
+                daily[name] = table.column(name).to_pylist()
+        yield {'daily': daily}
+
+
+def replay_weather_archive(start_date=None, end_date=None, root=None):
+    """Re-import archived weather into weather_daily (one bulk upsert per month)"""
+    from src.weather_pipeline import process_weather_data
+
+    saved = 0
+    for api_data in iter_weather_archive(start_date, end_date, root):
+        saved += process_weather_data(api_data)
+    logger.info(f"Replayed {saved} weather days from archive")
+    return saved
+
+
+# ---------------------------------------------------------------------------
+# Bookings
+# ---------------------------------------------------------------------------
+
+def _booking_table(raw_bookings, archived_at):
+    def column(key):
+        return [b.get(key) for b in raw_bookings]
+
+    return pa.table({
+        '_id': pa.array(column('_id'), type=pa.string()),
+        'archived_at': pa.array([archived_at] * len(raw_bookings), type=pa.timestamp('ms')),
+        'date': pa.array(column('date'), type=pa.int64()),
+        'endDate': pa.array(column('endDate'), type=pa.int64()),
+        'people': pa.array(column('people'), type=pa.int64()),
+        'cancelled': pa.array(column('cancelled'), type=pa.bool_()),
+        'noShow': pa.array(column('noShow'), type=pa.bool_()),
+        'walkIn': pa.array(column('walkIn'), type=pa.bool_()),
+        'source': pa.array(column('source'), type=pa.string()),
+        'host': pa.array(column('host'), type=pa.string()),
+        'tagIds': pa.array(column('tagIds'), type=pa.list_(pa.string())),
+        **{
+            key: pa.array([json.dumps(v, separators=(',', ':'), ensure_ascii=False) if v is not None else None
+                           for v in column(key)], type=pa.string())
+            for key in BOOKING_JSON_FIELDS
+        }
+    })
+
+
+def _bookings_by_month(raw_bookings):
+    """Raw bookings grouped by 'YYYY-MM' of the local booking date"""
+    by_month = {}
+    for booking in raw_bookings:
+        month = datetime.fromtimestamp(booking['date'] / 1000).strftime("%Y-%m")
+        by_month.setdefault(month, []).append(booking)
+    return by_month
+
+
+def write_booking_archive(raw_bookings, root=None):
+    """
+    Store raw bookingsAnalytics bookings in monthly partitions (by local booking date)
+
+    Returns:
+        int: Number of bookings written
+    """
+    _require_pyarrow()
+    if not raw_bookings:
+        return 0
+
+    archived_at = datetime.now()
+    for month, bookings in sorted(_bookings_by_month(raw_bookings).items()):
+        _merge_partition("bookings", month, _booking_table(bookings, archived_at), "_id", root)
+    return len(raw_bookings)
+
+
+def iter_booking_archive(start_date=None, end_date=None, root=None):
+    """
+    Yield archived raw bookings month by month (same dict shape as the API),
+    ready for utils.parse_bookings_page + database.upsert_bookings
+    Partitions in range are read up front so a booking moved to another
+    month is only replayed in its latest version.
+    """
+    _require_pyarrow()
+    months = _list_months("bookings", root)
+    if start_date or end_date:
+        wanted = set(_months_between(start_date or date(1900, 1, 1), end_date or date.today()))
+        months = [m for m in months if m in wanted]
+
+    start_ms = int(datetime.combine(start_date, datetime.min.time()).timestamp() * 1000) if start_date else None
+    end_ms = int(datetime.combine(end_date + timedelta(days=1), datetime.min.time()).timestamp() * 1000) if end_date else None
+
+    # Verschobene Buchungen liegen ggf. in zwei Monaten: jüngste Archivierung gewinnt
+    latest = {}
+    for month in months:
+        for booking in pq.read_table(_partition_path("bookings", month, root)).to_pylist():
+            known = latest.get(booking['_id'])
+            if known is None or booking['archived_at'] >= known['archived_at']:
+                latest[booking['_id']] = booking
+
+    pages = {}
+    for booking in latest.values():
+        if (start_ms is not None and booking['date'] < start_ms) or (end_ms is not None and booking['date'] >= end_ms):
+            continue
+        del booking['archived_at']
+        for key in BOOKING_JSON_FIELDS:
+            if booking[key] is not None:
+                booking[key] = json.loads(booking[key])
+        month = datetime.fromtimestamp(booking['date'] / 1000).strftime("%Y-%m")
+        pages.setdefault(month, []).append(booking)
+
+    for month in sorted(pages):
+        yield pages[month]
+
+
+def replay_booking_archive(start_date=None, end_date=None, root=None):
+    """Re-import archived bookings into the bookings table (one upsert per month)"""
+    from src.database import upsert_bookings
+    from src.utils import parse_bookings_page
+
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+    for page in iter_booking_archive(start_date, end_date, root):
+        stats = upsert_bookings(parse_bookings_page(page))
+        if stats is None:
+            totals["failed"] += len(page)
+            continue
+        for key in ("inserted", "updated", "unchanged"):
+            totals[key] += stats[key]
+    logger.info(f"Replayed bookings from archive: {totals}")
+    return totals
+
+
+def archive_bookings(start_date, end_date, cache_file=None):
+    """
+    Fetch bookings for [start, end] through the booking page cache and archive them
+
+    A range with an incomplete shard is not archived at all; completed shards are
+    cached, so a rerun only fetches what failed.
+    """
+    from src.booking_sync import IncompleteFetchError, fetch_bookings_sharded
+
+    try:
+        bookings = fetch_bookings_sharded(
+            f"{start_date.isoformat()}T00:00:00", f"{end_date.isoformat()}T23:59:59",
+            cache_file=cache_file or BOOKING_CACHE_CONFIG['path']
+        )
+    except IncompleteFetchError as e:
+        logger.error(f"Booking fetch incomplete, nothing archived for {start_date} to {end_date}: {e}")
+        return 0
+    if not bookings:
+        logger.error("No bookings fetched, nothing archived")
+        return 0
+    written = write_booking_archive(bookings)
+    logger.info(f"Archived {written} bookings for {start_date} to {end_date}")
+    return written
+
+
+# ---------------------------------------------------------------------------
+# JSON → archive converter
+# ---------------------------------------------------------------------------
+
+def convert_json_backups(data_dir="data", remove=False, root=None):
+    """
+    Convert JSON backups into the archive: weather backups (save_json_backup
+    format) and booking caches ({"fetched_at", "date_range", "count", "bookings"})
+
+    Returns:
+        dict: converted/failed file counts and JSON vs. Parquet bytes
+    """
+    _require_pyarrow()
+    stats = {"converted": 0, "failed": 0, "json_bytes": 0, "archive_bytes": 0}
+    touched = set()
+
+    for filename in sorted(f for f in os.listdir(data_dir) if f.endswith(".json")):
+        path = os.path.join(data_dir, filename)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                backup = json.load(f)
+            api_data = backup.get("api_data")
+            if api_data and 'daily' in api_data:
+                fetched_at = backup.get("fetched_at")
+                touched.update(write_weather_archive(
+                    api_data, datetime.fromisoformat(fetched_at) if fetched_at else None, root
+                ))
+            elif isinstance(backup.get("bookings"), list):
+                bookings = backup["bookings"]
+                write_booking_archive(bookings, root)
+                touched.update(
+                    str(_partition_path("bookings", month, root)) for month in _bookings_by_month(bookings)
+                )
+            else:
+                logger.warning(f"⚠️ No api_data or bookings found in {filename}, skipping.")
+                stats["failed"] += 1
+                continue
+        except (OSError, ValueError, KeyError, TypeError, AttributeError, pa.ArrowException) as e:
+            logger.error(f"Failed to convert {filename}: {e!r}")
+            stats["failed"] += 1
+            continue
+
+        stats["converted"] += 1
+        stats["json_bytes"] += os.path.getsize(path)
+        if remove:
+            os.remove(path)
+
+    stats["archive_bytes"] = sum(os.path.getsize(p) for p in touched)
+    logger.info(
+        f"Converted {stats['converted']} JSON backups: {stats['json_bytes'] / 1024:.0f} KiB JSON → "
+        f"{stats['archive_bytes'] / 1024:.0f} KiB Parquet ({len(touched)} month files)"
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    from config.logging_config import setup_logging
+    logger = setup_logging("archive")
+
+    def _date_args(args):
+        return [date.fromisoformat(arg) for arg in args[:2]] + [None] * (2 - len(args[:2]))
+
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    args = [arg for arg in sys.argv[2:] if not arg.startswith("--")]
+
+    if command == "convert":
+        convert_json_backups(args[0] if args else "data", remove="--remove" in sys.argv)
+    elif command == "archive-bookings" and len(args) == 2:
+        archive_bookings(*_date_args(args))
+    elif command == "replay-weather":
+        replay_weather_archive(*_date_args(args))
+    elif command == "replay-bookings":
+        replay_booking_archive(*_date_args(args))
+    else:
+        print(__doc__)
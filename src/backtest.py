@@ -0,0 +1,327 @@
+"""
+Backtest - rolling-origin evaluation of the walk-in model
+Every past forecast_created_at is an origin: the prediction base is rebuilt as it
+was known on that day (latest weather forecast made up to the origin, booking
+snapshot of the origin, no walk-ins from the origin on), scored, and compared with
+the actual walk-ins. Weather, snapshots and actuals are loaded once as numpy arrays
+and shared read-only with a process pool (fork: copy-on-write, no per-task pickling).
+
+Usage:
+    python src/backtest.py [START END] [--workers N] [--final-bookings]
+
+    --final-bookings  reservations from the final bookings instead of booking_snapshots
+                      (optimistic: later bookings leak in; residuals are not written)
+"""
+import sys
+import os
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from config.settings import BACKTEST_CONFIG, FORECAST_HORIZON_DAYS, MODEL_CONFIG
+from src.calendar_features import lookup_calendar
+from src.database import CALENDAR_FEATURE_COLUMNS
+from src.predict_walkins import feature_engineering, fill_missing_weather, load_predictor
+from src.prediction_intervals import ResidualMatrix
+from src.queries import run_query
+
+logger = logging.getLogger("backtest")
+
+# Wie predict_walkins: 14 Tage Historie für die Rolling Averages, 16 Tage Horizont
+HISTORY_DAYS = 14
+HORIZON_DAYS = FORECAST_HORIZON_DAYS
+
+WEATHER_COLUMNS = [
+    'temperature_2m_max', 'temperature_2m_min', 'precipitation_sum', 'sunshine_duration',
+    'wind_speed_10m_max', 'cloud_cover_mean', 'weathercode'
+]
+ACTUAL_COLUMNS = ['reservations_count', 'reservations_people', 'avg_reservation_size', 'walkin_people']
+
+# Gemeinsame Daten der Worker (im Elternprozess gesetzt, per fork geerbt oder per Initializer übergeben)
+_SHARED = None
+
+
+def _days(values):
+    """dates → int64 days since epoch"""
+    return pd.to_datetime(pd.Series(values)).to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+
+def load_backtest_data(start, end, today=None):
+    """
+    All inputs of the backtest in one pass
+
+    Returns:
+        dict of numpy arrays (days as int64 since epoch), None if there is nothing to evaluate
+    """
+    today = today or datetime.now().date()
+    params = {
+        'start': start,
+        'end': end,
+        'history_start': start - timedelta(days=HISTORY_DAYS),
+        'forecast_end': end + timedelta(days=HORIZON_DAYS)
+    }
+
+    weather = run_query("backtest_weather", params, method="copy")
+    if weather.empty:
+        return None
+    snapshots = run_query("backtest_snapshots", params, method="copy")
+    actuals = run_query("backtest_actuals", params, method="copy")
+
+    weather_created = _days(weather['forecast_created_at'])
+    today_day = _days([today])[0]
+    origins = np.unique(weather_created[
+        (weather_created >= _days([start])[0]) & (weather_created <= _days([end])[0]) & (weather_created < today_day)
+    ])
+    if len(origins) == 0:
+        return None
+
+    # Ist-Werte dicht über den ganzen Zeitraum: Index = Tag - day0 (Tage ohne Buchungen = 0)
+    day0 = int(origins[0]) - HISTORY_DAYS
+    n_days = int(origins[-1]) + HORIZON_DAYS - day0 + 1
+    dense = np.zeros((n_days, len(ACTUAL_COLUMNS)))
+    if not actuals.empty:
+        index = _days(actuals['day']) - day0
+        inside = (index >= 0) & (index < n_days)
+        dense[index[inside]] = actuals[ACTUAL_COLUMNS].to_numpy(dtype=float)[inside]
+
+    # Feiertags-/Ferien-Flags wie der calendar_features-Join in prediction_base
+    all_days = np.arange(day0, day0 + n_days).astype('datetime64[D]')
+    calendar = lookup_calendar(all_days)
+
+    return {
+        'origins': origins,
+        'today': int(today_day),
+        'weather_created': weather_created,
+        'weather_date': _days(weather['forecast_date']),
+        'weather': weather[WEATHER_COLUMNS].to_numpy(dtype=float),
+        'snapshot_created': _days(snapshots['snapshot_created_at']) if not snapshots.empty else np.empty(0, np.int64),
+        'snapshot_date': _days(snapshots['forecast_date']) if not snapshots.empty else np.empty(0, np.int64),
+        'snapshot_people': snapshots['reservations_people'].to_numpy(dtype=float) if not snapshots.empty else np.empty(0),
+        'day0': day0,
+        'actuals': dense,
+        'calendar': np.column_stack([calendar[col] for col in CALENDAR_FEATURE_COLUMNS])
+    }
+
+
+def origin_base(shared, origin, final_bookings=False):
+    """
+    prediction_base as it looked on the origin day (same columns as the registered query)
+
+    Future reservations come from the booking snapshot taken on the origin; the
+    snapshot only has people, so count and average size are the final ones scaled
+    to the snapshot. Returns None if the origin has no snapshot.
+    """
+    days = np.arange(origin - HISTORY_DAYS, origin + HORIZON_DAYS + 1)
+    future = days >= origin
+
+    # Wetter: je Tag die letzte Vorhersage, die am Origin schon existierte
+    w_dates = shared['weather_date']
+    lo, hi = np.searchsorted(w_dates, days[0], side='left'), np.searchsorted(w_dates, days[-1], side='right')
+    known = shared['weather_created'][lo:hi] <= origin
+    dates, values = w_dates[lo:hi][known], shared['weather'][lo:hi][known]
+    last = np.r_[dates[1:] != dates[:-1], True] if len(dates) else np.empty(0, bool)
+    weather = np.full((len(days), len(WEATHER_COLUMNS)), np.nan)
+    weather[dates[last] - days[0]] = values[last]
+
+    index = days - shared['day0']
+    actuals = shared['actuals'][index].copy()
+    actuals[future, ACTUAL_COLUMNS.index('walkin_people')] = 0
+
+    if not final_bookings:
+        s_created = shared['snapshot_created']
+        lo, hi = np.searchsorted(s_created, origin, side='left'), np.searchsorted(s_created, origin, side='right')
+        if lo == hi:
+            return None
+        s_dates, s_people = shared['snapshot_date'][lo:hi], shared['snapshot_people'][lo:hi]
+        inside = (s_dates >= origin) & (s_dates <= days[-1])
+        people = np.zeros(len(days))
+        people[s_dates[inside] - days[0]] = s_people[inside]
+
+        final_people = actuals[:, ACTUAL_COLUMNS.index('reservations_people')]
+        share = np.divide(people, final_people, out=np.zeros(len(days)), where=final_people > 0)
+        count_col = ACTUAL_COLUMNS.index('reservations_count')
+        actuals[future, count_col] = np.round(actuals[future, count_col] * share[future])
+        actuals[future, ACTUAL_COLUMNS.index('reservations_people')] = people[future]
+        actuals[future & (people == 0), ACTUAL_COLUMNS.index('avg_reservation_size')] = 0
+
+    df = pd.DataFrame(
+        np.hstack([weather, actuals, shared['calendar'][index]]),
+        columns=WEATHER_COLUMNS + ACTUAL_COLUMNS + list(CALENDAR_FEATURE_COLUMNS)
+    )
+    df.insert(0, 'target_date', pd.to_datetime(days.astype('datetime64[D]')))
+    return fill_missing_weather(df)
+
+
+def evaluate_origins(origins, final_bookings=False):
+    """
+    Score every origin in the chunk
+
+    Returns:
+        np.ndarray: (n, 5) rows of origin, target (days), horizon, predicted, actual walk-ins;
+        only targets before today (actuals known)
+    """
+    shared = _SHARED
+    predict, feature_cols = shared['predict'], shared['feature_cols']
+    walkin_col = ACTUAL_COLUMNS.index('walkin_people')
+    results = []
+
+    for origin in origins:
+        df = origin_base(shared, int(origin), final_bookings)
+        if df is None:
+            continue
+
+        features = feature_engineering(df, today=pd.Timestamp(int(origin), unit='D'))
+        for col in set(feature_cols) - set(features.columns):
+            features[col] = 0
+
+        targets = features['target_date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+        done = targets < shared['today']
+        if not done.any():
+            continue
+
+        preds = np.maximum(0, np.round(np.asarray(predict(features[feature_cols]), dtype=float)))
+        actual = shared['actuals'][targets - shared['day0'], walkin_col]
+        results.append(np.column_stack([
+            np.full(done.sum(), origin), targets[done], targets[done] - origin, preds[done], actual[done]
+        ]))
+
+    return np.vstack(results) if results else np.empty((0, 5))
+
+
+def _init_worker(shared=None):
+    global _SHARED
+    if shared is not None:
+        _SHARED = shared
+    # Feature Engineering loggt pro Aufruf - im Backtest nur Warnungen
+    logging.getLogger("predict_walkins").setLevel(logging.WARNING)
+
+
+def horizon_metrics(pairs):
+    """MAE, MAPE (days with actual walk-ins > 0) and bias (actual - predicted) per horizon"""
+    horizon, pred, actual = pairs[:, 2].astype(int), pairs[:, 3], pairs[:, 4]
+    error = actual - pred
+    df = pd.DataFrame({
+        'horizon': horizon,
+        'n': 1,
+        'mae': np.abs(error),
+        'mape': np.where(actual > 0, np.abs(error) / np.where(actual > 0, actual, 1) * 100, np.nan),
+        'bias': error
+    })
+    aggregations = {'n': 'sum', 'mae': 'mean', 'mape': 'mean', 'bias': 'mean'}
+    metrics = df.groupby('horizon').agg(aggregations)
+    metrics.loc['gesamt'] = df.agg(aggregations)
+    metrics['n'] = metrics['n'].astype(int)
+    return metrics.round(2)
+
+
+def run_backtest(start=None, end=None, workers=None, final_bookings=False):
+    """
+    Rolling-origin backtest over all past weather forecasts
+
+    Args:
+        start, end: origin range (default: all forecasts up to yesterday)
+        workers: processes (default BACKTEST_WORKERS, 0 = all CPUs; 1 = in-process)
+        final_bookings: use final bookings instead of booking_snapshots for future reservations
+
+    Returns:
+        tuple: (metrics per horizon, pairs DataFrame) - (None, None) without data
+    """
+    global _SHARED
+    today = datetime.now().date()
+    end = end or today - timedelta(days=1)
+    start = start or date(2000, 1, 1)
+
+    t0 = time.perf_counter()
+    shared = load_backtest_data(start, end, today)
+    if shared is None:
+        logger.warning(f"⚠️ No weather forecasts to backtest between {start} and {end}")
+        return None, None
+
+    predict, feature_cols = load_predictor()
+    shared.update(predict=predict, feature_cols=feature_cols)
+    load_seconds = time.perf_counter() - t0
+
+    origins = shared['origins']
+    workers = workers or BACKTEST_CONFIG['workers'] or os.cpu_count() or 1
+    workers = min(workers, len(origins))
+    # Einige Chunks pro Worker gleichen unterschiedlich lange Origins aus
+    chunks = [c for c in np.array_split(origins, workers * 4) if len(c)]
+
+    t1 = time.perf_counter()
+    _SHARED = shared
+    if workers <= 1:
+        _init_worker()
+        parts = [evaluate_origins(chunk, final_bookings) for chunk in chunks]
+    else:
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context, initargs = multiprocessing.get_context('fork'), ()
+        else:
+            context, initargs = multiprocessing.get_context(), (shared,)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=initargs) as pool:
+            parts = list(pool.map(evaluate_origins, chunks, [final_bookings] * len(chunks)))
+    _SHARED = None
+    pairs = np.vstack(parts)
+    eval_seconds = time.perf_counter() - t1
+
+    evaluated = len(np.unique(pairs[:, 0]))
+    if evaluated < len(origins):
+        logger.warning(f"⚠️ {len(origins) - evaluated} of {len(origins)} origins skipped (no booking snapshot or no known actuals)")
+    if len(pairs) == 0:
+        logger.warning("⚠️ Backtest produced no (prediction, actual) pairs")
+        return None, None
+
+    logger.info(
+        f"✅ {evaluated} origins, {len(pairs)} predictions in {eval_seconds:.1f}s "
+        f"({workers} workers, data load {load_seconds:.1f}s)"
+    )
+    metrics = horizon_metrics(pairs)
+
+    result = pd.DataFrame(pairs, columns=['origin', 'target_date', 'horizon', 'pred', 'actual'])
+    for col in ('origin', 'target_date'):
+        result[col] = result[col].astype(np.int64).astype('datetime64[D]')
+    result['horizon'] = result['horizon'].astype(int)
+
+    if final_bookings:
+        logger.info("ℹ️ Final bookings used - residuals not written (bands would be too narrow)")
+    else:
+        path = MODEL_CONFIG['residuals_path']
+        ResidualMatrix.from_pairs(pairs[:, 2], pairs[:, 4] - pairs[:, 3], max_horizon=HORIZON_DAYS).save(path)
+        logger.info(f"💾 Residuals by horizon written to {path}")
+
+    return metrics, result
+
+
+if __name__ == "__main__":
+    from config.logging_config import setup_logging
+    logger = setup_logging("backtest")
+
+    args = sys.argv[1:]
+    workers = None
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    final_bookings = "--final-bookings" in args
+    args = [a for a in args if a != "--final-bookings"]
+
+    if args and args[0] in ("-h", "--help"):
+        print(__doc__)
+        sys.exit(0)
+
+    start = datetime.strptime(args[0], "%Y-%m-%d").date() if len(args) > 0 else None
+    end = datetime.strptime(args[1], "%Y-%m-%d").date() if len(args) > 1 else None
+
+    try:
+        metrics, _ = run_backtest(start, end, workers, final_bookings)
+    except Exception as e:
+        logger.error(f"❌ Backtest failed: {e}")
+        sys.exit(1)
+    if metrics is not None:
+        print(metrics.to_string())
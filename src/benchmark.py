@@ -0,0 +1,484 @@
+"""
+Benchmarks for the data pipeline hot paths
+Writes only into scratch tables, never into the production tables
+
+Usage:
+    python src/benchmark.py bookings [sizes...]
+    python src/benchmark.py parse [sizes...]
+    python src/benchmark.py weather [years...]
+    python src/benchmark.py features [days...]
+    python src/benchmark.py scenarios [counts...]
+"""
+import sys
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import holidays
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2 import sql
+from src.database import (
+    BOOKING_COLUMNS, BOOKING_UPSERT_SET, WEATHER_DAILY_COLUMNS, WEATHER_DAILY_UPSERT_SET,
+    db_connection, ensure_booking_hash_column, get_db_connection, save_bookings_batch,
+    save_weather_daily_rows
+)
+from src.predict_walkins import calculate_weather_score, feature_engineering
+from src.ridge_scorer import RidgeScorer
+from src.scenarios import run_scenarios, scenario_grid
+from src.utils import parse_booking, parse_bookings_page
+from src.weather_pipeline import weather_daily_rows
+
+BENCH_BOOKINGS_TABLE = "bookings_bench"
+BENCH_WEATHER_TABLE = "weather_daily_bench"
+
+
+def fake_raw_bookings(n, seed=42):
+    """Generate n bookings shaped like the Teburio bookingsAnalytics response"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, 12, 0)
+    sources = ['widget', None, 'phone', 'google']
+
+    bookings = []
+    for i in range(n):
+        booking_date = start + timedelta(minutes=15 * rng.randint(0, 4 * 24 * 365))
+        bookings.append({
+            '_id': f"bench{i:09d}",
+            'date': int(booking_date.timestamp() * 1000),
+            'endDate': int((booking_date + timedelta(hours=2)).timestamp() * 1000),
+            'people': rng.randint(1, 12),
+            'cancelled': rng.random() < 0.1,
+            'noShow': rng.random() < 0.02,
+            'walkIn': rng.random() < 0.3,
+            'source': rng.choice(sources),
+            'host': None,
+            'tracking': {'source': 'google', 'medium': 'cpc', 'campaign': None, '__typename': 'Tracking'} if rng.random() < 0.2 else None,
+            'rating': None,
+            'tagIds': [f"tag{rng.randint(1, 20)}"] if rng.random() < 0.3 else [],
+            'bookingTagsCount': [{'key': 'vip', 'value': 1, '__typename': 'BookingTagCount'}] if rng.random() < 0.1 else None,
+            'payment': None
+        })
+    return bookings
+
+
+def _save_executemany(bookings_parsed, table):
+    """Baseline: the former per-row executemany upsert"""
+    query = sql.SQL("""
+        INSERT INTO {table} ({columns}) VALUES (
+            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s::jsonb, %s::jsonb, %s, %s
+        )
+        ON CONFLICT (id) DO UPDATE SET
+    """).format(
+        table=sql.Identifier(table),
+        columns=sql.SQL(', ').join(map(sql.Identifier, BOOKING_COLUMNS))
+    ) + sql.SQL(BOOKING_UPSERT_SET)
+
+    with db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.executemany(query, [tuple(b[col] for col in BOOKING_COLUMNS) for b in bookings_parsed])
+        conn.commit()
+    return len(bookings_parsed)
+
+
+def _reset_table(table, like="bookings"):
+    with db_connection() as conn:
+        with conn.cursor() as cursor:
+            if like == "bookings":
+                ensure_booking_hash_column(cursor, like)
+            cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(table)))
+            cursor.execute(sql.SQL("CREATE TABLE {} (LIKE {} INCLUDING ALL)").format(
+                sql.Identifier(table), sql.Identifier(like)
+            ))
+        conn.commit()
+
+
+def _drop_table(table):
+    with db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(table)))
+        conn.commit()
+
+
+def bench_booking_writes(sizes=(1000, 10000, 100000), methods=('executemany', 'values', 'copy', 'copy-columnar')):
+    """
+    Compare rows/sec of the booking upsert paths
+
+    Every method runs twice per size: into an empty table (inserts)
+    and again with the same rows (conflict updates).
+    'copy-columnar' includes parse_bookings_page in its timing.
+    """
+    writers = {
+        'executemany': lambda rows: _save_executemany(rows, BENCH_BOOKINGS_TABLE),
+        'values': lambda rows: save_bookings_batch(rows, table=BENCH_BOOKINGS_TABLE, method='values'),
+        'copy': lambda rows: save_bookings_batch(rows, table=BENCH_BOOKINGS_TABLE, method='copy'),
+        'copy-columnar': lambda rows: save_bookings_batch(
+            parse_bookings_page(raw_bookings), table=BENCH_BOOKINGS_TABLE, method='copy'
+        )
+    }
+
+    results = []
+    try:
+        for size in sizes:
+            raw_bookings = fake_raw_bookings(size)
+            bookings_parsed = [parse_booking(b) for b in raw_bookings]
+
+            for method in methods:
+                _reset_table(BENCH_BOOKINGS_TABLE)
+                for phase in ('insert', 'update'):
+                    t0 = time.perf_counter()
+                    saved = writers[method](bookings_parsed)
+                    elapsed = time.perf_counter() - t0
+
+                    result = {
+                        'rows': size,
+                        'method': method,
+                        'phase': phase,
+                        'saved': saved,
+                        'seconds': round(elapsed, 3),
+                        'rows_per_sec': round(size / elapsed) if elapsed else None
+                    }
+                    results.append(result)
+                    print(f"📊 {size:>7} rows | {method:<13} | {phase:<6} | "
+                          f"{elapsed:8.3f}s | {result['rows_per_sec']:>9} rows/s")
+    finally:
+        _drop_table(BENCH_BOOKINGS_TABLE)
+
+    return results
+
+
+def bench_parse(sizes=(1000, 10000, 100000), repeat=3):
+    """
+    Per-row parse_booking vs. columnar parse_bookings_page (no database needed)
+
+    Checks that both produce the same values and content hashes before timing.
+    """
+    results = []
+    for size in sizes:
+        raw_bookings = fake_raw_bookings(size)
+
+        rows = [parse_booking(b) for b in raw_bookings]
+        columns = parse_bookings_page(raw_bookings)
+        for col in BOOKING_COLUMNS:
+            if columns[col].tolist() != [row[col] for row in rows]:
+                raise AssertionError(f"parse_bookings_page differs from parse_booking in column {col}")
+
+        timings = {}
+        for name, parse in (('per-row', lambda: [parse_booking(b) for b in raw_bookings]),
+                            ('page', lambda: parse_bookings_page(raw_bookings))):
+            best = float('inf')
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                parse()
+                best = min(best, time.perf_counter() - t0)
+            timings[name] = best
+
+            result = {
+                'rows': size,
+                'method': name,
+                'seconds': round(best, 4),
+                'rows_per_sec': round(size / best) if best else None
+            }
+            results.append(result)
+            print(f"📊 {size:>7} rows | {name:<8} | {best:8.4f}s | {result['rows_per_sec']:>9} rows/s")
+
+        print(f"   speedup: {timings['per-row'] / timings['page']:.1f}x")
+
+    return results
+
+
+def fake_era5_daily(start, days, seed=42):
+    """OpenMeteo ERA5 'daily' payload for `days` consecutive days"""
+    rng = random.Random(seed)
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+    return {
+        'daily': {
+            'time': dates,
+            'temperature_2m_max': [round(rng.uniform(-5, 30), 1) for _ in dates],
+            'temperature_2m_min': [round(rng.uniform(-10, 18), 1) for _ in dates],
+            'precipitation_sum': [round(rng.expovariate(1.0), 1) for _ in dates],
+            'precipitation_hours': [float(rng.randint(0, 24)) for _ in dates],
+            'weathercode': [rng.choice([0, 1, 2, 3, 61, 63, 71]) for _ in dates],
+            'sunshine_duration': [rng.uniform(0, 50000) for _ in dates],
+            'windspeed_10m_max': [round(rng.uniform(5, 60), 1) for _ in dates],
+            'pressure_msl_mean': [round(rng.uniform(980, 1040), 1) for _ in dates],
+            'cloudcover_mean': [rng.randint(0, 100) for _ in dates],
+            'relative_humidity_2m_mean': [rng.randint(40, 100) for _ in dates]
+        }
+    }
+
+
+def _save_weather_per_day(rows, table):
+    """Baseline: the former save_weather_to_database, one (pooled) connection and commit per day"""
+    query = sql.SQL("""
+        INSERT INTO {table} ({columns}) VALUES (
+            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+        ) ON CONFLICT (date) DO UPDATE SET
+    """).format(
+        table=sql.Identifier(table),
+        columns=sql.SQL(', ').join(map(sql.Identifier, WEATHER_DAILY_COLUMNS))
+    ) + sql.SQL(WEATHER_DAILY_UPSERT_SET)
+
+    saved = 0
+    for row in rows:
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(query, row)
+            conn.commit()
+            saved += 1
+        finally:
+            conn.close()
+    return saved
+
+
+def bench_weather_import(years=(1, 10)):
+    """
+    Time the ERA5 history import (row building + database write) per-day vs. bulk
+    """
+    writers = {
+        'per-day': lambda data: _save_weather_per_day(weather_daily_rows(data), BENCH_WEATHER_TABLE),
+        'bulk': lambda data: save_weather_daily_rows(weather_daily_rows(data), table=BENCH_WEATHER_TABLE)
+    }
+
+    results = []
+    try:
+        for n_years in years:
+            api_data = fake_era5_daily(datetime(2015, 1, 1).date(), 365 * n_years)
+            days = len(api_data['daily']['time'])
+
+            for method, write in writers.items():
+                _reset_table(BENCH_WEATHER_TABLE, like="weather_daily")
+                t0 = time.perf_counter()
+                saved = write(api_data)
+                elapsed = time.perf_counter() - t0
+
+                result = {
+                    'years': n_years,
+                    'days': days,
+                    'method': method,
+                    'saved': saved,
+                    'seconds': round(elapsed, 3)
+                }
+                results.append(result)
+                print(f"📊 {n_years:>2} years ({days:>5} days) | {method:<7} | {elapsed:8.3f}s")
+    finally:
+        _drop_table(BENCH_WEATHER_TABLE)
+
+    return results
+
+
+def _feature_engineering_rowwise(df):
+    """Former row-wise feature_engineering (apply per row), kept as the reference for parity"""
+    # Datums-Konvertierung
+    df['target_date'] = pd.to_datetime(df['target_date'])
+    
+    # --- 1. Renaming & Basic Weather ---
+    # Modell erwartet spezifische Namen
+    df['temp_max'] = df['temperature_2m_max']
+    df['temp_min'] = df['temperature_2m_min']
+    df['windspeed_max'] = df['wind_speed_10m_max']
+    df['cloudcover_mean'] = df['cloud_cover_mean']
+    
+    # Approximationen für fehlende DB-Spalten
+    # Humidity ist nicht im Forecast Table -> Setze Standardwert Kiel (ca 75%)
+    df['humidity'] = 75.0 
+    # Precipitation Hours ist nicht im Forecast Table -> Schätzung aus Summe (grob)
+    # Wenn Regen > 0, nehmen wir an es regnet ein paar Stunden. (Summe / 2 mm/h)
+    df['precipitation_hours'] = df['precipitation_sum'].apply(lambda x: min(24.0, x * 2.0) if x > 0 else 0)
+
+    # --- 2. Rolling Averages ---
+    # Wir haben Daten von T-14. Wir berechnen Rolling auf dem ganzen DF.
+    df = df.sort_values('target_date')
+    
+    # reservations_7d_avg (Durchschnitt der reservierten Personen letzte 7 Tage)
+    df['reservations_7d_avg'] = df['reservations_people'].rolling(window=7, min_periods=1).mean()
+    
+    # walkin_7d_avg (Durchschnitt der Walkins letzte 7 Tage - ACHTUNG: Für Zukunft unbekannt)
+    # Für die Zukunftstage müssen wir den *letzten bekannten* Wert nehmen (Shift).
+    # Da wir walkin_people für Zukunft = 0 haben, würde der Rolling Average abstürzen.
+    # Strategie: Wir berechnen den Rolling Average, und füllen Nullen in der Zukunft 
+    # mit dem letzten gültigen Wert auf (ffill).
+    df['walkin_7d_avg_raw'] = df['walkin_people'].rolling(window=7, min_periods=1).mean()
+    # Maskiere Zukunftswerte (wo walkin_people 0 ist, weil es Zukunft ist - grobe Logik)
+    today = pd.Timestamp(datetime.now().date())
+    df.loc[df['target_date'] >= today, 'walkin_7d_avg_raw'] = np.nan
+    df['walkin_7d_avg'] = df['walkin_7d_avg_raw'].ffill()
+    
+    # Fallback für ganz am Anfang
+    df['walkin_7d_avg'] = df['walkin_7d_avg'].fillna(0)
+
+    # --- 3. Zeitfeatures ---
+    df['weekday'] = df['target_date'].dt.weekday
+    df['month'] = df['target_date'].dt.month
+    df['is_weekend'] = df['weekday'].apply(lambda x: 1 if x >= 5 else 0)
+    
+    df['month_sin'] = np.sin((df['month'] - 1) * (2. * np.pi / 12))
+    df['month_cos'] = np.cos((df['month'] - 1) * (2. * np.pi / 12))
+    
+    # One-Hot Encoding für Weekdays (wd_1 bis wd_6, wd_0 ist Referenz/Drop)
+    for i in range(1, 7):
+        df[f'wd_{i}'] = (df['weekday'] == i).astype(int)
+
+    # --- 4. Holidays (DE, SH, HH, DK) ---
+    holidays_de = holidays.DE()
+    holidays_sh = holidays.DE(subdiv='SH')
+    holidays_hh = holidays.DE(subdiv='HH')
+    holidays_dk = holidays.DK()
+    
+    df['is_holiday_de'] = df['target_date'].apply(lambda x: 1 if x in holidays_de else 0)
+    df['is_holiday_sh'] = df['target_date'].apply(lambda x: 1 if x in holidays_sh else 0)
+    df['is_holiday_hh'] = df['target_date'].apply(lambda x: 1 if x in holidays_hh else 0)
+    df['is_holiday_dk'] = df['target_date'].apply(lambda x: 1 if x in holidays_dk else 0)
+    
+    # Schulferien bewusst 0: die Referenz misst nur den alten Zeilen-Pfad
+    df['is_ferien_sh'] = 0 
+    df['is_ferien_hh'] = 0
+    
+    # Brückentage
+    # Einfache Logik: Wenn morgen Feiertag (Do->Fr frei) oder gestern Feiertag (Mo->Di frei)
+    df['next_day_holiday'] = df['is_holiday_sh'].shift(-1).fillna(0)
+    df['prev_day_holiday'] = df['is_holiday_sh'].shift(1).fillna(0)
+    
+    # Bridge Day: Heute ist Montag (0) UND gestern war Holiday? Nein.
+    # Bridge Day klassisch: Heute ist Freitag (4) und Donnerstag war Holiday.
+    # Oder Heute ist Montag (0) und Dienstag ist Holiday.
+    df['bridge_day'] = 0
+    df.loc[(df['weekday'] == 4) & (df['prev_day_holiday'] == 1), 'bridge_day'] = 1
+    df.loc[(df['weekday'] == 0) & (df['next_day_holiday'] == 1), 'bridge_day'] = 1
+    
+    df['day_before_holiday'] = df['next_day_holiday']
+    df['day_after_holiday'] = df['prev_day_holiday']
+
+    # --- 5. Wetter Advanced & Squares ---
+    df['weather_score'] = df.apply(calculate_weather_score, axis=1)
+    
+    # Cozy: Kalt und Regen oder Windig
+    df['is_cozy_weather'] = ((df['temp_max'] < 10) & (df['precipitation_sum'] > 2)).astype(int)
+    # Tourist: Warm und Sonnig
+    df['is_tourist_weather'] = ((df['temp_max'] > 20) & (df['sunshine_duration'] > 5)).astype(int)
+    
+    # Squares
+    features_to_square = [
+        'temp_max', 'temp_min', 'precipitation_sum', 'precipitation_hours',
+        'humidity', 'sunshine_duration', 'windspeed_max', 'cloudcover_mean'
+    ]
+    for col in features_to_square:
+        df[f'{col}_sq'] = df[col] ** 2
+
+    # --- 6. Interaktionen ---
+    df['temp_x_weekend'] = df['temp_max'] * df['is_weekend']
+    df['reservations_x_weekend'] = df['reservations_people'] * df['is_weekend']
+    df['reservations_x_temp'] = df['reservations_people'] * df['temp_max']
+    df['rain_x_clouds'] = df['precipitation_sum'] * df['cloudcover_mean']
+
+    # --- Final: Filter auf ZUKUNFT (oder ab Heute) ---
+    # Wir haben Historie mitgeschleppt für Rolling Avgs, brauchen aber nur Predictions ab heute
+    df_future = df[df['target_date'] >= today].copy()
+    
+    return df_future
+
+
+def fake_prediction_base(days, seed=42):
+    """Frame shaped like run_query("prediction_base"), starting 14 days before today"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(datetime.now().date()) - pd.Timedelta(days=14)
+    dates = pd.date_range(start, periods=days, freq='D')
+    past = dates < pd.Timestamp(datetime.now().date())
+    return pd.DataFrame({
+        'target_date': dates.date,
+        'temperature_2m_max': rng.uniform(-5, 35, days).round(1),
+        'temperature_2m_min': rng.uniform(-10, 18, days).round(1),
+        # Viele Nulltage und exakte Schwellen (5, 15) für den Wetter-Score
+        'precipitation_sum': np.where(rng.random(days) < 0.3, 0.0, rng.choice([0.5, 2.0, 5.0, 8.3, 15.0, 20.1], days)),
+        'sunshine_duration': rng.uniform(0, 15, days).round(2),
+        'wind_speed_10m_max': rng.uniform(5, 60, days).round(1),
+        'cloud_cover_mean': rng.integers(0, 101, days).astype(float),
+        'weathercode': rng.choice([0, 1, 2, 3, 61, 63, 71], days).astype(float),
+        'reservations_count': rng.integers(0, 30, days),
+        'reservations_people': rng.integers(0, 120, days),
+        'avg_reservation_size': rng.uniform(0, 5, days),
+        'walkin_people': np.where(past, rng.integers(0, 80, days), 0)
+    })
+
+
+def bench_features(days=(16, 3650), repeat=3):
+    """
+    Row-wise vs. vectorized feature_engineering (no database needed)
+
+    Checks that both return the same frame before timing.
+    """
+    results = []
+    for n_days in days:
+        base = fake_prediction_base(n_days)
+
+        expected = _feature_engineering_rowwise(base.copy())
+        actual = feature_engineering(base.copy())
+        # Werte identisch; nur int64 vs. float64 bei precipitation_hours ohne Regentag kann abweichen.
+        # Bewusste Unterschiede: Schulferien sind echt (vorher 0), und Vortag/Folgetag am letzten
+        # Tag kommen aus dem Kalender statt 0 (vorher shift() über den Frame-Rand)
+        shared = [col for col in expected.columns if col not in ('is_ferien_sh', 'is_ferien_hh')]
+        pd.testing.assert_frame_equal(actual[shared].iloc[:-1], expected[shared].iloc[:-1], check_dtype=False)
+
+        timings = {}
+        for name, engineer in (('row-wise', _feature_engineering_rowwise), ('vectorized', feature_engineering)):
+            best = float('inf')
+            for _ in range(repeat):
+                frame = base.copy()
+                t0 = time.perf_counter()
+                engineer(frame)
+                best = min(best, time.perf_counter() - t0)
+            timings[name] = best
+
+            results.append({'days': n_days, 'method': name, 'seconds': round(best, 4)})
+            print(f"📊 {n_days:>5} days | {name:<10} | {best:8.4f}s")
+
+        print(f"   speedup: {timings['row-wise'] / timings['vectorized']:.1f}x")
+
+    return results
+
+
+def bench_scenarios(counts=(5, 100, 500), days=16, repeat=3):
+    """
+    Score `count` weather scenarios over the forecast days in one stacked call
+    (random reduced-form coefficients, no model file or database needed)
+    """
+    features = feature_engineering(fake_prediction_base(days + 14))
+    feature_cols = [col for col in features.columns if col not in ('target_date', 'walkin_people', 'walkin_7d_avg_raw')]
+    scorer = RidgeScorer(feature_cols, np.random.default_rng(0).normal(size=len(feature_cols)), 20.0)
+
+    results = []
+    for count in counts:
+        temp_deltas = np.round(np.linspace(-5, 5, max(1, -(-count // 4))), 2)
+        scenarios = scenario_grid(temp_deltas=temp_deltas, precipitation=(None, 0.0, 5.0, 15.0))[:count]
+
+        best = float('inf')
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            cube = run_scenarios(features, scorer.predict, feature_cols, scenarios)
+            best = min(best, time.perf_counter() - t0)
+
+        results.append({'scenarios': len(scenarios), 'days': len(cube), 'seconds': round(best, 4)})
+        print(f"📊 {len(scenarios):>4} scenarios × {len(cube)} days | {best * 1000:8.2f} ms")
+
+    return results
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    sizes = [int(arg) for arg in sys.argv[2:]] or [1000, 10000, 100000]
+    if command == "bookings":
+        bench_booking_writes(sizes)
+    elif command == "parse":
+        bench_parse(sizes)
+    elif command == "weather":
+        bench_weather_import([int(arg) for arg in sys.argv[2:]] or [1, 10])
+    elif command == "features":
+        bench_features([int(arg) for arg in sys.argv[2:]] or [16, 3650])
+    elif command == "scenarios":
+        bench_scenarios([int(arg) for arg in sys.argv[2:]] or [5, 100, 500])
+    else:
+        print(__doc__)
@@ -0,0 +1,225 @@
+"""
+Booking Cache - compressed on-disk cache for raw bookingsAnalytics pages
+SQLite store keyed by (location_id, date range, page cursor), payloads zlib-compressed JSON
+"""
+import sys
+import os
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import BOOKING_CACHE_CONFIG
+
+logger = logging.getLogger("booking-cache")
+
+DEFAULT_TTL_SECONDS = BOOKING_CACHE_CONFIG['ttl_hours'] * 3600
+DEFAULT_MAX_BYTES = int(BOOKING_CACHE_CONFIG['max_mb'] * 1024 * 1024)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS pages (
+        location_id TEXT NOT NULL,
+        range_start TEXT NOT NULL,
+        range_end TEXT NOT NULL,
+        page_cursor TEXT NOT NULL,
+        start_ms INTEGER NOT NULL,
+        end_ms INTEGER NOT NULL,
+        next_cursor TEXT,
+        has_more INTEGER NOT NULL,
+        booking_count INTEGER NOT NULL,
+        payload BLOB NOT NULL,
+        size_bytes INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        last_access REAL NOT NULL,
+        PRIMARY KEY (location_id, range_start, range_end, page_cursor)
+    );
+    CREATE INDEX IF NOT EXISTS idx_pages_range ON pages (location_id, start_ms, end_ms);
+    CREATE INDEX IF NOT EXISTS idx_pages_access ON pages (last_access);
+"""
+
+
+def _to_ms(iso_date):
+    """ISO date string → epoch milliseconds (same clock as booking['date'])"""
+    return int(datetime.fromisoformat(iso_date).timestamp() * 1000)
+
+
+def _cursor_key(cursor):
+    return json.dumps(cursor)
+
+
+class BookingCache:
+    """
+    Page cache for the Teburio bookings API
+
+    - exact hits per (location, range, cursor) page
+    - partial-range hits: a complete cached range serves any sub-range
+    - TTL eviction and a size limit (least recently used pages go first)
+    """
+
+    def __init__(self, path, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = str(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.stats = {'page_hits': 0, 'page_misses': 0, 'range_hits': 0, 'evicted': 0}
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def _fresh_after(self):
+        return time.time() - self.ttl_seconds
+
+    def get_page(self, location_id, range_start, range_end, cursor):
+        """Cached bookingsAnalytics payload of one page, or None"""
+        key = (location_id, range_start, range_end, _cursor_key(cursor))
+        with self._lock:
+            row = self._db.execute("""
+                SELECT payload, next_cursor, has_more, booking_count FROM pages
+                WHERE location_id = ? AND range_start = ? AND range_end = ? AND page_cursor = ?
+                  AND created_at >= ?
+            """, (*key, self._fresh_after())).fetchone()
+
+            if row is None:
+                self.stats['page_misses'] += 1
+                return None
+
+            self._db.execute("""
+                UPDATE pages SET last_access = ?
+                WHERE location_id = ? AND range_start = ? AND range_end = ? AND page_cursor = ?
+            """, (time.time(), *key))
+            self._db.commit()
+            self.stats['page_hits'] += 1
+
+        payload, next_cursor, has_more, booking_count = row
+        return {
+            'bookings': json.loads(zlib.decompress(payload)),
+            'cursor': json.loads(next_cursor) if next_cursor else None,
+            'hasMore': bool(has_more),
+            'count': booking_count
+        }
+
+    def put_page(self, location_id, range_start, range_end, cursor, analytics_data):
+        """Store one API page (compact JSON, zlib level 6)"""
+        payload = zlib.compress(
+            json.dumps(analytics_data['bookings'], separators=(',', ':'), ensure_ascii=False).encode('utf-8'),
+            6
+        )
+        next_cursor = analytics_data.get('cursor')
+        now = time.time()
+
+        with self._lock:
+            self._db.execute("""
+                INSERT OR REPLACE INTO pages (
+                    location_id, range_start, range_end, page_cursor, start_ms, end_ms,
+                    next_cursor, has_more, booking_count, payload, size_bytes, created_at, last_access
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                location_id, range_start, range_end, _cursor_key(cursor),
+                _to_ms(range_start), _to_ms(range_end),
+                json.dumps(next_cursor) if next_cursor is not None else None,
+                int(bool(analytics_data.get('hasMore', False))),
+                len(analytics_data['bookings']), payload, len(payload), now, now
+            ))
+            self._db.commit()
+
+        self.evict()
+
+    def _walk_range(self, location_id, range_start, range_end):
+        """All bookings of a fully cached cursor chain, or None if a page is missing"""
+        bookings = []
+        cursor = None
+        while True:
+            page = self.get_page(location_id, range_start, range_end, cursor)
+            if page is None:
+                return None
+            bookings.extend(page['bookings'])
+            if not page['hasMore'] or page['cursor'] is None:
+                return bookings
+            cursor = page['cursor']
+
+    def get_range(self, location_id, range_start, range_end):
+        """
+        Bookings for a date range from any complete cached range covering it
+
+        Returns:
+            list: Bookings filtered to [range_start, range_end], None on a miss
+        """
+        start_ms, end_ms = _to_ms(range_start), _to_ms(range_end)
+        with self._lock:
+            candidates = self._db.execute("""
+                SELECT range_start, range_end FROM pages
+                WHERE location_id = ? AND page_cursor = ? AND start_ms <= ? AND end_ms >= ?
+                  AND created_at >= ?
+                ORDER BY end_ms - start_ms
+            """, (location_id, _cursor_key(None), start_ms, end_ms, self._fresh_after())).fetchall()
+
+        for cached_start, cached_end in candidates:
+            bookings = self._walk_range(location_id, cached_start, cached_end)
+            if bookings is None:
+                continue
+            with self._lock:
+                self.stats['range_hits'] += 1
+            if (cached_start, cached_end) == (range_start, range_end):
+                return bookings
+            return [b for b in bookings if start_ms <= b['date'] <= end_ms]
+        return None
+
+    def evict(self):
+        """Drop expired pages, then least recently used ones above max_bytes"""
+        with self._lock:
+            deleted = self._db.execute(
+                "DELETE FROM pages WHERE created_at < ?", (self._fresh_after(),)
+            ).rowcount
+
+            total = self._db.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM pages").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self._db.execute(
+                    "SELECT rowid, size_bytes FROM pages ORDER BY last_access"
+                ).fetchall()
+                doomed = []
+                for rowid, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    doomed.append((rowid,))
+                    total -= size
+                self._db.executemany("DELETE FROM pages WHERE rowid = ?", doomed)
+                deleted += len(doomed)
+
+            self._db.commit()
+            self.stats['evicted'] += deleted
+
+        if deleted:
+            logger.info(f"🧹 Evicted {deleted} cached booking pages")
+        return deleted
+
+    def get_stats(self):
+        with self._lock:
+            pages, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM pages"
+            ).fetchone()
+            return {**self.stats, 'pages': pages, 'size_bytes': size}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def open_cache(path):
+    """Shared BookingCache instance per store path"""
+    path = str(path)
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = BookingCache(path)
+        return _caches[path]
@@ -6,9 +6,11 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import time
+import numpy as np
+import pandas as pd
 import requests
-import json
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
 try:
@@ -19,15 +21,82 @@ except ImportError:
     ZoneInfo = None 
 
 
-from config.settings import API_CONFIG, DATE_CONFIG
+from config.settings import API_CONFIG, BOOKING_CACHE_CONFIG, DATE_CONFIG, SYNC_CONFIG
 from config.logging_config import setup_logging
-from src.database import save_booking_snapshot, get_db_connection, save_booking, save_booking_snapshot, save_bookings_batch
-from src.utils import parse_booking
+from src.database import (
+    save_booking_snapshot, get_db_connection, save_booking, upsert_bookings,
+    save_booking_snapshots_batch, snapshot_bookings_from_table,
+    get_sync_checkpoints, clear_sync_checkpoints, expire_sync_checkpoints,
+    get_sync_state, record_sync_success
+)
+from src.utils import parse_bookings_page, RateLimiter
+from src import http_client
+from src.booking_cache import open_cache
 
 
 
 logger = setup_logging("booking-sync")
 
+BOOKINGS_QUERY = """
+query bookingsAnalytics($locationId: String!, $date: Date!, $endDate: Date!, $startingAfter: Date) {
+    bookingsAnalytics(locationId: $locationId, date: $date, endDate: $endDate, startingAfter: $startingAfter) {
+        cursor
+        hasMore
+        count
+        bookings {
+            _id
+            date
+            endDate
+            people
+            cancelled
+            noShow
+            walkIn
+            source
+            host
+            tracking {
+                source
+                medium
+                campaign
+                __typename
+            }
+            rating
+            tagIds
+            bookingTagsCount {
+                key
+                value
+                __typename
+            }
+            payment {
+                status
+                __typename
+            }
+            __typename
+        }
+        __typename
+    }
+}
+"""
+
+# Safety cap for a single cursor walk (one range or one shard)
+MAX_PAGES = 50
+
+# Row key in booking_sync_state for the daily job
+SYNC_STATE_NAME = "daily-bookings"
+
+
+class BookingApiError(Exception):
+    """GraphQL level error returned by the Teburio API"""
+
+
+class IncompleteFetchError(Exception):
+    """Some shards of a sharded fetch failed or hit the page cap"""
+
+    def __init__(self, failed_shards, bookings):
+        super().__init__(f"{len(failed_shards)} shards incomplete: {sorted(failed_shards)}")
+        self.failed_shards = failed_shards
+        self.bookings = bookings
+
+
 def fetch_bookings(start_date=None, end_date=None, cache_file=None):
     """
     Fetch bookings from GraphQL API with optional caching
@@ -35,7 +104,7 @@ def fetch_bookings(start_date=None, end_date=None, cache_file=None):
     Args:
         start_date (str): ISO format "2025-11-27T00:00:00+01:00"
         end_date (str): ISO format "2025-11-29T23:59:59+01:00"  
-        cache_file (str): Path to cache file (optional)
+        cache_file (str): Path to the booking cache store (optional, see src/booking_cache.py)
     
     Returns:
         list: Booking data from API
@@ -46,62 +115,18 @@ def fetch_bookings(start_date=None, end_date=None, cache_file=None):
     end_date = end_date or DATE_CONFIG['default_end']
     
     # Check cache first
-    if cache_file and Path(cache_file).exists():
-        print(f"📁 Loading bookings from cache: {cache_file}")
-        try:
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cached_data = json.load(f)
-            print(f"✅ Loaded {len(cached_data['bookings'])} bookings from cache")
-            return cached_data['bookings']
-        except Exception as e:
-            print(f"❌ Cache loading failed: {e}")
-            print("🔄 Falling back to API call...")
-    
-    # GraphQL Query
-    query = """
-    query bookingsAnalytics($locationId: String!, $date: Date!, $endDate: Date!, $startingAfter: Date) {
-        bookingsAnalytics(locationId: $locationId, date: $date, endDate: $endDate, startingAfter: $startingAfter) {
-            cursor
-            hasMore
-            count
-            bookings {
-                _id
-                date
-                endDate
-                people
-                cancelled
-                noShow
-                walkIn
-                source
-                host
-                tracking {
-                    source
-                    medium
-                    campaign
-                    __typename
-                }
-                rating
-                tagIds
-                bookingTagsCount {
-                    key
-                    value
-                    __typename
-                }
-                payment {
-                    status
-                    __typename
-                }
-                __typename
-            }
-            __typename
-        }
-    }
-    """
+    cache = open_cache(cache_file) if cache_file else None
+    if cache:
+        cached_page = cache.get_page(API_CONFIG['location_id'], start_date, end_date, None)
+        if cached_page is not None:
+            print(f"✅ Loaded {len(cached_page['bookings'])} bookings from cache {cache_file}")
+            return cached_page['bookings']
+    
     
     # Request payload
     payload = {
         "operationName": "bookingsAnalytics",
-        "query": query,
+        "query": BOOKINGS_QUERY,
         "variables": {
             "locationId": API_CONFIG['location_id'],
             "date": start_date,
@@ -118,11 +143,11 @@ def fetch_bookings(start_date=None, end_date=None, cache_file=None):
     
     try:
         print(f"🌐 Fetching bookings from {start_date} to {end_date}")
-        response = requests.post(
-            url=API_CONFIG['url'],
+        response = http_client.post(
+            'teburio',
+            API_CONFIG['url'],
             json=payload,
-            headers=headers,
-            timeout=30
+            headers=headers
         )
         
         response.raise_for_status()
@@ -139,21 +164,9 @@ def fetch_bookings(start_date=None, end_date=None, cache_file=None):
         print(f"✅ Fetched {len(bookings)} bookings from API")
         
         # Save to cache if requested
-        if cache_file:
-            cache_data = {
-                "fetched_at": datetime.now().isoformat(),
-                "date_range": {"start": start_date, "end": end_date},
-                "count": analytics_data['count'],
-                "bookings": bookings
-            }
-            
-            # Create directory if needed
-            Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, indent=2, ensure_ascii=False)
-            
-            print(f"💾 Saved cache to {cache_file}")
+        if cache:
+            cache.put_page(API_CONFIG['location_id'], start_date, end_date, None, analytics_data)
+            print(f"💾 Saved page to cache {cache_file}")
         
         return bookings
         
@@ -163,10 +176,57 @@ def fetch_bookings(start_date=None, end_date=None, cache_file=None):
 
 
 
-def generate_booking_snapshot(snapshot_date=None, forecast_days=60):
+def _snapshot_window_synced(state, snapshot_date, end_date):
+    """True if today's successful booking sync covered the whole snapshot window"""
+    if not state or not state.get('last_success_at'):
+        return False
+    if state['last_success_at'].astimezone().date() != datetime.now().date():
+        return False
+    return (state['last_range_start'][:10] <= snapshot_date.isoformat()
+            and state['last_range_end'][:10] >= end_date.isoformat())
+
+
+def _aggregate_snapshot_days(fresh_bookings, snapshot_date):
+    """Daily snapshot rows from raw API bookings (one groupby instead of a dict loop)"""
+    columns = parse_bookings_page(fresh_bookings)
+    # NULL-Personen zählen wie im SQL-SUM nicht mit
+    people = pd.Series(columns['people'], dtype='float64').fillna(0).to_numpy(dtype=np.int64)
+    confirmed = ~columns['cancelled'] & ~columns['no_show']
+    online = confirmed & (columns['source'] == 'widget')
+    walk_in = confirmed & ~online & columns['walk_in']
+    intern = confirmed & ~columns['walk_in'] & pd.isna(columns['source'])
+
+    daily = pd.DataFrame({
+        'forecast_date': columns['booking_date'].astype('datetime64[D]'),
+        'reservierungen': 1,
+        'bestaetigt_personen': np.where(confirmed, people, 0),
+        'storniert_personen': np.where(columns['cancelled'], people, 0),
+        'online_personen': np.where(online, people, 0),
+        'intern_personen': np.where(intern, people, 0),
+        'walk_in_personen': np.where(walk_in, people, 0)
+    }).groupby('forecast_date', sort=True).sum()
+
+    daily.index = daily.index.date
+    return [
+        {'snapshot_created_at': snapshot_date, 'forecast_date': forecast_date,
+         **{col: int(value) for col, value in row.items()}}
+        for forecast_date, row in daily.iterrows()
+    ]
+
+
+def generate_booking_snapshot(snapshot_date=None, forecast_days=60, source="auto"):
     """
-    Generate fresh booking snapshot by fetching current data from Teburio API
+    Generate the daily booking snapshot for today .. today + forecast_days
+    
+    source:
+        "db"   - aggregate the synced bookings table in one INSERT ... SELECT
+        "api"  - fetch fresh bookings from Teburio and aggregate them in pandas
+        "auto" - "db" when today's booking sync covered the whole window, else "api"
+    
+    Returns:
+        dict: status, source, days written and timings (seconds per phase)
     """
+    t_start = time.perf_counter()
     
     if not snapshot_date:
         snapshot_date = datetime.now().date()
@@ -175,6 +235,26 @@ def generate_booking_snapshot(snapshot_date=None, forecast_days=60):
     start_date = snapshot_date
     end_date = snapshot_date + timedelta(days=forecast_days)
     
+    if source == "auto":
+        source = "db" if _snapshot_window_synced(get_sync_state(SYNC_STATE_NAME), start_date, end_date) else "api"
+    
+    result = {"status": "error", "source": source, "snapshot_date": snapshot_date.isoformat(), "days": 0}
+    
+    if source == "db":
+        logger.info(f"📊 Generating booking snapshot for {snapshot_date} from the bookings table")
+        t0 = time.perf_counter()
+        days = snapshot_bookings_from_table(snapshot_date, start_date, end_date)
+        result["write_seconds"] = round(time.perf_counter() - t0, 3)
+        result["total_seconds"] = round(time.perf_counter() - t_start, 3)
+        
+        if days is None:
+            logger.error("❌ Snapshot from bookings table failed")
+            return result
+        
+        result.update(status="success", days=days)
+        logger.info(f"✅ Snapshot saved: {days} days in {result['total_seconds']}s")
+        return result
+    
     # KORREKTUR: Zeitzonen-Handling
     # Wir nutzen "Europe/Berlin", damit Sommer-/Winterzeit automatisch korrekt ist.
     if ZoneInfo:
@@ -196,283 +276,474 @@ def generate_booking_snapshot(snapshot_date=None, forecast_days=60):
     logger.info(f"📊 Generating FRESH booking snapshot for {snapshot_date}")
     logger.info(f"📅 Fetching from Teburio: {start_date_str} to {end_date_str}")
     
-    # Hole aktuelle Daten (OHNE Cache!)
-    fresh_bookings = fetch_bookings_paginated(
-        start_date=start_date_str,
-        end_date=end_date_str,
-        cache_file=None  # Kein Cache - immer fresh!
-    )
+    # Hole aktuelle Daten (OHNE Cache!), parallel in Datums-Shards - ein unvollständiger
+    # Shard (Fehler oder Seitenlimit) bricht den Snapshot ab statt zu wenig Buchungen zu zählen
+    t0 = time.perf_counter()
+    try:
+        fresh_bookings = fetch_bookings_sharded(
+            start_date=start_date_str,
+            end_date=end_date_str,
+            cache_file=None  # Kein Cache - immer fresh!
+        )
+    except IncompleteFetchError as e:
+        logger.error(f"❌ Snapshot fetch incomplete, nothing saved: {e}")
+        result["total_seconds"] = round(time.perf_counter() - t_start, 3)
+        return result
+    result["fetch_seconds"] = round(time.perf_counter() - t0, 3)
     
     if not fresh_bookings:
         logger.error("❌ No fresh bookings received from API")
-        return False
+        result["total_seconds"] = round(time.perf_counter() - t_start, 3)
+        return result
     
     logger.info(f"✅ Received {len(fresh_bookings)} fresh bookings from API")
+    result["bookings"] = len(fresh_bookings)
     
-    daily_stats = {}
+    t0 = time.perf_counter()
+    snapshots = _aggregate_snapshot_days(fresh_bookings, snapshot_date)
+    result["aggregate_seconds"] = round(time.perf_counter() - t0, 3)
     
-    for booking in fresh_bookings:
-        # Parse booking date
-        booking_date = datetime.fromtimestamp(booking['date'] / 1000).date()
-        
-        if booking_date not in daily_stats:
-            daily_stats[booking_date] = {
-                'reservierungen': 0,
-                'bestaetigt_personen': 0,
-                'storniert_personen': 0,
-                'online_personen': 0,
-                'intern_personen': 0,
-                'walk_in_personen': 0
-            }
-        
-        # Analysiere Booking-Status
-        people = booking['people']
-        cancelled = booking.get('cancelled') or False
-        no_show = booking.get('noShow') or False
-        walk_in = booking.get('walkIn') or False
-        source = booking.get('source')
-        
-        daily_stats[booking_date]['reservierungen'] += 1
-        
-        if not cancelled and not no_show:
-            daily_stats[booking_date]['bestaetigt_personen'] += people
-            
-            if source == 'widget':
-                daily_stats[booking_date]['online_personen'] += people
-            elif walk_in:
-                daily_stats[booking_date]['walk_in_personen'] += people
-            elif source is None:
-                daily_stats[booking_date]['intern_personen'] += people
-        
-        if cancelled:
-            daily_stats[booking_date]['storniert_personen'] += people
-            
-    # Speichern...
-    successful_saves = 0
-    failed_saves = 0
+    logger.info(f"💾 Saving {len(snapshots)} daily forecasts to database...")
+    t0 = time.perf_counter()
+    saved = save_booking_snapshots_batch(snapshots)
+    result["write_seconds"] = round(time.perf_counter() - t0, 3)
+    result["total_seconds"] = round(time.perf_counter() - t_start, 3)
     
-    logger.info(f"💾 Saving {len(daily_stats)} daily forecasts to database...")
+    if saved != len(snapshots):
+        logger.error(f"❌ Failed to save {len(snapshots)} snapshot days")
+        return result
     
-    for forecast_date, stats in daily_stats.items():
-        snapshot_data = {
-            'snapshot_created_at': snapshot_date,
-            'forecast_date': forecast_date,
-            **stats
-        }
-        
-        if save_booking_snapshot(snapshot_data):
-            successful_saves += 1
-        else:
-            failed_saves += 1
-            logger.error(f"❌ Failed to save snapshot for {forecast_date}")
-            
+    result.update(status="success", days=saved)
+    logger.info(f"✅ Snapshot saved: {saved} days in {result['total_seconds']}s")
+    return result
+
 def fetch_bookings_paginated(start_date=None, end_date=None, cache_file=None):
     """
     Fetch ALL bookings with pagination support
-    Uses cursor from API response to get next page
+    
+    Runs through fetch_bookings_sharded (concurrent date shards, each following
+    its own cursor). Incomplete shards are logged and their partial bookings
+    returned, like the former sequential loop did on errors.
+    With cache_file, pages are served from / stored in the booking cache
     """
-    start_date = start_date or DATE_CONFIG['default_start']
-    end_date = end_date or DATE_CONFIG['default_end']
+    return fetch_bookings_sharded(start_date, end_date, cache_file=cache_file, allow_partial=True)
+
+
+def fetch_bookings_page(start_date, end_date, cursor=None, timeout=None, cache=None):
+    """
+    Fetch one page of bookingsAnalytics through the shared HTTP session
+    (keep-alive, retries with backoff on 429/5xx), optionally via a BookingCache
+
+    Returns:
+        dict: bookingsAnalytics payload (cursor, hasMore, count, bookings)
+
+    Raises:
+        BookingApiError: GraphQL errors in the response
+        requests.exceptions.RequestException: network/HTTP errors
+    """
+    if cache:
+        cached_page = cache.get_page(API_CONFIG['location_id'], start_date, end_date, cursor)
+        if cached_page is not None:
+            return cached_page
     
-    # Check cache first
-    if cache_file and Path(cache_file).exists():
-        logger.info(f"📁 Loading bookings from cache: {cache_file}")
-        try:
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cached_data = json.load(f)
-            logger.info(f"✅ Loaded {len(cached_data['bookings'])} bookings from cache")
-            return cached_data['bookings']
-        except Exception as e:
-            logger.error(f"❌ Cache loading failed: {e}")
-            logger.info("🔄 Falling back to API call...")
-    
-    # Start pagination
-    all_bookings = []
-    cursor = None
-    page = 1
-    total_fetched = 0
+    payload = {
+        "operationName": "bookingsAnalytics",
+        "query": BOOKINGS_QUERY,
+        "variables": {
+            "locationId": API_CONFIG['location_id'],
+            "date": start_date,
+            "endDate": end_date,
+            "startingAfter": cursor  # This is the pagination key!
+        }
+    }
+    
+    headers = {
+        "content-type": "application/json",
+        "account_token": API_CONFIG['token']
+    }
     
-    logger.info(f"🌐 Starting paginated fetch from {start_date} to {end_date}")
+    request_kwargs = {"timeout": timeout} if timeout else {}
+    response = http_client.post(
+        'teburio',
+        API_CONFIG['url'],
+        json=payload,
+        headers=headers,
+        **request_kwargs
+    )
+    response.raise_for_status()
+    data = response.json()
+    
+    if 'errors' in data:
+        raise BookingApiError(data['errors'])
+    
+    analytics_data = data['data']['bookingsAnalytics']
+    if cache:
+        cache.put_page(API_CONFIG['location_id'], start_date, end_date, cursor, analytics_data)
+    return analytics_data
+
+
+def day_aligned_range(start_date, end_date):
+    """Widen an ISO range to whole days, so reruns of the same days share one checkpoint key"""
+    start = datetime.fromisoformat(start_date).replace(hour=0, minute=0, second=0, microsecond=0)
+    end = datetime.fromisoformat(end_date).replace(hour=23, minute=59, second=59, microsecond=0)
+    return start.isoformat(), end.isoformat()
+
+
+def split_date_range(start_date, end_date, shard_days=7):
+    """
+    Split an ISO date range into consecutive shards aligned to midnight
+
+    Returns:
+        list: [(shard_start_iso, shard_end_iso), ...] covering the whole range
+    """
+    start = datetime.fromisoformat(start_date)
+    end = datetime.fromisoformat(end_date)
+    
+    shards = []
+    current = start
+    while current <= end:
+        next_start = datetime.combine(
+            current.date() + timedelta(days=shard_days), datetime.min.time()
+        ).replace(tzinfo=current.tzinfo)
+        shard_end = min(next_start - timedelta(milliseconds=1), end)
+        shards.append((
+            current.isoformat(timespec='milliseconds'),
+            shard_end.isoformat(timespec='milliseconds')
+        ))
+        current = next_start
+    return shards
+
+
+def _fetch_shard(shard_start, shard_end, rate_limiter, max_pages, cache=None):
+    """Follow the cursor of one shard; returns (bookings, pages, complete)"""
+    if cache:
+        cached_bookings = cache.get_range(API_CONFIG['location_id'], shard_start, shard_end)
+        if cached_bookings is not None:
+            return cached_bookings, 0, True
+    
+    bookings = []
+    cursor = None
+    pages = 0
     
     while True:
-        logger.info(f"📄 Fetching page {page}...")
+        rate_limiter.wait()
+        try:
+            analytics_data = fetch_bookings_page(shard_start, shard_end, cursor, cache=cache)
+        except (BookingApiError, requests.exceptions.RequestException) as e:
+            logger.error(f"❌ Shard {shard_start[:10]}–{shard_end[:10]} failed on page {pages + 1}: {e}")
+            return bookings, pages, False
         
-        # GraphQL Query
-        query = """
-        query bookingsAnalytics($locationId: String!, $date: Date!, $endDate: Date!, $startingAfter: Date) {
-            bookingsAnalytics(locationId: $locationId, date: $date, endDate: $endDate, startingAfter: $startingAfter) {
-                cursor
-                hasMore
-                count
-                bookings {
-                    _id
-                    date
-                    endDate
-                    people
-                    cancelled
-                    noShow
-                    walkIn
-                    source
-                    host
-                    tracking {
-                        source
-                        medium
-                        campaign
-                        __typename
-                    }
-                    rating
-                    tagIds
-                    bookingTagsCount {
-                        key
-                        value
-                        __typename
-                    }
-                    payment {
-                        status
-                        __typename
-                    }
-                    __typename
-                }
-                __typename
-            }
-        }
-        """
+        pages += 1
+        bookings.extend(analytics_data['bookings'])
         
-        # Request payload with cursor for pagination
-        payload = {
-            "operationName": "bookingsAnalytics",
-            "query": query,
-            "variables": {
-                "locationId": API_CONFIG['location_id'],
-                "date": start_date,
-                "endDate": end_date,
-                "startingAfter": cursor  # This is the pagination key!
-            }
-        }
+        cursor = analytics_data.get('cursor')
+        if not analytics_data.get('hasMore', False) or not cursor:
+            return bookings, pages, True
         
-        headers = {
-            "content-type": "application/json",
-            "account_token": API_CONFIG['token']
+        if pages >= max_pages:
+            logger.error(f"❌ Shard {shard_start[:10]}–{shard_end[:10]} hit the page cap ({max_pages}), results truncated - use smaller shards")
+            return bookings, pages, False
+
+
+def fetch_bookings_sharded(start_date=None, end_date=None, shard_days=7, max_workers=4,
+                           requests_per_second=5.0, max_pages_per_shard=MAX_PAGES, cache_file=None,
+                           allow_partial=False):
+    """
+    Fetch ALL bookings by splitting the range into date shards
+    
+    Shards are fetched concurrently (bounded thread pool, shared rate limit),
+    every shard follows its own cursor and the results are deduplicated by _id.
+    Keep shard_days small enough that a single shard stays below the page cap.
+    With cache_file, shards already in the booking cache are not re-downloaded.
+    
+    Returns:
+        list: Booking data from API
+    
+    Raises:
+        IncompleteFetchError: a shard failed or hit the page cap (carries the partial
+            bookings); with allow_partial=True the partial list is returned instead
+    """
+    start_date = start_date or DATE_CONFIG['default_start']
+    end_date = end_date or DATE_CONFIG['default_end']
+    
+    shards = split_date_range(start_date, end_date, shard_days)
+    rate_limiter = RateLimiter(requests_per_second)
+    cache = open_cache(cache_file) if cache_file else None
+    
+    logger.info(
+        f"🌐 Starting sharded fetch from {start_date} to {end_date} "
+        f"({len(shards)} shards à {shard_days} days, {max_workers} workers)"
+    )
+    
+    bookings_by_id = {}
+    total_pages = 0
+    failed_shards = []
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_fetch_shard, shard_start, shard_end, rate_limiter, max_pages_per_shard, cache): (shard_start, shard_end)
+            for shard_start, shard_end in shards
         }
+        for future in as_completed(futures):
+            shard_bookings, pages, complete = future.result()
+            total_pages += pages
+            if not complete:
+                failed_shards.append(futures[future])
+            for booking in shard_bookings:
+                bookings_by_id[booking['_id']] = booking
+    
+    bookings = list(bookings_by_id.values())
+    if failed_shards:
+        logger.error(f"❌ {len(failed_shards)}/{len(shards)} shards incomplete: {sorted(failed_shards)}")
+        if not allow_partial:
+            raise IncompleteFetchError(failed_shards, bookings)
+    
+    logger.info(f"🎉 Sharded fetch complete! {len(bookings)} unique bookings from {total_pages} pages")
+    
+    return bookings
+
+
+def iter_booking_pages(start_date, end_date, cursor=None, max_pages=MAX_PAGES, rate_limiter=None):
+    """
+    Generator over the pages of one date range
+    
+    Yields:
+        tuple: (bookings, next_cursor) - next_cursor is None on the last page
+    
+    Stops after max_pages (the caller keeps the last cursor to continue later).
+    API errors are raised, so the caller's last committed checkpoint stays valid.
+    """
+    pages = 0
+    while True:
+        if rate_limiter:
+            rate_limiter.wait()
+        analytics_data = fetch_bookings_page(start_date, end_date, cursor)
+        pages += 1
         
-        try:
-            response = requests.post(
-                url=API_CONFIG['url'],
-                json=payload,
-                headers=headers,
-                timeout=30
-            )
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            # Check for GraphQL errors
-            if 'errors' in data:
-                logger.error(f"❌ GraphQL Errors: {data['errors']}")
-                break
-                
-            analytics_data = data['data']['bookingsAnalytics']
-            bookings = analytics_data['bookings']
-            
-            # Add bookings to our collection
-            all_bookings.extend(bookings)
-            total_fetched += len(bookings)
-            
-            logger.info(f"✅ Page {page}: Got {len(bookings)} bookings (Total: {total_fetched})")
-            
-            # Check if more pages available
-            has_more = analytics_data.get('hasMore', False)
-            if not has_more:
-                logger.info("🏁 No more pages available")
-                break
-            
-            # Get cursor for next page
-            cursor = analytics_data.get('cursor')
-            if not cursor:
-                logger.warning("🏁 No cursor for next page, stopping pagination")
-                break
+        next_cursor = analytics_data.get('cursor') if analytics_data.get('hasMore', False) else None
+        yield analytics_data['bookings'], next_cursor
+        
+        if next_cursor is None:
+            return
+        if pages >= max_pages:
+            logger.warning(f"⚠️ Page cap ({max_pages}) reached for {start_date[:10]}–{end_date[:10]}, will resume from checkpoint")
+            return
+        cursor = next_cursor
+
+
+def _sync_shard(range_key, shard_start, shard_end, checkpoint, rate_limiter, max_pages):
+    """
+    Stream one shard page by page: fetch → parse → upsert (+ checkpoint in the same commit)
+    
+    Returns:
+        tuple: (stats dict, complete flag)
+    """
+    cursor = checkpoint['cursor'] if checkpoint else None
+    pages = checkpoint['pages'] if checkpoint else 0
+    rows = checkpoint['rows'] if checkpoint else 0
+    
+    if cursor is not None:
+        logger.info(f"⏩ Resuming shard {shard_start[:10]}–{shard_end[:10]} after page {pages}")
+    
+    stats = {"fetched": 0, "inserted": 0, "updated": 0, "unchanged": 0, "failed": 0, "pages": 0}
+    
+    try:
+        for raw_page, next_cursor in iter_booking_pages(shard_start, shard_end, cursor, max_pages, rate_limiter):
+            stats["fetched"] += len(raw_page)
+            try:
+                page_parsed = parse_bookings_page(raw_page)
+            except (KeyError, TypeError, ValueError) as e:
+                # Checkpoint bleibt vor dieser Seite stehen, die anderen Shards laufen weiter
+                logger.error(f"❌ Unparseable page in shard {shard_start[:10]}–{shard_end[:10]} after page {pages}: {e!r}")
+                stats["failed"] += len(raw_page)
+                return stats, False
             
-            page += 1
+            write_stats = upsert_bookings(page_parsed, skip_unchanged=True, checkpoint={
+                'range_key': range_key,
+                'shard_start': shard_start,
+                'shard_end': shard_end,
+                'cursor': next_cursor,
+                'pages': pages + 1,
+                'rows': rows + len(raw_page),
+                'done': next_cursor is None
+            })
+            if write_stats is None:
+                # Checkpoint was not advanced: the next run restarts at this page
+                stats["failed"] += len(raw_page)
+                return stats, False
             
-            if page > 50: 
-                logger.warning("⚠️ Safety break: Too many pages")
-                break
+            pages += 1
+            rows += len(raw_page)
+            stats["pages"] += 1
+            for key in ("inserted", "updated", "unchanged"):
+                stats[key] += write_stats[key]
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"❌ API Request failed on page {page}: {e}")
-            break
-    
-    logger.info(f"🎉 Pagination complete! Total bookings fetched: {len(all_bookings)}")
-    
-    # Save to cache if requested
-    if cache_file and all_bookings:
-        cache_data = {
-            "fetched_at": datetime.now().isoformat(),
-            "date_range": {"start": start_date, "end": end_date},
-            "total_pages": page - 1,
-            "count": len(all_bookings),
-            "bookings": all_bookings
-        }
-        
-        Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, indent=2, ensure_ascii=False)
-        
-        logger.info(f"💾 Saved {len(all_bookings)} bookings to cache")
+            if next_cursor is None:
+                return stats, True
+    
+    except BookingApiError as e:
+        logger.error(f"❌ GraphQL Errors in shard {shard_start[:10]}–{shard_end[:10]}: {e}")
+    except requests.exceptions.RequestException as e:
+        logger.error(f"❌ API Request failed in shard {shard_start[:10]}–{shard_end[:10]}: {e}")
     
-    return all_bookings
+    return stats, False
 
 
-def sync_bookings(start_date, end_date):
+def sync_bookings(start_date, end_date, shard_days=7, max_workers=4, requests_per_second=5.0,
+                  max_pages_per_shard=MAX_PAGES, resume=True):
     """
     Wrapper function for daily_sync.py compatibility
-    Calls fetch_bookings_paginated and saves to database in a batch (single connection)
+    
+    Streaming ingest: date shards are processed concurrently, each page is
+    parsed and upserted as it arrives (bounded memory), and the page cursor is
+    committed together with the rows. A crashed or truncated run of the same
+    range resumes from the last committed cursor; finished shards are skipped.
     """
+    # Checkpoint-Key aus ganzen Tagen: manual_sync übergibt now() mit Mikrosekunden
+    start_date, end_date = day_aligned_range(start_date, end_date)
     logger.info(f"🔄 Starting booking sync from {start_date} to {end_date}")
     
-    bookings = fetch_bookings_paginated(
-        start_date=start_date,
-        end_date=end_date,
-        cache_file=None
-    )
+    expired = expire_sync_checkpoints(SYNC_CONFIG['checkpoint_ttl_days'])
+    if expired:
+        logger.info(f"🧹 Dropped {expired} stale checkpoint rows of abandoned sync runs")
+    
+    range_key = f"{API_CONFIG['location_id']}:{start_date}:{end_date}"
+    shards = split_date_range(start_date, end_date, shard_days)
+    checkpoints = get_sync_checkpoints(range_key) if resume else {}
+    
+    pending = [(s, e) for s, e in shards if not checkpoints.get(s, {}).get('done')]
+    skipped = len(shards) - len(pending)
+    if skipped:
+        logger.info(f"⏩ {skipped}/{len(shards)} shards already committed by an earlier run")
+    
+    rate_limiter = RateLimiter(requests_per_second)
+    totals = {"fetched": 0, "inserted": 0, "updated": 0, "unchanged": 0, "failed": 0, "pages": 0}
+    incomplete = []
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                _sync_shard, range_key, shard_start, shard_end,
+                checkpoints.get(shard_start), rate_limiter, max_pages_per_shard
+            ): shard_start
+            for shard_start, shard_end in pending
+        }
+        for future in as_completed(futures):
+            shard_stats, complete = future.result()
+            for key in totals:
+                totals[key] += shard_stats[key]
+            if not complete:
+                incomplete.append(futures[future])
+    
+    if not incomplete:
+        clear_sync_checkpoints(range_key)
+    else:
+        logger.error(f"❌ {len(incomplete)}/{len(shards)} shards incomplete, rerun to resume: {sorted(incomplete)}")
+    
+    if totals["fetched"] == 0 and not skipped:
+        return {"status": "error", "message": "No bookings fetched", **totals}
     
-    if not bookings:
-        return {"status": "error", "message": "No bookings fetched"}
+    saved_count = totals["inserted"] + totals["updated"] + totals["unchanged"]
     
-    # Bookings parsen VOR der Datenbank-Operation
-    bookings_parsed = [parse_booking(b) for b in bookings]
+    logger.info(
+        f"✅ Database save complete: {totals['inserted']} inserted, {totals['updated']} updated, "
+        f"{totals['unchanged']} unchanged, {totals['failed']} failed ({totals['pages']} pages)"
+    )
     
-    logger.info(f"💾 Saving {len(bookings_parsed)} parsed bookings to database in batch...")
+    if incomplete:
+        status = "partial" if saved_count > 0 else "error"
+    else:
+        status = "success"
     
-    # Aufruf der Batch-Funktion (nutzt EINE Verbindung und Transaktion)
-    saved_count = save_bookings_batch(bookings_parsed)
+    return {
+        "status": status,
+        "message": f"Synced {totals['fetched']} bookings, saved {saved_count}",
+        "saved": saved_count,
+        "resumed_shards": skipped,
+        "incomplete_shards": len(incomplete),
+        **totals
+    }
 
-    failed_count = len(bookings_parsed) - saved_count
+def plan_booking_sync(state, now=None, force_full=False):
+    """
+    Decide which window the next booking sync has to cover
     
-    logger.info(f"✅ Database save complete: {saved_count} saved, {failed_count} failed")
+    The Teburio API cannot filter by "changed since", so the incremental mode
+    narrows the window instead: changes concentrate on the last days (walk-ins,
+    no-shows, cancellations) and the next days (new bookings). The complete
+    -past_days..+future_days window is reconciled periodically.
+    
+    Returns:
+        dict: start/end (ISO, day-aligned), full flag and the reason
+    """
+    now = now or datetime.now()
+    today = now.date()
+    full_start = today - timedelta(days=SYNC_CONFIG['past_days'])
+    full_end = today + timedelta(days=SYNC_CONFIG['future_days'])
+    
+    reason = None
+    if force_full:
+        reason = "forced full sync"
+    elif not state or not state.get('last_success_at'):
+        reason = "no previous successful sync"
+    elif not state.get('last_full_sync_at'):
+        reason = "no previous full sync"
+    elif (today - state['last_full_sync_at'].astimezone().date()).days >= SYNC_CONFIG['full_sync_interval_days']:
+        reason = "periodic full reconciliation"
+    
+    if reason:
+        start, end, full = full_start, full_end, True
+    else:
+        last_success = state['last_success_at'].astimezone().date()
+        # Re-check everything since the last success (plus one day overlap)
+        start = max(full_start, min(today, last_success) - timedelta(days=1))
+        end = today + timedelta(days=SYNC_CONFIG['hot_future_days'])
+        full = False
+        reason = f"incremental since {last_success}"
     
     return {
-        "status": "success" if saved_count > 0 else "error",
-        "message": f"Synced {len(bookings)} bookings, saved {saved_count}",
-        "fetched": len(bookings),
-        "saved": saved_count,
-        "failed": failed_count
+        "start": f"{start.isoformat()}T00:00:00",
+        "end": f"{end.isoformat()}T23:59:59",
+        "full": full,
+        "reason": reason
     }
 
+
+def sync_bookings_incremental(force_full=False):
+    """
+    Booking sync driven by booking_sync_state (time of the last successful run)
+    
+    Runs a narrow incremental window most days and a full reconciliation
+    every SYNC_CONFIG['full_sync_interval_days'] days (or when forced).
+    """
+    state = get_sync_state(SYNC_STATE_NAME)
+    plan = plan_booking_sync(state, force_full=force_full)
+    
+    mode = "full" if plan['full'] else "incremental"
+    logger.info(f"🧭 Booking sync mode: {mode} ({plan['reason']})")
+    
+    result = sync_bookings(plan['start'], plan['end'])
+    result["mode"] = mode
+    result["reason"] = plan['reason']
+    
+    if result["status"] == "success":
+        record_sync_success(SYNC_STATE_NAME, plan['start'], plan['end'], plan['full'], result)
+    
+    return result
+
 def sync_booking_snapshots(end_date):
     """Wrapper for BI snapshots"""
     logger.info(f"📸 Creating booking snapshots up to {end_date}")
     
-    success = generate_booking_snapshot(
+    result = generate_booking_snapshot(
         snapshot_date=datetime.now().date(),
         forecast_days=60
     )
     
-    if success:
-        return {"status": "success", "message": "Snapshots created successfully"}
+    if result["status"] == "success":
+        return {**result, "message": f"Snapshots created successfully ({result['days']} days via {result['source']})"}
     else:
-        return {"status": "error", "message": "Snapshot creation failed"}
+        return {**result, "message": "Snapshot creation failed"}
 
 if __name__ == "__main__":
     # Test function for development
@@ -481,11 +752,13 @@ if __name__ == "__main__":
     # Check für 'snapshot' Parameter
     if len(sys.argv) > 1 and sys.argv[1] == 'snapshot':
         # Ursprünglich test_snapshot(), jetzt verwenden wir die echte Funktion
-        generate_booking_snapshot()
+        # optional: python src/booking_sync.py snapshot db|api|auto
+        result = generate_booking_snapshot(source=sys.argv[2] if len(sys.argv) > 2 else "auto")
+        logger.info(f"📊 Snapshot result: {result}")
     else:
         # Deine bestehende Logik (angepasst auf logger):
         bookings = fetch_bookings(
-            cache_file="data/bookings_cache.json"
+            cache_file=BOOKING_CACHE_CONFIG['path']
         )
         
         if bookings:
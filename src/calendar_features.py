@@ -0,0 +1,200 @@
+"""
+Calendar Features - holiday, bridge-day and school-holiday flags per day
+Built once per year range from the holidays library plus config/school_holidays.json,
+materialized in the calendar_features table and looked up by array index in-process.
+Rows carry a hash of both sources; editing the school holiday file rebuilds them.
+
+Usage:
+    python src/calendar_features.py refresh [START_YEAR END_YEAR]
+"""
+import sys
+import os
+import hashlib
+import json
+import logging
+from datetime import date
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import holidays
+import numpy as np
+import pandas as pd
+
+from config.settings import CALENDAR_CONFIG
+from src.database import CALENDAR_FEATURE_COLUMNS, get_calendar_coverage, save_calendar_features
+
+logger = logging.getLogger("calendar-features")
+
+# Spalte → (Land, Bundesland) für holidays.country_holidays
+HOLIDAY_CALENDARS = {
+    'is_holiday_de': ('DE', None),
+    'is_holiday_sh': ('DE', 'SH'),
+    'is_holiday_hh': ('DE', 'HH'),
+    'is_holiday_dk': ('DK', None)
+}
+
+SCHOOL_HOLIDAY_COLUMNS = {
+    'is_ferien_sh': 'SH',
+    'is_ferien_hh': 'HH'
+}
+
+
+def load_school_holidays(path=None):
+    """School holiday ranges per state: {'SH': [(first_day, last_day), ...], ...}"""
+    path = path or CALENDAR_CONFIG['school_holidays_file']
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ School holidays not loaded from {path}: {e}")
+        return {}
+
+    return {
+        state: [(date.fromisoformat(first), date.fromisoformat(last)) for first, last in ranges]
+        for state, ranges in data.items()
+        if not state.startswith('_')
+    }
+
+
+def calendar_source_hash(path=None):
+    """Fingerprint of the calendar sources: school holiday file contents + holidays library version"""
+    path = path or CALENDAR_CONFIG['school_holidays_file']
+    h = hashlib.blake2b(holidays.__version__.encode(), digest_size=16)
+    try:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    except OSError:
+        h.update(b"missing")
+    return h.hexdigest()
+
+
+def holiday_flags(dates, country, subdiv=None):
+    """0/1-Array: liegt das Datum (datetime64, Uhrzeit egal) auf einem Feiertag?"""
+    days = np.asarray(dates, dtype='datetime64[D]')
+    if len(days) == 0:
+        return np.zeros(0, dtype=int)
+
+    # Feiertage einmal für alle Jahre holen, dann Mengen-Lookup statt Python-Schleife
+    years = range(days.min().astype(object).year, days.max().astype(object).year + 1)
+    calendar = holidays.country_holidays(country, subdiv=subdiv, years=years)
+    holiday_days = np.array(list(calendar.keys()), dtype='datetime64[D]')
+    return np.isin(days, holiday_days).astype(int)
+
+
+def range_flags(days, ranges):
+    """0/1-Array: liegt der Tag in einem der (erster, letzter) Zeiträume?"""
+    flags = np.zeros(len(days), dtype=bool)
+    for first, last in ranges:
+        flags |= (days >= np.datetime64(first, 'D')) & (days <= np.datetime64(last, 'D'))
+    return flags.astype(int)
+
+
+def build_calendar(start_year, end_year, school_holidays=None):
+    """
+    Calendar feature frame for every day from Jan 1st start_year to Dec 31st end_year
+
+    Returns:
+        pd.DataFrame: 'date' (datetime64) + CALENDAR_FEATURE_COLUMNS as 0/1 ints
+    """
+    if school_holidays is None:
+        school_holidays = load_school_holidays()
+
+    # Ein Tag Rand auf beiden Seiten, damit Vortag/Folgetag an den Jahresgrenzen stimmen
+    first = np.datetime64(f"{start_year}-01-01", 'D')
+    last = np.datetime64(f"{end_year}-12-31", 'D')
+    days = np.arange(first - 1, last + 2, dtype='datetime64[D]')
+
+    flags = {col: holiday_flags(days, country, subdiv) for col, (country, subdiv) in HOLIDAY_CALENDARS.items()}
+
+    for col, state in SCHOOL_HOLIDAY_COLUMNS.items():
+        ranges = school_holidays.get(state, [])
+        # Ein Jahr gilt als gepflegt, wenn darin Ferien beginnen (Weihnachten ragt ins Folgejahr)
+        covered = {first_day.year for first_day, _ in ranges}
+        missing = sorted(set(range(start_year, end_year + 1)) - covered)
+        if missing:
+            logger.warning(f"⚠️ No school holidays for {state} in {missing} - {col} stays 0 there")
+        flags[col] = range_flags(days, ranges)
+
+    # Brückentage (SH): Freitag nach einem Feiertag oder Montag vor einem Feiertag
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 war ein Donnerstag
+    holiday_sh = flags['is_holiday_sh']
+    next_day_holiday = np.append(holiday_sh[1:], 0)
+    prev_day_holiday = np.insert(holiday_sh[:-1], 0, 0)
+    flags['next_day_holiday'] = next_day_holiday
+    flags['prev_day_holiday'] = prev_day_holiday
+    flags['bridge_day'] = (
+        ((weekday == 4) & (prev_day_holiday == 1)) | ((weekday == 0) & (next_day_holiday == 1))
+    ).astype(int)
+    flags['day_before_holiday'] = next_day_holiday
+    flags['day_after_holiday'] = prev_day_holiday
+
+    frame = pd.DataFrame({'date': days, **{col: flags[col] for col in CALENDAR_FEATURE_COLUMNS}})
+    return frame.iloc[1:-1].reset_index(drop=True)
+
+
+@lru_cache(maxsize=8)
+def _cached_calendar(start_year, end_year, source_hash):
+    # source_hash nur als Cache-Schlüssel: geänderte Ferien-Datei → neuer Eintrag
+    return build_calendar(start_year, end_year)
+
+
+def lookup_calendar(dates):
+    """
+    Calendar features for arbitrary dates via array index into the cached year range
+
+    Returns:
+        dict: column → 0/1 int array aligned with dates
+    """
+    days = np.asarray(dates, dtype='datetime64[D]')
+    if len(days) == 0:
+        return {col: np.zeros(0, dtype=int) for col in CALENDAR_FEATURE_COLUMNS}
+
+    calendar = _cached_calendar(
+        days.min().astype(object).year, days.max().astype(object).year, calendar_source_hash()
+    )
+    index = (days - calendar['date'].to_numpy().astype('datetime64[D]')[0]).astype(np.int64)
+    return {col: calendar[col].to_numpy()[index] for col in CALENDAR_FEATURE_COLUMNS}
+
+
+def refresh_calendar_table(start_year, end_year):
+    """(Re)build the calendar_features rows for whole years; returns rows written, None on failure"""
+    source_hash = calendar_source_hash()
+    calendar = build_calendar(start_year, end_year)
+    rows = list(zip(
+        calendar['date'].dt.date,
+        *(calendar[col].astype(int).tolist() for col in CALENDAR_FEATURE_COLUMNS)
+    ))
+    saved = save_calendar_features(rows, source_hash)
+    if saved is not None:
+        logger.info(f"📅 calendar_features {start_year}-{end_year}: {saved} days written")
+    return saved
+
+
+def ensure_calendar_table(start_date, end_date):
+    """
+    Materialize the years of [start_date, end_date] if any day is missing or was built
+    from an older school holiday file / holidays version; False on DB failure
+    """
+    coverage = get_calendar_coverage(start_date, end_date, calendar_source_hash())
+    if coverage is None:
+        return False
+    if coverage >= (end_date - start_date).days + 1:
+        return True
+    return refresh_calendar_table(start_date.year, end_date.year) is not None
+
+
+if __name__ == "__main__":
+    from config.logging_config import setup_logging
+    logger = setup_logging("calendar_features")
+
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    years = [int(arg) for arg in sys.argv[2:4]]
+
+    if command == "refresh":
+        this_year = date.today().year
+        start_year, end_year = years if len(years) == 2 else (this_year - 1, this_year + 1)
+        if refresh_calendar_table(start_year, end_year) is None:
+            sys.exit(1)
+    else:
+        print(__doc__)
@@ -11,10 +11,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.logging_config import setup_logging, log_sync_start, log_sync_end, log_error
 
-from src.booking_sync import sync_bookings, sync_booking_snapshots
+from src.booking_sync import sync_bookings, sync_bookings_incremental, sync_booking_snapshots
 from src.weather_forecast import sync_weather  
-from src.weather_pipeline import import_weather_range  
-from src.database import get_db_connection
+from src.weather_pipeline import fill_weather_gaps  
+from src.database import get_db_connection, get_pool_stats
+from src.http_client import get_http_stats
 from config.settings import validate_config
 
 logger = setup_logging("daily-sync")
@@ -108,12 +109,15 @@ def get_comprehensive_stats():
         conn.close()
 
 def sync_yesterday_weather():
-    """Sync yesterday's weather data (historical data becomes available with 1-day delay)"""
+    """
+    Sync yesterday's weather data (historical data becomes available with 1-day delay)
+    and refill every day missed since (cron outages, incomplete ERA5 rows)
+    """
     yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-    logger.info(f"PHASE 4: Historical Weather Update for {yesterday}")
-    return import_weather_range(yesterday, yesterday)
+    logger.info(f"PHASE 4: Historical Weather Update up to {yesterday}")
+    return fill_weather_gaps(end_date=yesterday)
 
-def main():
+def main(force_full_booking_sync=False):
     """Main daily sync orchestrator"""
     validate_config()
     log_sync_start(logger, "4-Phase Daily Sync")
@@ -121,10 +125,9 @@ def main():
     try:
         # 1. Bookings
         logger.info("📚 PHASE 1: Main Bookings Table Sync")
-        # Zeitzonen-Handling geschieht in booking_sync intern, hier reichen Strings
-        start = (datetime.now() - timedelta(days=3)).isoformat()
-        end = (datetime.now() + timedelta(days=60)).isoformat()
-        sync_bookings(start, end)
+        # Inkrementell (enges Fenster) mit periodischem Voll-Abgleich -3..+60 Tage
+        booking_result = sync_bookings_incremental(force_full=force_full_booking_sync)
+        logger.info(f"Bookings ({booking_result.get('mode')}): {booking_result.get('message')}")
         
         # 2. Weather Forecast
         logger.info("🌤️ PHASE 2: Weather Forecasts")
@@ -133,7 +136,9 @@ def main():
         # 3. Snapshots
         logger.info("📸 PHASE 3: Booking Snapshots")
         snapshot_end = (datetime.now() + timedelta(days=60)).isoformat()
-        sync_booking_snapshots(snapshot_end)
+        snapshot_result = sync_booking_snapshots(snapshot_end)
+        logger.info(f"Snapshots: {snapshot_result.get('message')} "
+                    f"({snapshot_result.get('total_seconds')}s)")
         
         # 4. Historical Weather
         logger.info("🌡️ PHASE 4: Historical Weather Update")
@@ -141,15 +146,14 @@ def main():
         
         # Stats
         final_stats = get_comprehensive_stats()
+        final_stats["db_pool"] = get_pool_stats()
+        final_stats["http"] = get_http_stats()
         log_sync_end(logger, "4-Phase Daily Sync", final_stats)
         
     except Exception as e:
         logger.error(f"FATAL ERROR in daily sync: {e}")
         raise
 
-if __name__ == "__main__":
-    main()
-
 def health_check():
     """
     Quick health check for monitoring systems
@@ -232,6 +236,10 @@ if __name__ == "__main__":
         elif command == "manual-no-weather":
             success = manual_sync(include_weather=False)
             exit(0 if success else 1)
+        elif command == "full":
+            # Erzwingt den kompletten -3..+60 Tage Abgleich
+            main(force_full_booking_sync=True)
+            exit(0)
         elif command == "test":
             # Test mode: shorter date range
             start = (datetime.now() - timedelta(days=1)).isoformat()
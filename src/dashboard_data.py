@@ -1,13 +1,16 @@
 import sys
 import os
 import pandas as pd
-import warnings
 from datetime import datetime, timedelta
 
 # Pfad-Setup
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.database import get_db_connection
+from src.database import ensure_forecast_band_columns
+from src.feature_store import load_feature_matrix
+from src.predict_walkins import load_predictor
+from src.queries import run_query
+from src.scenarios import DEFAULT_SCENARIOS, run_scenarios
 
 def get_forecast_view(days_ahead=21):
     """
@@ -16,73 +19,18 @@ def get_forecast_view(days_ahead=21):
     - Bestehende Reservierungen (OHNE Walk-Ins)
     - Wetterdaten
     """
-    conn = get_db_connection()
-    if not conn:
-        return pd.DataFrame()
-
     today = datetime.now().date()
     end_date = today + timedelta(days=days_ahead)
 
-    # Diese Query joint alles zusammen für den gewählten Zeitraum
-    query = f"""
-    WITH 
-    -- 1. Vorhersagen (Neueste Version pro Tag)
-    forecasts AS (
-        SELECT target_date, pred_walkins, model_name
-        FROM walkin_forecast
-        WHERE target_date BETWEEN '{today}' AND '{end_date}'
-    ),
-    -- 2. Reservierungen (Summiert pro Tag)
-    -- WICHTIG: Wir filtern hier Walk-Ins RAUS, damit sie nicht doppelt zählen
-    res_data AS (
-        SELECT 
-            DATE(booking_date) as date,
-            COUNT(*) as res_count,
-            SUM(people) as res_people
-        FROM bookings
-        WHERE booking_date >= '{today}' 
-          AND booking_date <= '{end_date} 23:59:59'
-          AND cancelled = false 
-          AND no_show = false
-          AND walk_in = false  -- <--- NEU: Nur echte Reservierungen!
-        GROUP BY DATE(booking_date)
-    ),
-    -- 3. Wetter (Neueste Vorhersage pro Tag)
-    weather AS (
-        SELECT DISTINCT ON (forecast_date)
-            forecast_date,
-            temperature_2m_max as temp_max,
-            precipitation_sum as rain,
-            sunshine_duration as sun,
-            weathercode
-        FROM weather_forecasts
-        WHERE forecast_date BETWEEN '{today}' AND '{end_date}'
-        ORDER BY forecast_date, forecast_created_at DESC
-    )
-    
-    -- Zusammenfügen: Basis ist das Datum
-    SELECT 
-        w.forecast_date as datum,
-        COALESCE(f.pred_walkins, 0) as walkins_pred,
-        COALESCE(r.res_people, 0) as reservations,
-        COALESCE(r.res_count, 0) as res_count,
-        COALESCE(w.temp_max, 0) as temp,
-        COALESCE(w.rain, 0) as rain,
-        COALESCE(w.sun, 0) / 3600.0 as sun_hours,
-        w.weathercode
-    FROM weather w
-    LEFT JOIN forecasts f ON w.forecast_date = f.target_date
-    LEFT JOIN res_data r ON w.forecast_date = r.date
-    ORDER BY w.forecast_date ASC;
-    """
-    
     try:
-        # Unterdrücke Warnungen für saubereren Output
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore", UserWarning)
-            df = pd.read_sql(query, conn)
+        # pred_p10/pred_p90 gibt es erst nach der Migration (einmal pro Prozess geprüft)
+        ensure_forecast_band_columns()
+
+        # Registrierte Query (prepared, gebundene Parameter) - siehe src/queries.py
+        df = run_query("forecast_view", {'start': today, 'end': end_date})
+        if df.empty:
+            return df
             
-        df['datum'] = pd.to_datetime(df['datum']).dt.date
         df['total_guests'] = df['walkins_pred'] + df['reservations']
         
         # Wochentag für Anzeige
@@ -94,5 +42,32 @@ def get_forecast_view(days_ahead=21):
     except Exception as e:
         print(f"Error fetching dashboard data: {e}")
         return pd.DataFrame()
-    finally:
-        conn.close()
\ No newline at end of file
+
+def get_walkin_scenarios(days_ahead=7, scenarios=None):
+    """
+    Walk-In Prognose unter alternativen Wetterszenarien (siehe src/scenarios.py):
+    Index = Datum, eine Spalte pro Szenario. Nutzt die Feature-Matrix des letzten
+    Prognoselaufs aus dem Feature Store; leer, wenn dort ein Tag des Zeitraums fehlt.
+    """
+    today = datetime.now().date()
+    end_date = today + timedelta(days=days_ahead)
+
+    try:
+        features = load_feature_matrix(today, end_date)
+        if features.empty:
+            return pd.DataFrame()
+
+        # Fehlt ein Tag (Teil-Schreibfehler im Feature Store), keine lückenhaften Szenarien zeigen
+        expected_days = (end_date - today).days + 1
+        if len(features) != expected_days:
+            print(f"Feature store incomplete: {len(features)} of {expected_days} days - skipping scenarios")
+            return pd.DataFrame()
+
+        predict, feature_cols = load_predictor()
+        for col in set(feature_cols) - set(features.columns):
+            features[col] = 0
+
+        return run_scenarios(features, predict, feature_cols, scenarios or DEFAULT_SCENARIOS)
+    except Exception as e:
+        print(f"Error computing walk-in scenarios: {e}")
+        return pd.DataFrame()
@@ -10,21 +10,298 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 import psycopg2
+import io
+import numpy as np
 import json
-from datetime import datetime
-from config.settings import DB_CONFIG
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from psycopg2 import extensions, sql
+from psycopg2.extras import execute_values
+from config.settings import DB_CONFIG, DB_POOL_CONFIG
 from config.logging_config import setup_logging
+from src.utils import booking_content_hash
+
+logger = logging.getLogger("database")
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """Raised when no pooled connection becomes free within the checkout timeout"""
+
+
+class ConnectionPool:
+    """
+    Thread-safe PostgreSQL connection pool
+
+    Keeps up to max_size connections to the VPS open, blocks callers while all
+    of them are checked out and validates idle connections before reuse.
+    """
+
+    def __init__(self, min_size=1, max_size=5, checkout_timeout=30.0,
+                 health_check_after=30.0, **connect_kwargs):
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+        self._connect_kwargs = connect_kwargs
+        self._idle = []  # [(connection, last_used_monotonic)]
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self.pid = os.getpid()
+        self.stats = {
+            'connects': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+            'health_checks': 0,
+            'reconnects': 0,
+            'discarded': 0
+        }
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._connect_kwargs)
+        with self._cond:
+            self.stats['connects'] += 1
+        return conn
+
+    def warm_up(self):
+        """Open min_size connections up front so the first queries skip the handshake"""
+        with self._cond:
+            missing = self.min_size - len(self._idle) - self._in_use
+        for _ in range(missing):
+            try:
+                conn = self._connect()
+            except psycopg2.Error as e:
+                logger.warning(f"Pool warm-up failed: {e}")
+                return
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+
+    def _validate(self, conn, last_used):
+        """Return a usable connection, reconnecting if the idle one went stale"""
+        if not conn.closed and time.monotonic() - last_used < self.health_check_after:
+            return conn
+
+        if not conn.closed:
+            with self._cond:
+                self.stats['health_checks'] += 1
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+                return conn
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                logger.warning(f"Pooled connection failed health check, reconnecting: {e}")
+
+        self._close_quietly(conn)
+        new_conn = self._connect()
+        with self._cond:
+            self.stats['reconnects'] += 1
+        return new_conn
+
+    def getconn(self, timeout=None):
+        """Check out a connection, waiting up to timeout seconds for a free slot"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+
+        with self._cond:
+            wait_start = None
+            while not self._idle and self._in_use >= self.max_size:
+                if wait_start is None:
+                    wait_start = time.monotonic()
+                    self.stats['waits'] += 1
+                remaining = timeout - (time.monotonic() - wait_start)
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {timeout:.1f}s "
+                        f"(max_size={self.max_size})"
+                    )
+                self._cond.wait(remaining)
+
+            if wait_start is not None:
+                self.stats['wait_seconds'] += time.monotonic() - wait_start
+
+            entry = self._idle.pop() if self._idle else None
+            self._in_use += 1
+            self.stats['checkouts'] += 1
+
+        try:
+            if entry is None:
+                return self._connect()
+            return self._validate(*entry)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def putconn(self, conn, discard=False):
+        """Return a connection; open transactions are rolled back first"""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except psycopg2.Error:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed or len(self._idle) >= self.max_size:
+                self.stats['discarded'] += 1
+                keep = False
+            else:
+                self._idle.append((conn, time.monotonic()))
+                keep = True
+            self._cond.notify()
+
+        if not keep:
+            self._close_quietly(conn)
+
+    def closeall(self):
+        """Close all idle connections (checked-out ones are closed on return)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self.max_size = 0
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def get_stats(self):
+        with self._cond:
+            return {
+                **self.stats,
+                'wait_seconds': round(self.stats['wait_seconds'], 3),
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'max_size': self.max_size
+            }
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled psycopg2 connection
+
+    Behaves like the raw connection, but close() hands it back to the pool,
+    so existing "conn = get_db_connection() ... conn.close()" code keeps working.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    @property
+    def closed(self):
+        return 1 if self._conn is None else self._conn.closed
+
+    @property
+    def raw_connection(self):
+        return self._conn
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.putconn(conn)
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        return getattr(conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def __del__(self):
+        # Safety net for callers that forget close() on an error path
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool, creating it on first use (and again after fork)"""
+    global _pool
+    pid = os.getpid()
+    if _pool is not None and _pool.pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool.pid != pid:
+            # Forked children must not touch the parent's sockets: just drop them
+            _pool = ConnectionPool(**DB_POOL_CONFIG, **DB_CONFIG)
+            _pool.warm_up()
+        return _pool
+
+
+def close_pool():
+    """Close all pooled connections (called automatically at interpreter exit)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.closeall()
+        _pool = None
+
+
+atexit.register(close_pool)
+
+
+def get_pool_stats():
+    """Checkout/wait/reconnect counters of the shared pool"""
+    if _pool is None or _pool.pid != os.getpid():
+        return {}
+    return _pool.get_stats()
+
 
 def get_db_connection():
-    """Create PostgreSQL connection to VPS"""
+    """Borrow a PostgreSQL connection from the shared pool (close() returns it)"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        # logger.info("Database connection successful")
-        return conn
+        pool = get_pool()
+        return PooledConnection(pool, pool.getconn())
     except psycopg2.Error as e:
         logger.error(f"Database connection failed: {e}")
         return None
 
+
+@contextmanager
+def db_connection(timeout=None):
+    """
+    Context manager for a pooled connection
+
+    Rolls back on error and always returns the connection to the pool.
+    Commits stay explicit, like everywhere else in this module.
+    """
+    pool = get_pool()
+    conn = pool.getconn(timeout)
+    try:
+        yield conn
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+
 def test_connection():
     """Quick test if database is reachable"""
     conn = get_db_connection()
@@ -38,59 +315,429 @@ def test_connection():
         return True
     return False
 
-def save_bookings_batch(bookings_parsed):
-    """Save multiple bookings to database using a single connection"""
+BOOKING_COLUMNS = (
+    'id', 'booking_date', 'end_date', 'people', 'cancelled', 'no_show', 'walk_in',
+    'source', 'host', 'tracking', 'tag_ids', 'booking_tags_count', 'payment', 'rating',
+    'content_hash'
+)
+
+BOOKING_UPSERT_SET = """
+    end_date = EXCLUDED.end_date,
+    people = EXCLUDED.people,
+    cancelled = EXCLUDED.cancelled,
+    no_show = EXCLUDED.no_show,
+    walk_in = EXCLUDED.walk_in,
+    source = EXCLUDED.source,
+    host = EXCLUDED.host,
+    tracking = EXCLUDED.tracking,
+    tag_ids = EXCLUDED.tag_ids,
+    booking_tags_count = EXCLUDED.booking_tags_count,
+    payment = EXCLUDED.payment,
+    rating = EXCLUDED.rating,
+    content_hash = EXCLUDED.content_hash,
+    updated_at = NOW()
+"""
+
+# Change detection: rows whose content_hash did not change are left untouched
+BOOKING_UPSERT_CHANGED_ONLY = """
+    WHERE {table}.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+"""
+
+# Schema-Migrationen: (Tabelle, Spalten), die in diesem Prozess bereits committed vorliegen
+_ensured_schema = set()
+
+# COPY text format: backslash, tab and newlines must be escaped, NULL is \N
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _pg_array_literal(values):
+    """Render a Python list as PostgreSQL array literal, e.g. {"a","b"}"""
+    items = []
+    for value in values:
+        if value is None:
+            items.append('NULL')
+        else:
+            items.append('"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"')
+    return '{' + ','.join(items) + '}'
+
+
+def _copy_value(value):
+    """Format one value for COPY ... FROM STDIN (text format)"""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if isinstance(value, (list, tuple)):
+        value = _pg_array_literal(value)
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def _copy_column(values):
+    """Format a whole NumPy column for COPY (see utils.parse_bookings_page)"""
+    if values.dtype.kind == 'M':
+        return np.where(np.isnat(values), '\\N', np.datetime_as_string(values, unit='ms')).tolist()
+    if values.dtype.kind == 'b':
+        return np.where(values, 't', 'f').tolist()
+    if values.dtype.kind in 'iu':
+        return values.astype(str).tolist()
+    return [_copy_value(value) for value in values]
+
+
+def _copy_lines(bookings):
+    """COPY text rows for a list of parsed bookings or a columnar page"""
+    if isinstance(bookings, dict):
+        return ['\t'.join(row) for row in zip(*(_copy_column(bookings[col]) for col in BOOKING_COLUMNS))]
+    return ['\t'.join(_copy_value(b[col]) for col in BOOKING_COLUMNS) for b in bookings]
+
+
+def _booking_tuples(bookings):
+    """Row tuples in BOOKING_COLUMNS order (tolist turns datetime64 into datetime, NaT into None)"""
+    if isinstance(bookings, dict):
+        return list(zip(*(bookings[col].tolist() for col in BOOKING_COLUMNS)))
+    return [tuple(b[col] for col in BOOKING_COLUMNS) for b in bookings]
+
+
+def _booking_count(bookings):
+    return len(bookings['id']) if isinstance(bookings, dict) else len(bookings)
+
+
+def _dedupe_booking_columns(columns):
+    """Columnar variant of _dedupe_bookings: last occurrence per id, original order"""
+    ids = columns['id']
+    _, first_from_end = np.unique(ids[::-1], return_index=True)
+    if len(first_from_end) == len(ids):
+        return columns
+    keep = np.sort(len(ids) - 1 - first_from_end)
+    return {col: values[keep] for col, values in columns.items()}
+
+
+def _dedupe_bookings(bookings_parsed):
+    """Keep the last version per id; one statement must not touch a row twice"""
+    if isinstance(bookings_parsed, dict):
+        return _dedupe_booking_columns(bookings_parsed)
+    deduped = {}
+    for b in bookings_parsed:
+        if not b.get('content_hash'):
+            b = {**b, 'content_hash': booking_content_hash(b)}
+        deduped[b['id']] = b
+    return list(deduped.values())
+
+
+def ensure_schema(cursor, table, ddl, columns=()):
+    """
+    Run a CREATE/ALTER migration in the caller's transaction unless the catalog
+    already has the table (and the given columns)
+
+    The single guard for every table this module creates or extends: the DDL only
+    runs (and only takes its lock) when something is missing, and a table is only
+    remembered for the process once its catalog entry is committed (pg_class.xmin is
+    not the current transaction) - a rolled back migration is checked and run again.
+
+    Args:
+        cursor: cursor of the caller's transaction
+        table: table the DDL creates or alters
+        ddl: idempotent statement(s) (CREATE TABLE / ADD COLUMN IF NOT EXISTS)
+        columns: columns the DDL adds to an existing table
+    """
+    key = (table, tuple(columns))
+    if key in _ensured_schema:
+        return
+
+    cursor.execute("""
+        SELECT a.attname,
+               c.xmin::text = COALESCE((txid_current_if_assigned() %% 4294967296)::text, '')
+        FROM pg_class c
+        JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+        WHERE c.oid = to_regclass(%s)
+    """, (table,))
+    rows = cursor.fetchall()
+    present = {name for name, _ in rows}
+    if present and set(columns) <= present:
+        if not rows[0][1]:
+            _ensured_schema.add(key)
+        return
+
+    logger.info(f"Migrating {table}: {sorted(set(columns) - present) if present else 'create table'}")
+    cursor.execute(ddl)
+
+
+def ensure_booking_hash_column(cursor, table='bookings'):
+    """Add the content_hash column on first use"""
+    ensure_schema(
+        cursor, table,
+        sql.SQL("ALTER TABLE {} ADD COLUMN IF NOT EXISTS content_hash TEXT").format(sql.Identifier(table)),
+        columns=('content_hash',)
+    )
+
+
+def _booking_upsert_sql(table, skip_unchanged):
+    """ON CONFLICT clause plus RETURNING flag that tells inserts from updates"""
+    clause = sql.SQL("ON CONFLICT (id) DO UPDATE SET") + sql.SQL(BOOKING_UPSERT_SET)
+    if skip_unchanged:
+        clause += sql.SQL(BOOKING_UPSERT_CHANGED_ONLY).format(table=sql.Identifier(table))
+    return clause + sql.SQL(" RETURNING (xmax = 0) AS inserted")
+
+
+def _upsert_bookings_copy(cursor, bookings_parsed, table='bookings', skip_unchanged=True):
+    """Stream bookings into a temp staging table via COPY, then merge in one statement"""
+    columns = sql.SQL(', ').join(map(sql.Identifier, BOOKING_COLUMNS))
+
+    cursor.execute("DROP TABLE IF EXISTS bookings_staging")
+    cursor.execute(sql.SQL(
+        "CREATE TEMP TABLE bookings_staging (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP"
+    ).format(sql.Identifier(table)))
+
+    buffer = io.StringIO()
+    for line in _copy_lines(bookings_parsed):
+        buffer.write(line)
+        buffer.write('\n')
+    buffer.seek(0)
+
+    cursor.copy_expert(
+        sql.SQL("COPY bookings_staging ({}) FROM STDIN").format(columns).as_string(cursor),
+        buffer
+    )
+
+    cursor.execute(sql.SQL("""
+        WITH upserted AS (
+            INSERT INTO {table} ({columns})
+            SELECT {columns} FROM bookings_staging
+            {upsert}
+        )
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+        FROM upserted
+    """).format(
+        table=sql.Identifier(table),
+        columns=columns,
+        upsert=_booking_upsert_sql(table, skip_unchanged)
+    ))
+    return cursor.fetchone()
+
+
+def _upsert_bookings_values(cursor, bookings_parsed, table='bookings', skip_unchanged=True, page_size=1000):
+    """Multi-row INSERT ... VALUES pages (fallback when COPY is not possible)"""
+    query = sql.SQL("INSERT INTO {table} ({columns}) VALUES %s {upsert}").format(
+        table=sql.Identifier(table),
+        columns=sql.SQL(', ').join(map(sql.Identifier, BOOKING_COLUMNS)),
+        upsert=_booking_upsert_sql(table, skip_unchanged)
+    )
+
+    template = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s::jsonb, %s::jsonb, %s, %s)"
+    data_tuples = _booking_tuples(bookings_parsed)
+    returned = execute_values(
+        cursor, query.as_string(cursor), data_tuples,
+        template=template, page_size=page_size, fetch=True
+    )
+    inserted = sum(1 for (was_insert,) in returned if was_insert)
+    return inserted, len(returned) - inserted
+
+
+def upsert_bookings(bookings_parsed, table='bookings', method='copy', skip_unchanged=True, checkpoint=None):
+    """
+    Upsert bookings in one transaction and report what actually changed
+
+    Accepts a list of parse_booking dicts or a columnar page from
+    utils.parse_bookings_page (dict of NumPy arrays).
+    Uses COPY into a staging table plus a single INSERT ... ON CONFLICT merge;
+    falls back to paged execute_values if COPY fails (method='values' forces it).
+    With skip_unchanged, rows whose content_hash matches the stored one are not
+    rewritten (no updated_at bump, no WAL/index churn).
+    An optional sync checkpoint is committed in the same transaction, so a
+    stored resume cursor always matches the data that is really in the table.
+
+    Returns:
+        dict: inserted/updated/unchanged counts and the method used, None on failure
+    """
+    if not _booking_count(bookings_parsed) and checkpoint is None:
+        return {"inserted": 0, "updated": 0, "unchanged": 0, "method": None}
+
     conn = get_db_connection()
     if not conn:
-        return 0
-    
+        return None
+
+    bookings_parsed = _dedupe_bookings(bookings_parsed)
+    row_count = _booking_count(bookings_parsed)
+
     try:
         with conn.cursor() as cursor:
-            # Query vorbereiten
-            insert_query = """
-            INSERT INTO bookings (
-                id, booking_date, end_date, people, cancelled, no_show, walk_in,
-                source, host, tracking, tag_ids, booking_tags_count, payment, rating
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s::jsonb, %s::jsonb, %s
-            )
-            ON CONFLICT (id) DO UPDATE SET
-                end_date = EXCLUDED.end_date,
-                people = EXCLUDED.people,
-                cancelled = EXCLUDED.cancelled,
-                no_show = EXCLUDED.no_show,
-                walk_in = EXCLUDED.walk_in,
-                source = EXCLUDED.source,
-                host = EXCLUDED.host,
-                tracking = EXCLUDED.tracking,
-                tag_ids = EXCLUDED.tag_ids,
-                booking_tags_count = EXCLUDED.booking_tags_count,
-                payment = EXCLUDED.payment,
-                rating = EXCLUDED.rating,
-                updated_at = NOW()
-            """
-            
-            # Daten für executemany vorbereiten
-            data_tuples = [
-                (
-                    b['id'], b['booking_date'], b['end_date'], b['people'],
-                    b['cancelled'], b['no_show'], b['walk_in'], b['source'],
-                    b['host'], b['tracking'], b['tag_ids'], b['booking_tags_count'],
-                    b['payment'], b['rating']
-                ) for b in bookings_parsed
-            ]
-            
-            cursor.executemany(insert_query, data_tuples)
-            conn.commit()
-            return len(bookings_parsed)
-            
+            ensure_booking_hash_column(cursor, table)
+        conn.commit()
+
+        inserted = updated = 0
+        used_method = None if row_count else 'none'
+        if method == 'copy' and row_count:
+            try:
+                with conn.cursor() as cursor:
+                    inserted, updated = _upsert_bookings_copy(cursor, bookings_parsed, table, skip_unchanged)
+                used_method = 'copy'
+            except psycopg2.Error as e:
+                logger.warning(f"COPY upsert failed, falling back to execute_values: {e}")
+                conn.rollback()
+
+        if used_method is None:
+            with conn.cursor() as cursor:
+                inserted, updated = _upsert_bookings_values(cursor, bookings_parsed, table, skip_unchanged)
+            used_method = 'values'
+
+        if checkpoint is not None:
+            with conn.cursor() as cursor:
+                _save_sync_checkpoint(cursor, checkpoint)
+
+        conn.commit()
+        return {
+            "inserted": inserted,
+            "updated": updated,
+            "unchanged": row_count - inserted - updated,
+            "method": used_method
+        }
+
     except psycopg2.Error as e:
         logger.error(f"Database batch save failed: {e}")
         conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+
+SYNC_CHECKPOINT_DDL = """
+    CREATE TABLE IF NOT EXISTS booking_sync_checkpoints (
+        range_key TEXT NOT NULL,
+        shard_start TEXT NOT NULL,
+        shard_end TEXT NOT NULL,
+        resume_cursor TEXT,
+        pages INTEGER NOT NULL DEFAULT 0,
+        rows_written INTEGER NOT NULL DEFAULT 0,
+        done BOOLEAN NOT NULL DEFAULT FALSE,
+        updated_at TIMESTAMPTZ DEFAULT NOW(),
+        PRIMARY KEY (range_key, shard_start)
+    )
+"""
+
+def ensure_sync_checkpoint_table(cursor):
+    """Create booking_sync_checkpoints if missing (in the caller's transaction)"""
+    ensure_schema(cursor, 'booking_sync_checkpoints', SYNC_CHECKPOINT_DDL)
+
+
+def _save_sync_checkpoint(cursor, checkpoint):
+    """Upsert the resume state of one sync shard (cursor stored JSON-encoded)"""
+    ensure_sync_checkpoint_table(cursor)
+    cursor.execute("""
+        INSERT INTO booking_sync_checkpoints (
+            range_key, shard_start, shard_end, resume_cursor, pages, rows_written, done
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (range_key, shard_start) DO UPDATE SET
+            shard_end = EXCLUDED.shard_end,
+            resume_cursor = EXCLUDED.resume_cursor,
+            pages = EXCLUDED.pages,
+            rows_written = EXCLUDED.rows_written,
+            done = EXCLUDED.done,
+            updated_at = NOW()
+    """, (
+        checkpoint['range_key'],
+        checkpoint['shard_start'],
+        checkpoint['shard_end'],
+        json.dumps(checkpoint['cursor']) if checkpoint.get('cursor') is not None else None,
+        checkpoint.get('pages', 0),
+        checkpoint.get('rows', 0),
+        checkpoint.get('done', False)
+    ))
+
+
+def get_sync_checkpoints(range_key):
+    """Committed shard checkpoints of an interrupted sync run, keyed by shard_start"""
+    conn = get_db_connection()
+    if not conn:
+        return {}
+
+    try:
+        with conn.cursor() as cursor:
+            ensure_sync_checkpoint_table(cursor)
+            cursor.execute("""
+                SELECT shard_start, shard_end, resume_cursor, pages, rows_written, done
+                FROM booking_sync_checkpoints
+                WHERE range_key = %s
+            """, (range_key,))
+            rows = cursor.fetchall()
+        conn.commit()
+        return {
+            shard_start: {
+                'range_key': range_key,
+                'shard_start': shard_start,
+                'shard_end': shard_end,
+                'cursor': json.loads(resume_cursor) if resume_cursor else None,
+                'pages': pages,
+                'rows': rows_written,
+                'done': done
+            }
+            for shard_start, shard_end, resume_cursor, pages, rows_written, done in rows
+        }
+    except psycopg2.Error as e:
+        logger.error(f"Loading sync checkpoints failed: {e}")
+        conn.rollback()
+        return {}
+    finally:
+        conn.close()
+
+
+def expire_sync_checkpoints(max_age_days):
+    """Drop checkpoint runs not advanced for max_age_days (abandoned ranges); returns rows deleted"""
+    conn = get_db_connection()
+    if not conn:
+        return 0
+
+    try:
+        with conn.cursor() as cursor:
+            ensure_sync_checkpoint_table(cursor)
+            cursor.execute("""
+                DELETE FROM booking_sync_checkpoints
+                WHERE range_key IN (
+                    SELECT range_key FROM booking_sync_checkpoints
+                    GROUP BY range_key
+                    HAVING MAX(updated_at) < NOW() - make_interval(days => %s)
+                )
+            """, (max_age_days,))
+            deleted = cursor.rowcount
+        conn.commit()
+        return deleted
+    except psycopg2.Error as e:
+        logger.error(f"Expiring sync checkpoints failed: {e}")
+        conn.rollback()
         return 0
     finally:
         conn.close()
-    
+
+
+def clear_sync_checkpoints(range_key):
+    """Forget the checkpoints of a sync run once every shard completed"""
+    conn = get_db_connection()
+    if not conn:
+        return False
+
+    try:
+        with conn.cursor() as cursor:
+            ensure_sync_checkpoint_table(cursor)
+            cursor.execute("DELETE FROM booking_sync_checkpoints WHERE range_key = %s", (range_key,))
+        conn.commit()
+        return True
+    except psycopg2.Error as e:
+        logger.error(f"Clearing sync checkpoints failed: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+
+def save_bookings_batch(bookings_parsed, table='bookings', method='copy'):
+    """Save multiple bookings (always rewrites them); returns the saved count, 0 on failure"""
+    stats = upsert_bookings(bookings_parsed, table=table, method=method, skip_unchanged=False)
+    if not stats:
+        return 0
+    return stats['inserted'] + stats['updated']
+
 def save_booking(conn, booking):
     """Insert single booking with conflict handling"""
     try:
@@ -139,15 +786,87 @@ if __name__ == "__main__":
     test_connection()
 
 
-def get_latest_booking_date():
-    """Get most recent booking date for incremental updates"""
+SYNC_STATE_DDL = """
+    CREATE TABLE IF NOT EXISTS booking_sync_state (
+        sync_name TEXT PRIMARY KEY,
+        last_success_at TIMESTAMPTZ,
+        last_full_sync_at TIMESTAMPTZ,
+        last_range_start TEXT,
+        last_range_end TEXT,
+        last_stats JSONB,
+        updated_at TIMESTAMPTZ DEFAULT NOW()
+    )
+"""
+
+
+def get_sync_state(sync_name):
+    """Last successful run of a named sync (None if it never succeeded)"""
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT MAX(booking_date) FROM bookings;")
-    result = cursor.fetchone()[0]
-    cursor.close()
-    conn.close()
-    return result
+    if not conn:
+        return None
+
+    try:
+        with conn.cursor() as cursor:
+            ensure_schema(cursor, 'booking_sync_state', SYNC_STATE_DDL)
+            cursor.execute("""
+                SELECT last_success_at, last_full_sync_at, last_range_start,
+                       last_range_end, last_stats
+                FROM booking_sync_state
+                WHERE sync_name = %s
+            """, (sync_name,))
+            row = cursor.fetchone()
+        conn.commit()
+    except psycopg2.Error as e:
+        logger.error(f"Loading sync state failed: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+    if row is None:
+        return None
+    return dict(zip(
+        ('last_success_at', 'last_full_sync_at', 'last_range_start',
+         'last_range_end', 'last_stats'),
+        row
+    ))
+
+
+def record_sync_success(sync_name, range_start, range_end, full_sync, stats=None):
+    """Store a successful run (its time drives the next incremental window)"""
+    conn = get_db_connection()
+    if not conn:
+        return False
+
+    try:
+        with conn.cursor() as cursor:
+            ensure_schema(cursor, 'booking_sync_state', SYNC_STATE_DDL)
+            cursor.execute("""
+                INSERT INTO booking_sync_state (
+                    sync_name, last_success_at, last_full_sync_at, last_range_start,
+                    last_range_end, last_stats
+                ) VALUES (
+                    %s, NOW(), CASE WHEN %s THEN NOW() END, %s, %s, %s::jsonb
+                )
+                ON CONFLICT (sync_name) DO UPDATE SET
+                    last_success_at = EXCLUDED.last_success_at,
+                    last_full_sync_at = COALESCE(EXCLUDED.last_full_sync_at, booking_sync_state.last_full_sync_at),
+                    last_range_start = EXCLUDED.last_range_start,
+                    last_range_end = EXCLUDED.last_range_end,
+                    last_stats = EXCLUDED.last_stats,
+                    updated_at = NOW()
+            """, (
+                sync_name, full_sync, range_start, range_end,
+                json.dumps(stats or {}, default=str)
+            ))
+        conn.commit()
+        return True
+    except psycopg2.Error as e:
+        logger.error(f"Saving sync state failed: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
 
 
 def save_booking_snapshot(snapshot_data):
@@ -199,6 +918,109 @@ def save_booking_snapshot(snapshot_data):
         conn.close()
         return False
 
+BOOKING_SNAPSHOT_COLUMNS = (
+    'snapshot_created_at', 'forecast_date', 'reservierungen', 'bestaetigt_personen',
+    'storniert_personen', 'online_personen', 'intern_personen', 'walk_in_personen'
+)
+
+BOOKING_SNAPSHOT_UPSERT = """
+    ON CONFLICT (snapshot_created_at, forecast_date) DO UPDATE SET
+        reservierungen = EXCLUDED.reservierungen,
+        bestaetigt_personen = EXCLUDED.bestaetigt_personen,
+        storniert_personen = EXCLUDED.storniert_personen,
+        online_personen = EXCLUDED.online_personen,
+        intern_personen = EXCLUDED.intern_personen,
+        walk_in_personen = EXCLUDED.walk_in_personen,
+        created_at = NOW()
+"""
+
+
+def save_booking_snapshots_batch(snapshots):
+    """Save many daily snapshot rows in one statement; returns the saved count, 0 on failure"""
+    if not snapshots:
+        return 0
+
+    conn = get_db_connection()
+    if not conn:
+        return 0
+
+    try:
+        with conn.cursor() as cursor:
+            execute_values(
+                cursor,
+                f"INSERT INTO booking_snapshots ({', '.join(BOOKING_SNAPSHOT_COLUMNS)}) VALUES %s"
+                + BOOKING_SNAPSHOT_UPSERT,
+                [tuple(s[col] for col in BOOKING_SNAPSHOT_COLUMNS) for s in snapshots],
+                page_size=1000
+            )
+        conn.commit()
+        return len(snapshots)
+    except psycopg2.Error as e:
+        logger.error(f"Snapshot batch save failed: {e}")
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+
+def snapshot_bookings_from_table(snapshot_date, start_date, end_date):
+    """
+    Build the daily booking snapshot straight from the synced bookings table
+
+    One INSERT ... SELECT ... GROUP BY, same categories as the API aggregation:
+    confirmed = neither cancelled nor no-show, split into online (widget),
+    walk-in and internal (no source). Day boundaries follow the local
+    booking_date stored by the sync.
+
+    Returns:
+        int: Number of snapshot days written, None on failure
+    """
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO booking_snapshots ({', '.join(BOOKING_SNAPSHOT_COLUMNS)})
+                SELECT
+                    %(snapshot_date)s,
+                    booking_date::date,
+                    COUNT(*),
+                    COALESCE(SUM(people) FILTER (WHERE confirmed), 0),
+                    COALESCE(SUM(people) FILTER (WHERE cancelled), 0),
+                    COALESCE(SUM(people) FILTER (WHERE confirmed AND source = 'widget'), 0),
+                    COALESCE(SUM(people) FILTER (
+                        WHERE confirmed AND source IS NULL AND NOT walk_in
+                    ), 0),
+                    COALESCE(SUM(people) FILTER (
+                        WHERE confirmed AND source IS DISTINCT FROM 'widget' AND walk_in
+                    ), 0)
+                FROM (
+                    SELECT booking_date, people, source,
+                           COALESCE(cancelled, FALSE) AS cancelled,
+                           COALESCE(walk_in, FALSE) AS walk_in,
+                           NOT COALESCE(cancelled, FALSE) AND NOT COALESCE(no_show, FALSE) AS confirmed
+                    FROM bookings
+                    WHERE booking_date >= %(start)s AND booking_date < %(end)s
+                ) b
+                GROUP BY booking_date::date
+                {BOOKING_SNAPSHOT_UPSERT}
+            """, {
+                'snapshot_date': snapshot_date,
+                'start': start_date,
+                'end': end_date + timedelta(days=1)
+            })
+            days = cursor.rowcount
+        conn.commit()
+        return days
+    except psycopg2.Error as e:
+        logger.error(f"Snapshot from bookings table failed: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
 def save_weather_forecast_batch(forecasts):
     """Save multiple weather forecasts efficiently"""
     conn = get_db_connection()
@@ -258,58 +1080,6 @@ def save_weather_forecast(weather_data):
     if not conn:
         return False
 
-def save_weather_daily_batch(weather_data_list):
-    """Save historical/daily weather batch"""
-    conn = get_db_connection()
-    if not conn:
-        return False
-    
-    try:
-        with conn.cursor() as cursor:
-            insert_query = """
-                INSERT INTO weather_daily (
-                    date, location, temp_max, temp_min, temp_mean,
-                    precipitation_sum, precipitation_hours, humidity,
-                    windspeed_max, pressure_msl, sunshine_duration,
-                    cloudcover_mean, visibility, weathercode,
-                    data_source, is_forecast, forecast_created_at
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                ) ON CONFLICT (date) DO UPDATE SET
-                    temp_max = EXCLUDED.temp_max,
-                    temp_min = EXCLUDED.temp_min,
-                    precipitation_sum = EXCLUDED.precipitation_sum,
-                    precipitation_hours = EXCLUDED.precipitation_hours,
-                    humidity = EXCLUDED.humidity,
-                    windspeed_max = EXCLUDED.windspeed_max,
-                    pressure_msl = EXCLUDED.pressure_msl,
-                    sunshine_duration = EXCLUDED.sunshine_duration,
-                    cloudcover_mean = EXCLUDED.cloudcover_mean,
-                    weathercode = EXCLUDED.weathercode,
-                    updated_at = NOW()
-            """
-            
-            data_tuples = [
-                (
-                    w['date'], 'Kiel', w.get('temp_max'), w.get('temp_min'), w.get('temp_mean'),
-                    w.get('precipitation_sum', 0), w.get('precipitation_hours', 0), w.get('humidity', 70),
-                    w.get('windspeed_max', 0), w.get('pressure_msl', 1013), w.get('sunshine_duration', 0),
-                    w.get('cloudcover_mean', 50), 15000, w.get('weathercode', 1),
-                    'openmeteo', False, None
-                ) for w in weather_data_list
-            ]
-            
-            cursor.executemany(insert_query, data_tuples)
-            conn.commit()
-            return True
-            
-    except psycopg2.Error as e:
-        logger.error(f"Weather daily batch save failed: {e}")
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
-          
     try:
         cursor = conn.cursor()
         
@@ -363,5 +1133,484 @@ def save_weather_daily_batch(weather_data_list):
         conn.rollback()
         conn.close()
         return False
-    
 
+WEATHER_DAILY_COLUMNS = (
+    'date', 'location', 'temp_max', 'temp_min', 'temp_mean',
+    'precipitation_sum', 'precipitation_hours', 'humidity',
+    'windspeed_max', 'pressure_msl', 'sunshine_duration',
+    'cloudcover_mean', 'visibility', 'weathercode',
+    'data_source', 'is_forecast', 'forecast_created_at'
+)
+
+WEATHER_DAILY_UPSERT_SET = """
+    temp_max = EXCLUDED.temp_max,
+    temp_min = EXCLUDED.temp_min,
+    precipitation_sum = EXCLUDED.precipitation_sum,
+    precipitation_hours = EXCLUDED.precipitation_hours,
+    humidity = EXCLUDED.humidity,
+    windspeed_max = EXCLUDED.windspeed_max,
+    pressure_msl = EXCLUDED.pressure_msl,
+    sunshine_duration = EXCLUDED.sunshine_duration,
+    cloudcover_mean = EXCLUDED.cloudcover_mean,
+    weathercode = EXCLUDED.weathercode,
+    updated_at = NOW()
+"""
+
+
+def _upsert_weather_daily(cursor, rows, table='weather_daily', page_size=1000):
+    """
+    Upsert weather_daily rows (tuples in WEATHER_DAILY_COLUMNS order) on an open cursor
+
+    Duplicate dates keep the last row (one statement must not touch a row twice).
+    The caller owns the transaction.
+
+    Returns:
+        int: Number of rows written
+    """
+    deduped = list({row[0]: row for row in rows}.values())
+    if not deduped:
+        return 0
+
+    query = sql.SQL("INSERT INTO {table} ({columns}) VALUES %s ON CONFLICT (date) DO UPDATE SET").format(
+        table=sql.Identifier(table),
+        columns=sql.SQL(', ').join(map(sql.Identifier, WEATHER_DAILY_COLUMNS))
+    ) + sql.SQL(WEATHER_DAILY_UPSERT_SET)
+    execute_values(cursor, query.as_string(cursor), deduped, page_size=page_size)
+    return len(deduped)
+
+
+def save_weather_daily_rows(rows, table='weather_daily'):
+    """Bulk upsert prepared weather_daily rows in one transaction; returns the count, 0 on failure"""
+    conn = get_db_connection()
+    if not conn:
+        return 0
+
+    try:
+        with conn.cursor() as cursor:
+            saved = _upsert_weather_daily(cursor, rows, table)
+        conn.commit()
+        return saved
+    except psycopg2.Error as e:
+        logger.error(f"Weather daily batch save failed: {e}")
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+
+# Ein weather_daily-Tag gilt nur mit temp_max als vorhanden (ERA5 noch nicht final → fehlt);
+# gemeinsame Definition für Backfill-Planung und Lücken-Nachimport
+WEATHER_DAY_PRESENT_SQL = "w.temp_max IS NOT NULL"
+
+
+def get_weather_daily_counts(ranges):
+    """
+    Present weather_daily days (WEATHER_DAY_PRESENT_SQL) per (start, end) date range, in one query
+
+    Returns:
+        dict: (start, end) → number of dates present, None on failure
+    """
+    if not ranges:
+        return {}
+
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT r.range_start, r.range_end, COUNT(w.date)
+                FROM unnest(%s::date[], %s::date[]) AS r(range_start, range_end)
+                LEFT JOIN weather_daily w
+                    ON w.date BETWEEN r.range_start AND r.range_end AND """ + WEATHER_DAY_PRESENT_SQL + """
+                GROUP BY r.range_start, r.range_end
+            """, ([start for start, _ in ranges], [end for _, end in ranges]))
+            rows = cursor.fetchall()
+        conn.commit()
+        return {(start, end): count for start, end, count in rows}
+    except psycopg2.Error as e:
+        logger.error(f"Weather coverage query failed: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+
+def get_weather_daily_gaps(start_date, end_date):
+    """
+    Missing weather_daily days in [start_date, end_date], coalesced into ranges
+
+    generate_series anti-join against weather_daily; rows failing WEATHER_DAY_PRESENT_SQL
+    (ERA5 not yet final when they were imported) count as missing too.
+    Consecutive days are grouped gaps-and-islands style (day - row_number).
+
+    Returns:
+        list: (range_start, range_end, days) tuples in date order, None on failure
+    """
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                WITH missing AS (
+                    SELECT d::date AS day
+                    FROM generate_series(%s::date, %s::date, INTERVAL '1 day') AS d
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM weather_daily w
+                        WHERE w.date = d::date AND """ + WEATHER_DAY_PRESENT_SQL + """
+                    )
+                ), islands AS (
+                    SELECT day, day - (ROW_NUMBER() OVER (ORDER BY day))::int AS island
+                    FROM missing
+                )
+                SELECT MIN(day), MAX(day), COUNT(*)
+                FROM islands
+                GROUP BY island
+                ORDER BY MIN(day)
+            """, (start_date, end_date))
+            gaps = cursor.fetchall()
+        conn.commit()
+        return gaps
+    except psycopg2.Error as e:
+        logger.error(f"Weather gap query failed: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+
+WEATHER_IMPORT_MANIFEST_DDL = """
+    CREATE TABLE IF NOT EXISTS weather_import_manifest (
+        filename TEXT PRIMARY KEY,
+        checksum TEXT NOT NULL,
+        size_bytes BIGINT NOT NULL,
+        mtime DOUBLE PRECISION NOT NULL,
+        rows_imported INTEGER NOT NULL DEFAULT 0,
+        imported_at TIMESTAMPTZ DEFAULT NOW()
+    )
+"""
+
+
+def get_weather_import_manifest():
+    """Already ingested weather JSON backups: filename → checksum/size/mtime (None on failure)"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    try:
+        with conn.cursor() as cursor:
+            ensure_schema(cursor, 'weather_import_manifest', WEATHER_IMPORT_MANIFEST_DDL)
+            cursor.execute("SELECT filename, checksum, size_bytes, mtime FROM weather_import_manifest")
+            rows = cursor.fetchall()
+        conn.commit()
+        return {
+            filename: {'checksum': checksum, 'size_bytes': size_bytes, 'mtime': mtime}
+            for filename, checksum, size_bytes, mtime in rows
+        }
+    except psycopg2.Error as e:
+        logger.error(f"Loading weather import manifest failed: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+
+def import_weather_file(entry, rows, rejected=False):
+    """
+    Upsert the weather_daily rows of one backup file and record it in the
+    manifest, both in one transaction (a failed file is retried next run)
+
+    Args:
+        entry: dict with filename, checksum, size_bytes, mtime
+        rows: weather_daily tuples (empty → only the manifest is updated)
+        rejected: file has no usable daily block; record it with rows_imported = 0
+            so it is skipped until it changes
+
+    Returns:
+        int: Rows written, None on failure
+    """
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    try:
+        with conn.cursor() as cursor:
+            ensure_schema(cursor, 'weather_import_manifest', WEATHER_IMPORT_MANIFEST_DDL)
+            saved = _upsert_weather_daily(cursor, rows)
+            cursor.execute("""
+                INSERT INTO weather_import_manifest (filename, checksum, size_bytes, mtime, rows_imported)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (filename) DO UPDATE SET
+                    checksum = EXCLUDED.checksum,
+                    size_bytes = EXCLUDED.size_bytes,
+                    mtime = EXCLUDED.mtime,
+                    rows_imported = CASE WHEN %s THEN EXCLUDED.rows_imported
+                                         ELSE weather_import_manifest.rows_imported END,
+                    imported_at = NOW()
+            """, (
+                entry['filename'], entry['checksum'], entry['size_bytes'], entry['mtime'],
+                saved, bool(rows) or rejected
+            ))
+        conn.commit()
+        return saved
+    except psycopg2.Error as e:
+        logger.error(f"Importing {entry['filename']} failed: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+
+def save_weather_daily_batch(weather_data_list):
+    """Save historical/daily weather batch"""
+    data_tuples = [
+        (
+            w['date'], 'Kiel', w.get('temp_max'), w.get('temp_min'), w.get('temp_mean'),
+            w.get('precipitation_sum', 0), w.get('precipitation_hours', 0), w.get('humidity', 70),
+            w.get('windspeed_max', 0), w.get('pressure_msl', 1013), w.get('sunshine_duration', 0),
+            w.get('cloudcover_mean', 50), 15000, w.get('weathercode', 1),
+            'openmeteo', False, None
+        ) for w in weather_data_list
+    ]
+    return save_weather_daily_rows(data_tuples) == len({t[0] for t in data_tuples})
+
+
+# Kalender-Features (Feiertage, Brückentage, Schulferien) pro Tag, befüllt von src/calendar_features.py
+CALENDAR_FEATURE_COLUMNS = (
+    'is_holiday_de', 'is_holiday_sh', 'is_holiday_hh', 'is_holiday_dk',
+    'is_ferien_sh', 'is_ferien_hh',
+    'next_day_holiday', 'prev_day_holiday', 'bridge_day', 'day_before_holiday', 'day_after_holiday'
+)
+
+CALENDAR_FEATURES_DDL = """
+    CREATE TABLE IF NOT EXISTS calendar_features (
+        date DATE PRIMARY KEY,
+        """ + ",\n        ".join(f"{col} SMALLINT NOT NULL DEFAULT 0" for col in CALENDAR_FEATURE_COLUMNS) + """,
+        source_hash TEXT,
+        updated_at TIMESTAMPTZ DEFAULT NOW()
+    );
+    ALTER TABLE calendar_features ADD COLUMN IF NOT EXISTS source_hash TEXT
+"""
+
+
+def get_calendar_coverage(start_date, end_date, source_hash):
+    """
+    Number of days in [start_date, end_date] present in calendar_features and built
+    from the given sources (calendar_source_hash); None on failure
+    """
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    try:
+        with conn.cursor() as cursor:
+            ensure_schema(cursor, 'calendar_features', CALENDAR_FEATURES_DDL, ('source_hash',))
+            cursor.execute(
+                "SELECT COUNT(*) FROM calendar_features WHERE date BETWEEN %s AND %s AND source_hash = %s",
+                (start_date, end_date, source_hash)
+            )
+            count = cursor.fetchone()[0]
+        conn.commit()
+        return count
+    except psycopg2.Error as e:
+        logger.error(f"Calendar coverage query failed: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+
+def save_calendar_features(rows, source_hash):
+    """
+    Upsert calendar_features rows (date first, then CALENDAR_FEATURE_COLUMNS)
+    and stamp them with the hash of the sources they were built from
+
+    Returns:
+        int: Rows written, None on failure
+    """
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    columns = ('date',) + CALENDAR_FEATURE_COLUMNS + ('source_hash',)
+    try:
+        with conn.cursor() as cursor:
+            ensure_schema(cursor, 'calendar_features', CALENDAR_FEATURES_DDL, ('source_hash',))
+            execute_values(
+                cursor,
+                f"INSERT INTO calendar_features ({', '.join(columns)}) VALUES %s "
+                "ON CONFLICT (date) DO UPDATE SET "
+                + ", ".join(f"{col} = EXCLUDED.{col}" for col in CALENDAR_FEATURE_COLUMNS + ('source_hash',))
+                + ", updated_at = NOW()",
+                [tuple(row) + (source_hash,) for row in rows],
+                page_size=1000
+            )
+        conn.commit()
+        return len(rows)
+    except psycopg2.Error as e:
+        logger.error(f"Saving calendar features failed: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+
+# Feature Store: ein Feature-Vektor pro (Zieldatum, Feature-Set-Version), Spaltennamen pro Version
+# (beide Tabellen entstehen in einem Statement, ensure_schema prüft walkin_features)
+FEATURE_STORE_DDL = """
+    CREATE TABLE IF NOT EXISTS walkin_feature_sets (
+        feature_version TEXT PRIMARY KEY,
+        feature_names TEXT[] NOT NULL,
+        created_at TIMESTAMPTZ DEFAULT NOW()
+    );
+    CREATE TABLE IF NOT EXISTS walkin_features (
+        target_date DATE NOT NULL,
+        feature_version TEXT NOT NULL REFERENCES walkin_feature_sets (feature_version),
+        input_hash TEXT NOT NULL,
+        features DOUBLE PRECISION[] NOT NULL,
+        computed_at TIMESTAMPTZ DEFAULT NOW(),
+        PRIMARY KEY (feature_version, target_date)
+    )
+"""
+
+
+def get_feature_hashes(feature_version, start_date, end_date):
+    """Stored input hashes per target_date for one feature set version (None on failure)"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    try:
+        with conn.cursor() as cursor:
+            ensure_schema(cursor, 'walkin_features', FEATURE_STORE_DDL)
+            cursor.execute("""
+                SELECT target_date, input_hash FROM walkin_features
+                WHERE feature_version = %s AND target_date BETWEEN %s AND %s
+            """, (feature_version, start_date, end_date))
+            rows = cursor.fetchall()
+        conn.commit()
+        return dict(rows)
+    except psycopg2.Error as e:
+        logger.error(f"Loading feature hashes failed: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+
+def get_feature_names(feature_version):
+    """Column names of a stored feature set version, None if unknown or on failure"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    try:
+        with conn.cursor() as cursor:
+            ensure_schema(cursor, 'walkin_features', FEATURE_STORE_DDL)
+            cursor.execute(
+                "SELECT feature_names FROM walkin_feature_sets WHERE feature_version = %s",
+                (feature_version,)
+            )
+            row = cursor.fetchone()
+        conn.commit()
+        return list(row[0]) if row else None
+    except psycopg2.Error as e:
+        logger.error(f"Loading feature set {feature_version} failed: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+
+def save_features(feature_version, feature_names, rows):
+    """
+    Upsert feature vectors of one version in one transaction
+
+    Args:
+        feature_version: feature set version
+        feature_names: column names, same order as every features list
+        rows: (target_date, input_hash, features) tuples
+
+    Returns:
+        int: Rows written, None on failure (also if the version exists with other columns)
+    """
+    conn = get_db_connection()
+    if not conn:
+        return None
+
+    try:
+        with conn.cursor() as cursor:
+            ensure_schema(cursor, 'walkin_features', FEATURE_STORE_DDL)
+            cursor.execute("""
+                INSERT INTO walkin_feature_sets (feature_version, feature_names) VALUES (%s, %s)
+                ON CONFLICT (feature_version) DO NOTHING
+            """, (feature_version, list(feature_names)))
+            cursor.execute(
+                "SELECT feature_names FROM walkin_feature_sets WHERE feature_version = %s",
+                (feature_version,)
+            )
+            stored_names = list(cursor.fetchone()[0])
+            if stored_names != list(feature_names):
+                logger.error(
+                    f"Feature set {feature_version} is stored with different columns - bump the version"
+                )
+                conn.rollback()
+                return None
+
+            execute_values(cursor, """
+                INSERT INTO walkin_features (target_date, feature_version, input_hash, features)
+                VALUES %s
+                ON CONFLICT (feature_version, target_date) DO UPDATE SET
+                    input_hash = EXCLUDED.input_hash,
+                    features = EXCLUDED.features,
+                    computed_at = NOW()
+            """, [(target_date, feature_version, input_hash, features) for target_date, input_hash, features in rows],
+                page_size=1000)
+        conn.commit()
+        return len(rows)
+    except psycopg2.Error as e:
+        logger.error(f"Saving features ({feature_version}) failed: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+
+# Prognosebänder (p10/p50/p90) und Horizont zusätzlich zu pred_walkins
+WALKIN_FORECAST_BANDS_DDL = """
+    ALTER TABLE walkin_forecast
+        ADD COLUMN IF NOT EXISTS horizon_days SMALLINT,
+        ADD COLUMN IF NOT EXISTS pred_p10 REAL,
+        ADD COLUMN IF NOT EXISTS pred_p50 REAL,
+        ADD COLUMN IF NOT EXISTS pred_p90 REAL
+"""
+WALKIN_FORECAST_BAND_COLUMNS = ('horizon_days', 'pred_p10', 'pred_p50', 'pred_p90')
+
+def ensure_forecast_band_columns():
+    """
+    Add the band columns to walkin_forecast if missing
+
+    The ALTER (ACCESS EXCLUSIVE lock) only runs when a column is actually missing;
+    used by predict_walkins before writing and by the dashboard before reading.
+    """
+    if ('walkin_forecast', WALKIN_FORECAST_BAND_COLUMNS) in _ensured_schema:
+        return True
+
+    conn = get_db_connection()
+    if not conn:
+        return False
+
+    try:
+        with conn.cursor() as cursor:
+            ensure_schema(cursor, 'walkin_forecast', WALKIN_FORECAST_BANDS_DDL, WALKIN_FORECAST_BAND_COLUMNS)
+        conn.commit()
+        return True
+    except psycopg2.Error as e:
+        logger.error(f"Forecast band columns migration failed: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
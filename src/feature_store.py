@@ -0,0 +1,181 @@
+"""
+Feature Store - persisted walk-in model inputs per target date and feature set version
+Rows are only recomputed for dates whose inputs changed (weather forecast, bookings,
+calendar, or the past/future split); prediction and training read the stored matrix.
+"""
+import sys
+import os
+import hashlib
+import logging
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from src.database import get_feature_hashes, get_feature_names, save_features
+from src.queries import run_query
+
+logger = logging.getLogger("feature-store")
+
+# Bei jeder Änderung an feature_engineering hochzählen: alte Vektoren bleiben unter ihrer Version stehen
+FEATURE_SET_VERSION = "walkin_v1"
+
+# Rolling-Fenster von feature_engineering (reservations_7d_avg, walkin_7d_avg) und seine Eingaben
+ROLLING_DAYS = 7
+ROLLING_INPUTS = ['reservations_people', 'walkin_people']
+
+
+def input_hashes(df_base, today=None):
+    """
+    Fingerprint of everything a date's feature vector depends on
+
+    - its own base row (weather, bookings, calendar flags)
+    - the rolling inputs of the previous ROLLING_DAYS - 1 days
+    - whether it lies in the future, and for future dates the window of the
+      last past day (walkin_7d_avg is carried forward from there)
+
+    Args:
+        df_base: get_data_for_prediction frame, sorted by target_date
+        today: past/future boundary (default: today)
+
+    Returns:
+        list: hex digest per row
+    """
+    today = pd.Timestamp(today or datetime.now().date())
+    columns = [col for col in df_base.columns if col != 'target_date']
+    row_hashes = pd.util.hash_pandas_object(df_base[columns], index=False).to_numpy()
+    rolling_hashes = pd.util.hash_pandas_object(df_base[ROLLING_INPUTS], index=False).to_numpy()
+    is_future = (pd.to_datetime(df_base['target_date']) >= today).to_numpy()
+
+    windows = [
+        rolling_hashes[max(0, i - ROLLING_DAYS + 1):i].tobytes()
+        for i in range(len(rolling_hashes))
+    ]
+    past = np.flatnonzero(~is_future)
+    last_past_window = windows[past[-1]] + row_hashes[past[-1]].tobytes() if len(past) else b""
+
+    digests = []
+    for row_hash, window, future in zip(row_hashes, windows, is_future):
+        h = hashlib.blake2b(row_hash.tobytes() + window, digest_size=16)
+        if future:
+            h.update(b"future" + last_past_window)
+        digests.append(h.hexdigest())
+    return digests
+
+
+def context_rows(changed, is_future):
+    """
+    Row positions feature_engineering needs to reproduce the changed rows exactly
+
+    Every changed row plus its ROLLING_DAYS - 1 predecessors; if a future row changed,
+    also the last past day and its window (walkin_7d_avg is carried forward from there).
+    The rolling windows are row based, so each changed row sees the same predecessors
+    as in the full frame.
+
+    Args:
+        changed: bool array, rows whose input hash differs from the store
+        is_future: bool array, rows on or after the past/future boundary
+
+    Returns:
+        np.ndarray: sorted row positions
+    """
+    anchors = np.flatnonzero(changed)
+    past = np.flatnonzero(~is_future)
+    if len(past) and is_future[anchors].any():
+        anchors = np.append(anchors, past[-1])
+
+    needed = np.zeros(len(changed), dtype=bool)
+    for i in anchors:
+        needed[max(0, i - ROLLING_DAYS + 1):i + 1] = True
+    return np.flatnonzero(needed)
+
+
+def update_feature_store(df_base, engineer, version=FEATURE_SET_VERSION):
+    """
+    Recompute and store the feature vectors of dates whose inputs changed
+
+    Only the changed dates and their rolling context (context_rows) are run through
+    the engineer, so a daily run with one new forecast day stays cheap.
+
+    Args:
+        df_base: get_data_for_prediction frame (history window + forecast days)
+        engineer: feature_engineering(df, future_only=False) of the calling pipeline
+        version: feature set version
+
+    Returns:
+        dict: dates, changed, written (None if the store could not be written),
+        hashes (target_date → input hash of this run, for load_feature_matrix)
+    """
+    t0 = time.perf_counter()
+    df_base = df_base.sort_values('target_date').reset_index(drop=True)
+    dates = pd.to_datetime(df_base['target_date']).dt.date
+    hashes = input_hashes(df_base)
+
+    stored = get_feature_hashes(version, dates.min(), dates.max())
+    current = dict(zip(dates, hashes))
+    if stored is None:
+        return {'dates': len(dates), 'changed': None, 'written': None, 'hashes': current}
+
+    changed = np.array([stored.get(d) != h for d, h in zip(dates, hashes)], dtype=bool)
+    result = {'dates': len(dates), 'changed': int(changed.sum()), 'written': 0, 'hashes': current}
+    if not changed.any():
+        logger.info(f"🗃️ Feature store {version}: {len(dates)} dates unchanged")
+        return result
+
+    # Nur geänderte Tage plus Rolling-Kontext durch das Feature Engineering schicken
+    is_future = (pd.to_datetime(df_base['target_date']) >= pd.Timestamp(datetime.now().date())).to_numpy()
+    positions = context_rows(changed, is_future)
+    features = engineer(df_base.iloc[positions].copy(), future_only=False).reset_index(drop=True)
+    feature_names = [col for col in features.columns if col != 'target_date']
+    matrix = features[feature_names].to_numpy(dtype=float)
+
+    rows = [
+        (dates[positions[j]], hashes[positions[j]], matrix[j].tolist())
+        for j in np.flatnonzero(changed[positions])
+    ]
+    result['written'] = save_features(version, feature_names, rows)
+    logger.info(
+        f"🗃️ Feature store {version}: {result['changed']}/{len(dates)} dates recomputed "
+        f"({len(positions)} rows with context) in {time.perf_counter() - t0:.3f}s"
+    )
+    return result
+
+
+def load_feature_matrix(start_date, end_date, version=FEATURE_SET_VERSION, conn=None, expected_hashes=None):
+    """
+    Stored feature vectors as a DataFrame (target_date + one column per feature)
+
+    Args:
+        expected_hashes: target_date → input hash (update_feature_store result); if given,
+            vectors stored for other inputs (stale rows after a failed write) are not returned
+
+    Returns:
+        pd.DataFrame: empty if the version is unknown, nothing is stored or a row is stale
+    """
+    feature_names = get_feature_names(version)
+    if not feature_names:
+        return pd.DataFrame()
+
+    stored = run_query("feature_matrix", {'version': version, 'start': start_date, 'end': end_date}, conn=conn)
+    if stored.empty:
+        return pd.DataFrame()
+
+    if expected_hashes is not None:
+        stale = [
+            d for d, h in zip(pd.to_datetime(stored['target_date']).dt.date, stored['input_hash'])
+            if expected_hashes.get(d) != h
+        ]
+        if stale:
+            logger.warning(f"⚠️ Feature store {version}: {len(stale)} stale rows (first {stale[0]}) - not used")
+            return pd.DataFrame()
+
+    matrix = pd.DataFrame(
+        np.array(stored['features'].tolist(), dtype=float),
+        columns=feature_names,
+        index=stored.index
+    )
+    matrix.insert(0, 'target_date', pd.to_datetime(stored['target_date']))
+    return matrix
@@ -0,0 +1,124 @@
+"""
+Shared HTTP client for all outbound API calls (Teburio, OpenMeteo)
+One keep-alive session per process with retries, backoff and latency metrics
+"""
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config.settings import HTTP_CONFIG
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_pid = None
+_lock = threading.Lock()
+_stats = {}
+
+
+def _build_session():
+    retry = Retry(
+        total=HTTP_CONFIG['retries'],
+        backoff_factor=HTTP_CONFIG['backoff_factor'],
+        status_forcelist=RETRY_STATUS_CODES,
+        # GraphQL queries are read-only, so POST is safe to retry as well
+        allowed_methods=frozenset({'GET', 'POST'}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        max_retries=retry,
+        pool_connections=4,
+        pool_maxsize=HTTP_CONFIG['pool_maxsize']
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide session (recreated after fork)"""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+
+def _record(endpoint, elapsed, response=None, failed=False):
+    retries = 0
+    if response is not None and response.raw is not None and getattr(response.raw, 'retries', None):
+        retries = len(response.raw.retries.history)
+
+    with _lock:
+        stats = _stats.setdefault(endpoint, {
+            'requests': 0, 'errors': 0, 'retries': 0,
+            'total_seconds': 0.0, 'max_seconds': 0.0
+        })
+        stats['requests'] += 1
+        stats['retries'] += retries
+        stats['total_seconds'] += elapsed
+        stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+        if failed or (response is not None and response.status_code >= 400):
+            stats['errors'] += 1
+
+
+def request(method, endpoint, url, **kwargs):
+    """
+    Send a request through the shared session
+
+    Args:
+        method (str): HTTP method
+        endpoint (str): Logical endpoint name, selects the timeout and metrics bucket
+        url (str): Target URL
+        **kwargs: Passed on to requests (json, params, headers, timeout, ...)
+
+    Returns:
+        requests.Response: Response after retries (caller decides on raise_for_status)
+    """
+    timeouts = HTTP_CONFIG['timeouts']
+    kwargs.setdefault('timeout', timeouts.get(endpoint, timeouts['default']))
+
+    t0 = time.perf_counter()
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except requests.exceptions.RequestException:
+        _record(endpoint, time.perf_counter() - t0, failed=True)
+        raise
+
+    _record(endpoint, time.perf_counter() - t0, response)
+    return response
+
+
+def get(endpoint, url, **kwargs):
+    return request('GET', endpoint, url, **kwargs)
+
+
+def post(endpoint, url, **kwargs):
+    return request('POST', endpoint, url, **kwargs)
+
+
+def get_http_stats():
+    """Per-endpoint request counts, errors, retries and latency"""
+    with _lock:
+        return {
+            endpoint: {
+                **stats,
+                'total_seconds': round(stats['total_seconds'], 3),
+                'max_seconds': round(stats['max_seconds'], 3),
+                'avg_seconds': round(stats['total_seconds'] / stats['requests'], 3) if stats['requests'] else None
+            }
+            for endpoint, stats in _stats.items()
+        }
@@ -0,0 +1,134 @@
+"""
+Model Registry - process-level cache for trained model artifacts
+Each artifact is joblib-loaded once per process and only reloaded when the file
+changes (mtime/size first, content hash to rule out a mere touch).
+"""
+import sys
+import os
+import hashlib
+import logging
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joblib
+
+logger = logging.getLogger("model-registry")
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Loaded artifacts keyed by absolute path
+
+    - hit: file unchanged since the last load (same mtime and size)
+    - touched: mtime/size changed but the content hash did not → no reload
+    - reload: content changed → joblib.load again
+    mmap_mode ('r', 'c', ...) is passed to joblib.load; large numpy arrays in
+    uncompressed artifacts are then memory-mapped instead of read into RAM.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._digests = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'loads': 0, 'reloads': 0, 'touched': 0, 'load_seconds': 0.0}
+
+    def get(self, path, mmap_mode=None, loader=None):
+        path = os.path.abspath(path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Modell nicht gefunden: {path}")
+
+        with self._lock:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            entry = self._entries.get(path)
+
+            if entry and entry['mmap_mode'] == mmap_mode:
+                if entry['signature'] == signature:
+                    self.stats['hits'] += 1
+                    return entry['artifact']
+
+                digest = file_digest(path)
+                if digest == entry['digest']:
+                    entry['signature'] = signature
+                    self.stats['touched'] += 1
+                    self.stats['hits'] += 1
+                    return entry['artifact']
+            else:
+                digest = file_digest(path)
+
+            t0 = time.perf_counter()
+            artifact = loader(path) if loader else joblib.load(path, mmap_mode=mmap_mode)
+            elapsed = time.perf_counter() - t0
+
+            self.stats['reloads' if entry else 'loads'] += 1
+            self.stats['load_seconds'] += elapsed
+            self._entries[path] = {
+                'artifact': artifact,
+                'signature': signature,
+                'digest': digest,
+                'mmap_mode': mmap_mode,
+                'loaded_at': time.time(),
+                'load_seconds': elapsed
+            }
+            logger.info(f"📦 Loaded model {path} in {elapsed * 1000:.1f} ms ({'reload' if entry else 'first load'})")
+            return artifact
+
+    def digest(self, path):
+        """Content hash of path, recomputed only when mtime/size changed (loaded or not)"""
+        path = os.path.abspath(path)
+        with self._lock:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            entry = self._entries.get(path)
+            if entry and entry['signature'] == signature:
+                return entry['digest']
+            cached = self._digests.get(path)
+            if cached and cached[0] == signature:
+                return cached[1]
+            digest = file_digest(path)
+            self._digests[path] = (signature, digest)
+            return digest
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                **self.stats,
+                'load_seconds': round(self.stats['load_seconds'], 4),
+                'models': {
+                    path: {'digest': e['digest'], 'load_seconds': round(e['load_seconds'], 4), 'mmap_mode': e['mmap_mode']}
+                    for path, e in self._entries.items()
+                }
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+
+
+_registry = ModelRegistry()
+
+
+def load_model(path, mmap_mode=None, loader=None):
+    """Cached artifact for path (loads on first use or after the file changed; loader: custom reader instead of joblib)"""
+    return _registry.get(path, mmap_mode=mmap_mode, loader=loader)
+
+
+def model_digest(path):
+    """Cached content hash of an artifact file (same digest as file_digest)"""
+    return _registry.digest(path)
+
+
+def get_model_stats():
+    """Cache hits, loads/reloads and cumulative load time since process start"""
+    return _registry.get_stats()
@@ -1,9 +1,7 @@
 import sys
 import os
-import joblib
 import pandas as pd
 import numpy as np
-import holidays
 from datetime import datetime, timedelta, date
 import psycopg2
 from psycopg2.extras import execute_values
@@ -12,23 +10,44 @@ from psycopg2.extras import execute_values
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.logging_config import setup_logging
-from src.database import get_db_connection
+from config.settings import FORECAST_HORIZON_DAYS, MODEL_CONFIG
+from src.calendar_features import ensure_calendar_table, lookup_calendar
+from src.database import CALENDAR_FEATURE_COLUMNS, ensure_forecast_band_columns, get_db_connection
+from src.feature_store import load_feature_matrix, update_feature_store
+from src.model_registry import get_model_stats, load_model, model_digest
+from src.prediction_intervals import load_residuals, prediction_bands
+from src.queries import run_query, get_query_stats
+from src.ridge_scorer import load_scorer
 
 logger = setup_logging("predict_walkins")
 
-MODEL_PATH = "models/walkin_ridge_prod.pkl"
+MODEL_PATH = MODEL_CONFIG['path']
 
 def load_model_artifact(path):
-    """Lädt das trainierte Modell und die Feature-Liste."""
+    """Lädt das trainierte Modell und die Feature-Liste (einmal pro Prozess, neu nur bei Dateiänderung)."""
     if not os.path.exists(path):
         logger.error(f"Modell-Datei nicht gefunden: {path}")
         raise FileNotFoundError(f"Modell nicht gefunden: {path}")
     
-    logger.info(f"Lade Modell von {path}...")
-    artifact = joblib.load(path)
-    return artifact
+    return load_model(path, mmap_mode=MODEL_CONFIG['mmap_mode'])
 
-def get_data_for_prediction(conn, days_ahead=16):
+def load_predictor():
+    """
+    (predict, feature_cols): exportierter Reduced-Form-Scorer (ein Skalarprodukt, kein sklearn),
+    sonst das Pipeline-Artefakt. Stammt der Export nicht aus dem aktuellen .pkl
+    (source_digest ≠ Inhalts-Hash, mtimes reichen nach Deploy/checkout nicht), gilt das .pkl.
+    """
+    scorer_path = MODEL_CONFIG['scorer_path']
+    if os.path.exists(scorer_path):
+        scorer = load_scorer(scorer_path)
+        if not os.path.exists(MODEL_PATH) or scorer.source_digest == model_digest(MODEL_PATH):
+            return scorer.predict, scorer.feature_cols
+        logger.warning(f"⚠️ {scorer_path} wurde nicht aus {MODEL_PATH} exportiert - nutze das .pkl, bitte neu exportieren (src/ridge_scorer.py export)")
+
+    artifact = load_model_artifact(MODEL_PATH)
+    return artifact["model"].predict, artifact["feature_cols"]
+
+def get_data_for_prediction(conn, days_ahead=FORECAST_HORIZON_DAYS):
     """
     Lädt Wettervorhersagen und Buchungsdaten.
     Holt auch historische Daten (letzte 7 Tage) für Rolling Averages.
@@ -41,80 +60,21 @@ def get_data_for_prediction(conn, days_ahead=16):
     
     logger.info(f"Lade Datenbasis: {history_start} bis {forecast_end}")
 
-    # 1. Wetterdaten (Forecasts für Zukunft, ggf. Daily für Vergangenheit wäre genauer, 
-    # aber wir nehmen vereinfacht Forecasts für alles oder füllen auf)
-    weather_query = f"""
-        SELECT DISTINCT ON (forecast_date)
-            forecast_date as target_date,
-            temperature_2m_max,
-            temperature_2m_min,
-            precipitation_sum,
-            sunshine_duration,
-            wind_speed_10m_max,
-            cloud_cover_mean,
-            weathercode
-        FROM weather_forecasts
-        WHERE forecast_date BETWEEN '{history_start}' AND '{forecast_end}'
-        ORDER BY forecast_date, forecast_created_at DESC
-    """
-    df_weather = pd.read_sql(weather_query, conn)
-    df_weather['target_date'] = pd.to_datetime(df_weather['target_date']).dt.date
-    
-    # 2. Alle Reservierungen (für reservations_count, people, avg_size)
-    # Wir summieren alles, was NICHT Walk-In ist, als "Reservierung"
-    booking_query = f"""
-        SELECT 
-            DATE(booking_date) as target_date,
-            COUNT(*) as reservations_count,
-            SUM(people) as reservations_people,
-            AVG(people) as avg_reservation_size
-        FROM bookings
-        WHERE booking_date >= '{history_start}' 
-          AND booking_date <= '{forecast_end} 23:59:59'
-          AND cancelled = false 
-          AND no_show = false
-          AND walk_in = false
-        GROUP BY DATE(booking_date)
-    """
-    df_bookings = pd.read_sql(booking_query, conn)
-    df_bookings['target_date'] = pd.to_datetime(df_bookings['target_date']).dt.date
-
-    # 3. Walk-Ins (Nur Historie, für walkin_7d_avg)
-    walkin_query = f"""
-        SELECT 
-            DATE(booking_date) as target_date,
-            SUM(people) as walkin_people
-        FROM bookings
-        WHERE booking_date >= '{history_start}' 
-          AND booking_date < '{today}' -- Nur Vergangenheit
-          AND walk_in = true
-          AND cancelled = false
-        GROUP BY DATE(booking_date)
-    """
-    df_walkins = pd.read_sql(walkin_query, conn)
-    df_walkins['target_date'] = pd.to_datetime(df_walkins['target_date']).dt.date
+    # Feiertags-/Ferien-Flags liegen materialisiert in calendar_features (fehlende Jahre werden erzeugt)
+    ensure_calendar_table(history_start, forecast_end)
 
-    # 4. Merging
-    # Wir erstellen ein Basis-Datumsgerüst
-    all_dates = pd.date_range(start=history_start, end=forecast_end).date
-    df_base = pd.DataFrame({'target_date': all_dates})
-    
-    df = pd.merge(df_base, df_weather, on='target_date', how='left')
-    df = pd.merge(df, df_bookings, on='target_date', how='left')
-    df = pd.merge(df, df_walkins, on='target_date', how='left')
-    
-    # Fill NAs
-    df['reservations_count'] = df['reservations_count'].fillna(0)
-    df['reservations_people'] = df['reservations_people'].fillna(0)
-    df['walkin_people'] = df['walkin_people'].fillna(0)
-    
-    # Avg Reservation Size: Wenn 0 Reservierungen, nehmen wir den Durchschnitt der Spalte oder 0
-    # Besser: 0, da keine Resos
-    df['avg_reservation_size'] = df['avg_reservation_size'].fillna(0)
+    # Ein Round-Trip: Kalender + Wetter + Reservierungen/Walk-Ins (siehe src/queries.py),
+    # Buchungs-NAs sind dort schon mit 0 gefüllt
+    df = run_query("prediction_base", {'start': history_start, 'end': forecast_end, 'today': today}, conn=conn)
+    if df.empty:
+        return df
+
+    return fill_missing_weather(df)
 
-    # Wetter-NAs füllen (falls Forecasts fehlen)
-    df['temperature_2m_max'] = df['temperature_2m_max'].fillna(method='ffill').fillna(15)
-    df['temperature_2m_min'] = df['temperature_2m_min'].fillna(method='ffill').fillna(10)
+def fill_missing_weather(df):
+    """Wetter-NAs füllen (falls Forecasts fehlen) - auch vom Backtest genutzt"""
+    df['temperature_2m_max'] = df['temperature_2m_max'].ffill().fillna(15)
+    df['temperature_2m_min'] = df['temperature_2m_min'].ffill().fillna(10)
     df['precipitation_sum'] = df['precipitation_sum'].fillna(0)
     df['sunshine_duration'] = df['sunshine_duration'].fillna(0)
     df['wind_speed_10m_max'] = df['wind_speed_10m_max'].fillna(10)
@@ -145,143 +105,208 @@ def calculate_weather_score(row):
     
     return max(1, min(5, round(score)))
 
-def feature_engineering(df):
-    """
-    Erstellt ALLE Features, die das Ridge-Modell erwartet.
+def weather_score(temp, rain, clouds):
+    """Vektorisierte Variante von calculate_weather_score (gleiche Regeln, gleiche Rundung)"""
+    temp = np.asarray(temp, dtype=float)
+    rain = np.asarray(rain, dtype=float)
+    clouds = np.asarray(clouds, dtype=float)
+    
+    score = np.full(temp.shape, 3.0)
+    # Temperatur
+    score += np.select([(temp >= 20) & (temp <= 26), (temp < 10) | (temp > 32)], [1.0, -1.0], 0.0)
+    # Regen
+    score -= (rain > 5).astype(float) + (rain > 15).astype(float)
+    score += np.where(rain == 0, 0.5, 0.0)
+    # Sonne/Wolken
+    score += np.where(clouds < 30, 0.5, 0.0) - np.where(clouds > 80, 0.5, 0.0)
+    
+    # np.round rundet wie round() auf die gerade Zahl (2.5 → 2)
+    return np.clip(np.round(score), 1, 5).astype(int)
+
+# Rohspalten aus weather_forecasts, aus denen weather_features alles Wetterabhängige ableitet
+WEATHER_INPUT_COLUMNS = (
+    'temperature_2m_max', 'temperature_2m_min', 'precipitation_sum',
+    'sunshine_duration', 'wind_speed_10m_max', 'cloud_cover_mean'
+)
+
+def weather_features(weather, reservations, is_weekend):
     """
-    logger.info("Führe Feature Engineering durch...")
+    Alle wetterabhängigen Features aus den Rohspalten (WEATHER_INPUT_COLUMNS).
+    Gemeinsam genutzt von feature_engineering und den Szenarien (src/scenarios.py).
     
-    # Datums-Konvertierung
-    df['target_date'] = pd.to_datetime(df['target_date'])
+    Args:
+        weather: DataFrame oder dict mit WEATHER_INPUT_COLUMNS (gleich lange Arrays)
+        reservations: reservations_people pro Zeile
+        is_weekend: 0/1 pro Zeile
+    """
+    temp_max = np.asarray(weather['temperature_2m_max'], dtype=float)
+    temp_min = np.asarray(weather['temperature_2m_min'], dtype=float)
+    precipitation = np.asarray(weather['precipitation_sum'], dtype=float)
+    sunshine = np.asarray(weather['sunshine_duration'], dtype=float)
+    windspeed = np.asarray(weather['wind_speed_10m_max'], dtype=float)
+    clouds = np.asarray(weather['cloud_cover_mean'], dtype=float)
     
-    # --- 1. Renaming & Basic Weather ---
+    f = {}
     # Modell erwartet spezifische Namen
-    df['temp_max'] = df['temperature_2m_max']
-    df['temp_min'] = df['temperature_2m_min']
-    df['windspeed_max'] = df['wind_speed_10m_max']
-    df['cloudcover_mean'] = df['cloud_cover_mean']
+    f['temp_max'] = temp_max
+    f['temp_min'] = temp_min
+    f['windspeed_max'] = windspeed
+    f['cloudcover_mean'] = clouds
     
     # Approximationen für fehlende DB-Spalten
     # Humidity ist nicht im Forecast Table -> Setze Standardwert Kiel (ca 75%)
-    df['humidity'] = 75.0 
+    f['humidity'] = 75.0 
     # Precipitation Hours ist nicht im Forecast Table -> Schätzung aus Summe (grob)
     # Wenn Regen > 0, nehmen wir an es regnet ein paar Stunden. (Summe / 2 mm/h)
-    df['precipitation_hours'] = df['precipitation_sum'].apply(lambda x: min(24.0, x * 2.0) if x > 0 else 0)
+    f['precipitation_hours'] = np.where(precipitation > 0, np.minimum(24.0, precipitation * 2.0), 0.0)
 
-    # --- 2. Rolling Averages ---
+    # Wetter Advanced
+    f['weather_score'] = weather_score(temp_max, precipitation, clouds)
+    # Cozy: Kalt und Regen oder Windig
+    f['is_cozy_weather'] = ((temp_max < 10) & (precipitation > 2)).astype(int)
+    # Tourist: Warm und Sonnig
+    f['is_tourist_weather'] = ((temp_max > 20) & (sunshine > 5)).astype(int)
+    
+    # Squares
+    squares = {
+        'temp_max': temp_max,
+        'temp_min': temp_min,
+        'precipitation_sum': precipitation,
+        'precipitation_hours': f['precipitation_hours'],
+        'humidity': 75.0,
+        'sunshine_duration': sunshine,
+        'windspeed_max': windspeed,
+        'cloudcover_mean': clouds
+    }
+    for col, values in squares.items():
+        f[f'{col}_sq'] = np.square(values)
+
+    # Interaktionen
+    reservations = np.asarray(reservations)
+    f['temp_x_weekend'] = temp_max * is_weekend
+    f['reservations_x_weekend'] = reservations * is_weekend
+    f['reservations_x_temp'] = reservations * temp_max
+    f['rain_x_clouds'] = precipitation * clouds
+    return f
+
+def feature_engineering(df, future_only=True, today=None):
+    """
+    Erstellt ALLE Features, die das Ridge-Modell erwartet.
+    future_only=False liefert auch die Historien-Tage (Feature Store / Training).
+    today: Stichtag Vergangenheit/Zukunft (Default: heute; der Backtest setzt den Prognose-Ursprung).
+    Vektorisiert: alle Features werden als Arrays gesammelt und in einem Schritt angehängt
+    (Gleichheitstest gegen die alte apply-Variante: python src/benchmark.py features)
+    """
+    logger.info("Führe Feature Engineering durch...")
+    
+    # Datums-Konvertierung
+    df['target_date'] = pd.to_datetime(df['target_date'])
     # Wir haben Daten von T-14. Wir berechnen Rolling auf dem ganzen DF.
     df = df.sort_values('target_date')
     
+    # Kalender-Flags: aus dem SQL-Join (calendar_features), sonst per Array-Index aus dem Prozess-Cache
+    calendar_cols = [col for col in CALENDAR_FEATURE_COLUMNS if col in df.columns]
+    if len(calendar_cols) == len(CALENDAR_FEATURE_COLUMNS) and not df[calendar_cols].isna().any().any():
+        calendar = {col: df[col].to_numpy(dtype=int) for col in CALENDAR_FEATURE_COLUMNS}
+    else:
+        calendar = lookup_calendar(df['target_date'].to_numpy())
+    df = df.drop(columns=calendar_cols)
+    
+    f = {}
+    weekday = df['target_date'].dt.weekday.to_numpy()
+    month = df['target_date'].dt.month.to_numpy()
+    is_weekend = (weekday >= 5).astype(int)
+    weather = weather_features(df, df['reservations_people'].to_numpy(), is_weekend)
+    
+    # --- 1. Renaming & Basic Weather ---
+    for col in ('temp_max', 'temp_min', 'windspeed_max', 'cloudcover_mean', 'humidity', 'precipitation_hours'):
+        f[col] = weather[col]
+
+    # --- 2. Rolling Averages ---
     # reservations_7d_avg (Durchschnitt der reservierten Personen letzte 7 Tage)
-    df['reservations_7d_avg'] = df['reservations_people'].rolling(window=7, min_periods=1).mean()
+    f['reservations_7d_avg'] = df['reservations_people'].rolling(window=7, min_periods=1).mean()
     
     # walkin_7d_avg (Durchschnitt der Walkins letzte 7 Tage - ACHTUNG: Für Zukunft unbekannt)
     # Für die Zukunftstage müssen wir den *letzten bekannten* Wert nehmen (Shift).
     # Da wir walkin_people für Zukunft = 0 haben, würde der Rolling Average abstürzen.
     # Strategie: Wir berechnen den Rolling Average, und füllen Nullen in der Zukunft 
     # mit dem letzten gültigen Wert auf (ffill).
-    df['walkin_7d_avg_raw'] = df['walkin_people'].rolling(window=7, min_periods=1).mean()
     # Maskiere Zukunftswerte (wo walkin_people 0 ist, weil es Zukunft ist - grobe Logik)
-    today = pd.Timestamp(datetime.now().date())
-    df.loc[df['target_date'] >= today, 'walkin_7d_avg_raw'] = np.nan
-    df['walkin_7d_avg'] = df['walkin_7d_avg_raw'].ffill()
-    
+    today = pd.Timestamp(today or datetime.now().date())
+    is_future = (df['target_date'] >= today).to_numpy()
+    walkin_avg = df['walkin_people'].rolling(window=7, min_periods=1).mean().mask(is_future)
+    f['walkin_7d_avg_raw'] = walkin_avg
     # Fallback für ganz am Anfang
-    df['walkin_7d_avg'] = df['walkin_7d_avg'].fillna(0)
+    f['walkin_7d_avg'] = walkin_avg.ffill().fillna(0)
 
     # --- 3. Zeitfeatures ---
-    df['weekday'] = df['target_date'].dt.weekday
-    df['month'] = df['target_date'].dt.month
-    df['is_weekend'] = df['weekday'].apply(lambda x: 1 if x >= 5 else 0)
+    f['weekday'] = weekday
+    f['month'] = month
+    f['is_weekend'] = is_weekend
     
-    df['month_sin'] = np.sin((df['month'] - 1) * (2. * np.pi / 12))
-    df['month_cos'] = np.cos((df['month'] - 1) * (2. * np.pi / 12))
+    f['month_sin'] = np.sin((month - 1) * (2. * np.pi / 12))
+    f['month_cos'] = np.cos((month - 1) * (2. * np.pi / 12))
     
     # One-Hot Encoding für Weekdays (wd_1 bis wd_6, wd_0 ist Referenz/Drop)
     for i in range(1, 7):
-        df[f'wd_{i}'] = (df['weekday'] == i).astype(int)
+        f[f'wd_{i}'] = (weekday == i).astype(int)
 
-    # --- 4. Holidays (DE, SH, HH, DK) ---
-    holidays_de = holidays.DE()
-    holidays_sh = holidays.DE(subdiv='SH')
-    holidays_hh = holidays.DE(subdiv='HH')
-    holidays_dk = holidays.DK()
-    
-    df['is_holiday_de'] = df['target_date'].apply(lambda x: 1 if x in holidays_de else 0)
-    df['is_holiday_sh'] = df['target_date'].apply(lambda x: 1 if x in holidays_sh else 0)
-    df['is_holiday_hh'] = df['target_date'].apply(lambda x: 1 if x in holidays_hh else 0)
-    df['is_holiday_dk'] = df['target_date'].apply(lambda x: 1 if x in holidays_dk else 0)
-    
-    # Ferien (Schulferien) - schwer exakt zu haben ohne extra Lib/API.
-    # Setze Platzhalter 0 oder einfache Sommer/Winter-Logik
-    # TODO: Echte Ferien-API anbinden.
-    df['is_ferien_sh'] = 0 
-    df['is_ferien_hh'] = 0
-    
-    # Brückentage
-    # Einfache Logik: Wenn morgen Feiertag (Do->Fr frei) oder gestern Feiertag (Mo->Di frei)
-    df['next_day_holiday'] = df['is_holiday_sh'].shift(-1).fillna(0)
-    df['prev_day_holiday'] = df['is_holiday_sh'].shift(1).fillna(0)
-    
-    # Bridge Day: Heute ist Montag (0) UND gestern war Holiday? Nein.
-    # Bridge Day klassisch: Heute ist Freitag (4) und Donnerstag war Holiday.
-    # Oder Heute ist Montag (0) und Dienstag ist Holiday.
-    df['bridge_day'] = 0
-    df.loc[(df['weekday'] == 4) & (df['prev_day_holiday'] == 1), 'bridge_day'] = 1
-    df.loc[(df['weekday'] == 0) & (df['next_day_holiday'] == 1), 'bridge_day'] = 1
-    
-    df['day_before_holiday'] = df['next_day_holiday']
-    df['day_after_holiday'] = df['prev_day_holiday']
+    # --- 4. Holidays (DE, SH, HH, DK), Schulferien SH/HH, Brückentage ---
+    # Siehe src/calendar_features.py (Schulferien aus config/school_holidays.json)
+    for col in CALENDAR_FEATURE_COLUMNS:
+        f[col] = calendar[col]
 
-    # --- 5. Wetter Advanced & Squares ---
-    df['weather_score'] = df.apply(calculate_weather_score, axis=1)
-    
-    # Cozy: Kalt und Regen oder Windig
-    df['is_cozy_weather'] = ((df['temp_max'] < 10) & (df['precipitation_sum'] > 2)).astype(int)
-    # Tourist: Warm und Sonnig
-    df['is_tourist_weather'] = ((df['temp_max'] > 20) & (df['sunshine_duration'] > 5)).astype(int)
-    
-    # Squares
-    features_to_square = [
-        'temp_max', 'temp_min', 'precipitation_sum', 'precipitation_hours',
-        'humidity', 'sunshine_duration', 'windspeed_max', 'cloudcover_mean'
-    ]
-    for col in features_to_square:
-        df[f'{col}_sq'] = df[col] ** 2
-
-    # --- 6. Interaktionen ---
-    df['temp_x_weekend'] = df['temp_max'] * df['is_weekend']
-    df['reservations_x_weekend'] = df['reservations_people'] * df['is_weekend']
-    df['reservations_x_temp'] = df['reservations_people'] * df['temp_max']
-    df['rain_x_clouds'] = df['precipitation_sum'] * df['cloudcover_mean']
+    # --- 5./6. Wetter Advanced, Squares & Interaktionen (siehe weather_features) ---
+    for col, values in weather.items():
+        f.setdefault(col, values)
+
+    # Ein einziger concat statt ~50 Spalten-Inserts
+    df = pd.concat([df, pd.DataFrame(f, index=df.index)], axis=1)
+
+    if not future_only:
+        return df
 
     # --- Final: Filter auf ZUKUNFT (oder ab Heute) ---
     # Wir haben Historie mitgeschleppt für Rolling Avgs, brauchen aber nur Predictions ab heute
-    df_future = df[df['target_date'] >= today].copy()
+    df_future = df[is_future].copy()
     
     return df_future
 
 def save_predictions(conn, df_results, model_name="ridge_v1"):
-    """Schreibt die Vorhersagen per Upsert in die Datenbank."""
+    """Schreibt die Vorhersagen (inkl. p10/p50/p90 Bänder, falls vorhanden) per Upsert in die Datenbank."""
     logger.info(f"Speichere {len(df_results)} Vorhersagen in DB...")
     
-    data_tuples = []
-    for _, row in df_results.iterrows():
-        data_tuples.append((
-            row['target_date'],
-            float(row['pred_walkins']),
-            model_name
-        ))
+    def band(values):
+        return [None if np.isnan(v) else float(v) for v in values]
+    
+    n = len(df_results)
+    nan = np.full(n, np.nan)
+    data_tuples = list(zip(
+        pd.to_datetime(df_results['target_date']).dt.date,
+        df_results['pred_walkins'].astype(float),
+        [model_name] * n,
+        df_results['horizon_days'].astype(int) if 'horizon_days' in df_results else [None] * n,
+        *(band(df_results[col].to_numpy(dtype=float) if col in df_results else nan)
+          for col in ('pred_p10', 'pred_p50', 'pred_p90'))
+    ))
     
     query = """
-        INSERT INTO walkin_forecast (target_date, pred_walkins, model_name)
+        INSERT INTO walkin_forecast (target_date, pred_walkins, model_name, horizon_days, pred_p10, pred_p50, pred_p90)
         VALUES %s
         ON CONFLICT (target_date, model_name)
         DO UPDATE SET
             pred_walkins = EXCLUDED.pred_walkins,
+            horizon_days = EXCLUDED.horizon_days,
+            pred_p10 = EXCLUDED.pred_p10,
+            pred_p50 = EXCLUDED.pred_p50,
+            pred_p90 = EXCLUDED.pred_p90,
             run_at = NOW();
     """
     
+    # Band-Spalten einmalig anlegen (kein ALTER TABLE pro Lauf)
+    if not ensure_forecast_band_columns():
+        raise RuntimeError("walkin_forecast ohne Band-Spalten - Migration fehlgeschlagen")
+
     try:
         with conn.cursor() as cur:
             execute_values(cur, query, data_tuples)
@@ -296,9 +321,7 @@ def main():
     conn = None
     try:
         # 1. Modell laden
-        artifact = load_model_artifact(MODEL_PATH)
-        model = artifact["model"]
-        feature_cols = artifact["feature_cols"]
+        predict, feature_cols = load_predictor()
         
         # 2. DB Verbindung
         conn = get_db_connection()
@@ -306,14 +329,24 @@ def main():
             raise ConnectionError("Konnte keine Verbindung zur Datenbank herstellen")
 
         # 3. Rohdaten holen (Wetter + Bookings)
-        df = get_data_for_prediction(conn, days_ahead=16)
+        df = get_data_for_prediction(conn, days_ahead=FORECAST_HORIZON_DAYS)
         
         if df.empty:
             logger.warning("Keine Daten für Vorhersage gefunden.")
             return
 
-        # 4. Feature Engineering
-        df_features = feature_engineering(df)
+        # 4. Feature Engineering: nur geänderte Tage neu berechnen, Matrix aus dem Feature Store lesen
+        today = datetime.now().date()
+        store = update_feature_store(df, feature_engineering)
+        df_features = pd.DataFrame()
+        if store['written'] is not None and store['written'] >= store['changed']:
+            # Nur Vektoren zu den Eingaben dieses Laufs (kein Stand von vorher nach einem Schreibfehler)
+            df_features = load_feature_matrix(
+                today, today + timedelta(days=FORECAST_HORIZON_DAYS), conn=conn, expected_hashes=store['hashes']
+            )
+        if len(df_features) != int((pd.to_datetime(df['target_date']) >= pd.Timestamp(today)).sum()):
+            logger.warning("⚠️ Feature Store nicht aktuell - berechne Features direkt")
+            df_features = feature_engineering(df)
         
         # 5. Spaltenauswahl & Vorhersage
         # Sicherstellen, dass alle Spalten da sind
@@ -326,11 +359,25 @@ def main():
         X_pred = df_features[feature_cols]
 
         logger.info("Berechne Vorhersagen...")
-        preds = model.predict(X_pred)
+        preds = predict(X_pred)
         df_features['pred_walkins'] = np.maximum(0, np.round(preds)) # Keine negativen Walkins, runden
         
+        # Unsicherheit: Residuen-Quantile je Prognosehorizont (aus dem Backtest), für alle Tage auf einmal
+        df_features['horizon_days'] = (pd.to_datetime(df_features['target_date']) - pd.Timestamp(today)).dt.days
+        residuals = load_residuals()
+        if residuals is not None:
+            # Gleiche Basis wie die Residuen im Backtest: gerundete, auf 0 begrenzte Punktprognose
+            bands = prediction_bands(
+                df_features['pred_walkins'].to_numpy(), df_features['horizon_days'].to_numpy(), residuals
+            )
+            df_features['pred_p10'], df_features['pred_p50'], df_features['pred_p90'] = bands.T
+        else:
+            logger.warning(f"⚠️ Keine Residuen-Matrix ({MODEL_CONFIG['residuals_path']}) - speichere Vorhersagen ohne Bänder")
+        
         # 6. Speichern
         save_predictions(conn, df_features, model_name="ridge_v1")
+        logger.info(f"⏱️ Query-Timings: {get_query_stats()}")
+        logger.info(f"📦 Modell-Cache: {get_model_stats()}")
         
     except Exception as e:
         logger.error(f"Kritischer Fehler im Skript: {e}")
@@ -0,0 +1,97 @@
+"""
+Prediction Intervals - p10/p50/p90 walk-in bands from historical residuals per forecast horizon
+The residual matrix (horizon × samples, actual - predicted, NaN-padded) comes from a
+backtest; quantiles are taken once per horizon and applied to all predictions by index.
+"""
+import sys
+import os
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from config.settings import MODEL_CONFIG
+from src.model_registry import load_model
+
+logger = logging.getLogger("prediction-intervals")
+
+QUANTILES = (0.1, 0.5, 0.9)
+
+# Weniger Residuen pro Horizont → kein Band (statt einer Scheingenauigkeit)
+MIN_RESIDUALS = 10
+
+
+class ResidualMatrix:
+    """Residuals by forecast horizon: row h holds the residuals of forecasts made h days ahead"""
+
+    def __init__(self, horizons, residuals):
+        self.horizons = np.asarray(horizons, dtype=np.int64)
+        self.residuals = np.asarray(residuals, dtype=np.float64)
+        if self.residuals.ndim != 2 or self.residuals.shape[0] != len(self.horizons):
+            raise ValueError(f"residuals must be (horizons, samples), got {self.residuals.shape}")
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.savez(f, horizons=self.horizons, residuals=self.residuals)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['horizons'], data['residuals'])
+
+    @classmethod
+    def from_pairs(cls, horizons, residuals, max_horizon=None):
+        """Build the NaN-padded matrix from flat (horizon, residual) pairs"""
+        horizons = np.asarray(horizons, dtype=np.int64)
+        residuals = np.asarray(residuals, dtype=np.float64)
+        max_horizon = int(horizons.max()) if max_horizon is None else max_horizon
+        keep = (horizons >= 0) & (horizons <= max_horizon) & ~np.isnan(residuals)
+        horizons, residuals = horizons[keep], residuals[keep]
+
+        counts = np.bincount(horizons, minlength=max_horizon + 1)
+        matrix = np.full((max_horizon + 1, max(1, counts.max(initial=0))), np.nan)
+        # Position innerhalb der Zeile: laufender Zähler je Horizont
+        order = np.argsort(horizons, kind='stable')
+        sorted_h = horizons[order]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        matrix[sorted_h, np.arange(len(sorted_h)) - starts[sorted_h]] = residuals[order]
+        return cls(np.arange(max_horizon + 1), matrix)
+
+    def quantile_table(self, quantiles=QUANTILES):
+        """(len(quantiles), horizons) residual quantiles, NaN for horizons with < MIN_RESIDUALS"""
+        counts = np.sum(~np.isnan(self.residuals), axis=1)
+        table = np.full((len(quantiles), len(self.horizons)), np.nan)
+        enough = counts >= MIN_RESIDUALS
+        if enough.any():
+            table[:, enough] = np.nanquantile(self.residuals[enough], quantiles, axis=1)
+        return table
+
+
+def load_residuals(path=None):
+    """Cached ResidualMatrix (reloaded when the file changes), None if no backtest ran yet"""
+    path = path or MODEL_CONFIG['residuals_path']
+    if not os.path.exists(path):
+        return None
+    return load_model(path, loader=ResidualMatrix.load)
+
+
+def prediction_bands(preds, horizons, residual_matrix, quantiles=QUANTILES):
+    """
+    Quantile bands for many predictions at once
+
+    Args:
+        preds: point predictions (n,) as stored in pred_walkins (rounded, >= 0 - the basis of the residuals)
+        horizons: forecast horizon in days per prediction (n,); beyond the matrix the last horizon is used
+        residual_matrix: ResidualMatrix
+        quantiles: band quantiles
+
+    Returns:
+        np.ndarray: (n, len(quantiles)) walk-ins, rounded and >= 0; NaN where no residuals exist
+    """
+    preds = np.asarray(preds, dtype=np.float64)
+    table = residual_matrix.quantile_table(quantiles)
+    index = np.searchsorted(residual_matrix.horizons, np.clip(horizons, residual_matrix.horizons[0], residual_matrix.horizons[-1]))
+    bands = preds[:, None] + table[:, index].T
+    # Bänder monoton halten (p10 ≤ p50 ≤ p90), auch nach Clipping auf 0
+    return np.maximum(0.0, np.round(np.sort(bands, axis=1))) + 0.0  # + 0.0: kein -0
@@ -0,0 +1,392 @@
+"""
+Query Registry - named, parameterized read queries with plan reuse and timing
+Every query is PREPAREd once per pooled connection and EXECUTEd with bound
+parameters afterwards; results go straight from the cursor into a DataFrame
+(or through COPY ... TO STDOUT for large result sets).
+"""
+import sys
+import os
+import io
+import re
+import logging
+import threading
+import time
+import weakref
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import psycopg2
+from psycopg2 import errors, extensions
+
+from src.database import CALENDAR_FEATURE_COLUMNS, PoolTimeout, db_connection
+
+logger = logging.getLogger("queries")
+
+_PARAM_PATTERN = re.compile(r"%\((\w+)\)s")
+
+_queries = {}
+_prepared = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+class Query:
+    """A registered query: SQL with %(name)s parameters plus its PREPARE form"""
+
+    def __init__(self, name, sql, parse_dates=()):
+        self.name = name
+        self.sql = sql
+        self.parse_dates = tuple(parse_dates)
+        self.param_names = []
+        for param in _PARAM_PATTERN.findall(sql):
+            if param not in self.param_names:
+                self.param_names.append(param)
+        self.statement = f"q_{name}"
+        self.prepare_sql = _PARAM_PATTERN.sub(
+            lambda m: f"${self.param_names.index(m.group(1)) + 1}", sql
+        )
+
+    def positional(self, params):
+        missing = [p for p in self.param_names if p not in (params or {})]
+        if missing:
+            raise KeyError(f"Query {self.name} is missing parameters: {missing}")
+        return tuple(params[p] for p in self.param_names)
+
+
+def register(name, sql, parse_dates=()):
+    """Add a query to the registry (parse_dates: columns converted to datetime.date)"""
+    query = Query(name, sql, parse_dates)
+    _queries[name] = query
+    return query
+
+
+def get_query(name):
+    return _queries[name]
+
+
+def _raw(conn):
+    return getattr(conn, 'raw_connection', conn)
+
+
+def _ensure_prepared(cursor, conn, query):
+    raw = _raw(conn)
+    with _prepared_lock:
+        done = _prepared.setdefault(raw, set())
+        if query.statement in done:
+            return
+    cursor.execute(f"PREPARE {query.statement} AS {query.prepare_sql}")
+    with _prepared_lock:
+        done.add(query.statement)
+
+
+def _forget_prepared(conn, query):
+    with _prepared_lock:
+        _prepared.get(_raw(conn), set()).discard(query.statement)
+
+
+def _record(name, elapsed, rows):
+    with _stats_lock:
+        s = _stats.setdefault(name, {'calls': 0, 'rows': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+        s['calls'] += 1
+        s['rows'] += rows
+        s['total_seconds'] += elapsed
+        s['max_seconds'] = max(s['max_seconds'], elapsed)
+
+
+def get_query_stats():
+    """Per-query call counts and timings since process start"""
+    with _stats_lock:
+        return {
+            name: {**s, 'avg_seconds': round(s['total_seconds'] / s['calls'], 4) if s['calls'] else 0.0,
+                   'total_seconds': round(s['total_seconds'], 4), 'max_seconds': round(s['max_seconds'], 4)}
+            for name, s in _stats.items()
+        }
+
+
+def _to_frame(query, columns, rows):
+    df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    for col in query.parse_dates:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col]).dt.date
+    return df
+
+
+def _execute_prepared(conn, query, values):
+    with conn.cursor() as cursor:
+        _ensure_prepared(cursor, conn, query)
+        placeholders = ", ".join(["%s"] * len(values))
+        cursor.execute(
+            f"EXECUTE {query.statement}" + (f" ({placeholders})" if values else ""),
+            values
+        )
+        columns = [desc.name for desc in cursor.description]
+        return columns, cursor.fetchall()
+
+
+def _fetch(conn, query, params, owned=True):
+    values = query.positional(params)
+    if not owned:
+        return _fetch_in_savepoint(conn, query, values)
+    try:
+        return _execute_prepared(conn, query, values)
+    except errors.InvalidSqlStatementName:
+        # Session lost the statement (e.g. server-side DISCARD): prepare again once
+        conn.rollback()
+        _forget_prepared(conn, query)
+        return _execute_prepared(conn, query, values)
+
+
+def _fetch_in_savepoint(conn, query, values):
+    """Same retry on a caller's connection, rolled back only to a savepoint (keeps its open work)"""
+    with conn.cursor() as cursor:
+        cursor.execute("SAVEPOINT run_query")
+    try:
+        result = _execute_prepared(conn, query, values)
+    except errors.InvalidSqlStatementName:
+        with conn.cursor() as cursor:
+            cursor.execute("ROLLBACK TO SAVEPOINT run_query")
+        _forget_prepared(conn, query)
+        result = _execute_prepared(conn, query, values)
+    with conn.cursor() as cursor:
+        cursor.execute("RELEASE SAVEPOINT run_query")
+    return result
+
+
+def _fetch_copy(conn, query, params):
+    """COPY (query) TO STDOUT as CSV straight into pandas (parameters inlined by mogrify)"""
+    with conn.cursor() as cursor:
+        sql_text = cursor.mogrify(query.sql, params).decode(extensions.encodings.get(conn.encoding, 'utf-8'))
+        buffer = io.StringIO()
+        cursor.copy_expert(f"COPY ({sql_text}) TO STDOUT WITH (FORMAT csv, HEADER true)", buffer)
+    buffer.seek(0)
+    return pd.read_csv(buffer)
+
+
+def run_query(name, params=None, conn=None, method="prepared"):
+    """
+    Run a registered query and return a DataFrame
+
+    Args:
+        name: registry name
+        params: dict for the %(name)s parameters
+        conn: existing connection (default: one from the pool)
+        method: "prepared" (PREPARE once + EXECUTE) or "copy" (COPY TO CSV, large results)
+
+    Returns:
+        pd.DataFrame
+
+    Raises:
+        psycopg2.Error / PoolTimeout after logging and rolling back - callers decide
+        whether an empty fallback is acceptable (dashboard) or the run must fail (cron)
+    """
+    query = _queries[name]
+    t0 = time.perf_counter()
+
+    try:
+        if conn is None:
+            with db_connection() as pooled:
+                df = _run(pooled, query, params, method)
+        else:
+            df = _run(conn, query, params, method, owned=False)
+    except (psycopg2.Error, PoolTimeout) as e:
+        logger.error(f"Query {name} failed: {e}")
+        if conn is not None:
+            conn.rollback()
+        raise
+
+    elapsed = time.perf_counter() - t0
+    _record(name, elapsed, len(df))
+    logger.debug(f"Query {name}: {len(df)} rows in {elapsed * 1000:.1f} ms")
+    return df
+
+
+def _run(conn, query, params, method, owned=True):
+    if method == "copy":
+        df = _fetch_copy(conn, query, params)
+        for col in query.parse_dates:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col]).dt.date
+    else:
+        columns, rows = _fetch(conn, query, params, owned)
+        df = _to_frame(query, columns, rows)
+    conn.commit()
+    return df
+
+
+# ---------------------------------------------------------------------------
+# Registered queries
+# ---------------------------------------------------------------------------
+
+# Komplette Datenbasis für predict_walkins in einem Round-Trip:
+# Kalender (generate_series) LEFT JOIN neuestes Wetter + ein Bookings-Scan mit
+# bedingten Aggregaten (Reservierungen vs. vergangene Walk-Ins) + Feiertags-/Ferien-Flags
+register("prediction_base", """
+    WITH calendar AS (
+        SELECT d::date AS target_date
+        FROM generate_series(%(start)s::date, %(end)s::date, INTERVAL '1 day') AS d
+    ),
+    weather AS (
+        SELECT DISTINCT ON (forecast_date)
+            forecast_date,
+            temperature_2m_max,
+            temperature_2m_min,
+            precipitation_sum,
+            sunshine_duration,
+            wind_speed_10m_max,
+            cloud_cover_mean,
+            weathercode
+        FROM weather_forecasts
+        WHERE forecast_date BETWEEN %(start)s::date AND %(end)s::date
+        ORDER BY forecast_date, forecast_created_at DESC
+    ),
+    booking_days AS (
+        SELECT
+            DATE(booking_date) AS day,
+            COUNT(*) FILTER (WHERE is_reservation) AS reservations_count,
+            SUM(people) FILTER (WHERE is_reservation) AS reservations_people,
+            AVG(people) FILTER (WHERE is_reservation) AS avg_reservation_size,
+            SUM(people) FILTER (WHERE is_past_walkin) AS walkin_people
+        FROM (
+            SELECT
+                booking_date,
+                people,
+                (cancelled = false AND no_show = false AND walk_in = false) AS is_reservation,
+                (walk_in = true AND cancelled = false AND booking_date < %(today)s::date) AS is_past_walkin
+            FROM bookings
+            WHERE booking_date >= %(start)s::date
+              AND booking_date < %(end)s::date + 1
+        ) b
+        GROUP BY DATE(booking_date)
+    )
+    SELECT
+        c.target_date,
+        w.temperature_2m_max,
+        w.temperature_2m_min,
+        w.precipitation_sum,
+        w.sunshine_duration,
+        w.wind_speed_10m_max,
+        w.cloud_cover_mean,
+        w.weathercode,
+        COALESCE(b.reservations_count, 0) AS reservations_count,
+        COALESCE(b.reservations_people, 0) AS reservations_people,
+        COALESCE(b.avg_reservation_size, 0) AS avg_reservation_size,
+        COALESCE(b.walkin_people, 0) AS walkin_people,
+        """ + ",\n        ".join(f"cf.{col}" for col in CALENDAR_FEATURE_COLUMNS) + """
+    FROM calendar c
+    LEFT JOIN weather w ON w.forecast_date = c.target_date
+    LEFT JOIN booking_days b ON b.day = c.target_date
+    LEFT JOIN calendar_features cf ON cf.date = c.target_date
+    ORDER BY c.target_date
+""", parse_dates=("target_date",))
+
+register("forecast_view", """
+    WITH
+    -- 1. Vorhersagen (Neueste Version pro Tag)
+    forecasts AS (
+        SELECT target_date, pred_walkins, pred_p10, pred_p90, model_name
+        FROM walkin_forecast
+        WHERE target_date BETWEEN %(start)s::date AND %(end)s::date
+    ),
+    -- 2. Reservierungen (Summiert pro Tag), Walk-Ins zählen nicht doppelt
+    res_data AS (
+        SELECT
+            DATE(booking_date) as date,
+            COUNT(*) as res_count,
+            SUM(people) as res_people
+        FROM bookings
+        WHERE booking_date >= %(start)s::date
+          AND booking_date < %(end)s::date + 1
+          AND cancelled = false
+          AND no_show = false
+          AND walk_in = false
+        GROUP BY DATE(booking_date)
+    ),
+    -- 3. Wetter (Neueste Vorhersage pro Tag)
+    weather AS (
+        SELECT DISTINCT ON (forecast_date)
+            forecast_date,
+            temperature_2m_max as temp_max,
+            precipitation_sum as rain,
+            sunshine_duration as sun,
+            weathercode
+        FROM weather_forecasts
+        WHERE forecast_date BETWEEN %(start)s::date AND %(end)s::date
+        ORDER BY forecast_date, forecast_created_at DESC
+    )
+    SELECT
+        w.forecast_date as datum,
+        COALESCE(f.pred_walkins, 0) as walkins_pred,
+        f.pred_p10 as walkins_p10,
+        f.pred_p90 as walkins_p90,
+        COALESCE(r.res_people, 0) as reservations,
+        COALESCE(r.res_count, 0) as res_count,
+        COALESCE(w.temp_max, 0) as temp,
+        COALESCE(w.rain, 0) as rain,
+        COALESCE(w.sun, 0) / 3600.0 as sun_hours,
+        w.weathercode
+    FROM weather w
+    LEFT JOIN forecasts f ON w.forecast_date = f.target_date
+    LEFT JOIN res_data r ON w.forecast_date = r.date
+    ORDER BY w.forecast_date ASC
+""", parse_dates=("datum",))
+
+# Fertige Feature-Matrix aus dem Feature Store (Spaltennamen: walkin_feature_sets)
+register("feature_matrix", """
+    SELECT target_date, input_hash, features
+    FROM walkin_features
+    WHERE feature_version = %(version)s
+      AND target_date BETWEEN %(start)s::date AND %(end)s::date
+    ORDER BY target_date
+""", parse_dates=("target_date",))
+
+# Backtest (src/backtest.py): alle Vorhersage-Stände, Buchungs-Snapshots und tägliche Ist-Werte
+# für einen Zeitraum - einmal geladen und von allen Origins gemeinsam genutzt
+register("backtest_weather", """
+    SELECT
+        forecast_created_at,
+        forecast_date,
+        temperature_2m_max,
+        temperature_2m_min,
+        precipitation_sum,
+        sunshine_duration,
+        wind_speed_10m_max,
+        cloud_cover_mean,
+        weathercode
+    FROM weather_forecasts
+    WHERE forecast_created_at <= %(end)s::date
+      AND forecast_date BETWEEN %(history_start)s::date AND %(forecast_end)s::date
+    ORDER BY forecast_date, forecast_created_at
+""", parse_dates=("forecast_created_at", "forecast_date"))
+
+register("backtest_snapshots", """
+    SELECT
+        snapshot_created_at,
+        forecast_date,
+        bestaetigt_personen - walk_in_personen AS reservations_people
+    FROM booking_snapshots
+    WHERE snapshot_created_at BETWEEN %(start)s::date AND %(end)s::date
+    ORDER BY snapshot_created_at, forecast_date
+""", parse_dates=("snapshot_created_at", "forecast_date"))
+
+register("backtest_actuals", """
+    SELECT
+        DATE(booking_date) AS day,
+        COUNT(*) FILTER (WHERE is_reservation) AS reservations_count,
+        COALESCE(SUM(people) FILTER (WHERE is_reservation), 0) AS reservations_people,
+        COALESCE(AVG(people) FILTER (WHERE is_reservation), 0) AS avg_reservation_size,
+        COALESCE(SUM(people) FILTER (WHERE is_walkin), 0) AS walkin_people
+    FROM (
+        SELECT
+            booking_date,
+            people,
+            (cancelled = false AND no_show = false AND walk_in = false) AS is_reservation,
+            (walk_in = true AND cancelled = false) AS is_walkin
+        FROM bookings
+        WHERE booking_date >= %(history_start)s::date
+          AND booking_date < %(forecast_end)s::date + 1
+    ) b
+    GROUP BY DATE(booking_date)
+    ORDER BY day
+""", parse_dates=("day",))
@@ -0,0 +1,183 @@
+"""
+Ridge Scorer - reduced-form linear model for inference without sklearn
+The exporter folds every preprocessing step of the trained artifact (StandardScaler,
+MinMaxScaler) into one coefficient vector + intercept; scoring is a single dot
+product over a contiguous float64 matrix.
+
+Usage:
+    python src/ridge_scorer.py export [ARTIFACT.pkl] [OUT.npz|OUT.json]
+"""
+import sys
+import os
+import json
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from config.settings import MODEL_CONFIG
+from src.model_registry import file_digest, load_model
+
+logger = logging.getLogger("ridge-scorer")
+
+# Toleranz für den Abgleich gegen model.predict (nur Rundungsunterschiede durch das Falten)
+VERIFY_RTOL = 1e-9
+VERIFY_ATOL = 1e-9
+
+
+class RidgeScorer:
+    """prediction = X[:, feature_cols] @ coef + intercept"""
+
+    def __init__(self, feature_cols, coef, intercept, source_digest=None):
+        self.feature_cols = list(feature_cols)
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.source_digest = source_digest
+        if self.coef.shape != (len(self.feature_cols),):
+            raise ValueError(f"coef has shape {self.coef.shape}, expected ({len(self.feature_cols)},)")
+
+    def predict(self, X):
+        """X: DataFrame with feature_cols (any order, extra columns ignored) or an array in feature_cols order"""
+        if hasattr(X, 'columns'):
+            X = X[self.feature_cols].to_numpy(dtype=np.float64)
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        return X @ self.coef + self.intercept
+
+    def save(self, path):
+        """.json → readable coefficients, anything else → .npz"""
+        if str(path).endswith('.json'):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'feature_cols': self.feature_cols,
+                    'coef': self.coef.tolist(),
+                    'intercept': self.intercept,
+                    'source_digest': self.source_digest
+                }, f, indent=2)
+        else:
+            with open(path, 'wb') as f:
+                np.savez(
+                    f,
+                    feature_cols=np.array(self.feature_cols, dtype=str),
+                    coef=self.coef,
+                    intercept=np.float64(self.intercept),
+                    source_digest=np.array(self.source_digest or '')
+                )
+
+    @classmethod
+    def load(cls, path):
+        if str(path).endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return cls(data['feature_cols'], data['coef'], data['intercept'], data.get('source_digest'))
+
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data['feature_cols'].tolist(), data['coef'], data['intercept'],
+                str(data['source_digest']) or None
+            )
+
+
+def _fold_step(step, coef, intercept):
+    """
+    Fold a preprocessing step into the linear model that follows it:
+    model(transform(x)) = transform(x) @ coef + intercept  →  x @ coef' + intercept'
+    """
+    if step is None or step == 'passthrough':
+        return coef, intercept
+
+    name = type(step).__name__
+    if name == 'StandardScaler':
+        # (x - mean) / scale
+        if getattr(step, 'scale_', None) is not None:
+            coef = coef / step.scale_
+        if getattr(step, 'mean_', None) is not None and step.with_mean:
+            intercept = intercept - step.mean_ @ coef
+        return coef, intercept
+    if name == 'MinMaxScaler' and not getattr(step, 'clip', False):
+        # x * scale + min
+        return coef * step.scale_, intercept + step.min_ @ coef
+
+    raise ValueError(f"Preprocessing step {name} cannot be folded into a linear scorer")
+
+
+def reduce_model(model):
+    """
+    Coefficients + intercept of a (pipeline of scalers +) linear estimator in raw feature space
+
+    Returns:
+        tuple: (coef float64 array, intercept float)
+    """
+    steps = [step for _, step in model.steps] if hasattr(model, 'steps') else [model]
+    estimator = steps[-1]
+    if not hasattr(estimator, 'coef_') or np.ndim(estimator.coef_) != 1:
+        raise ValueError(f"{type(estimator).__name__} is not a single-output linear model")
+
+    coef = np.asarray(estimator.coef_, dtype=np.float64)
+    intercept = float(np.asarray(estimator.intercept_, dtype=np.float64))
+    for step in reversed(steps[:-1]):
+        coef, intercept = _fold_step(step, coef, intercept)
+    return coef, float(intercept)
+
+
+def verify_scorer(model, scorer, X):
+    """Largest absolute difference to model.predict on X; raises if not within tolerance"""
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    expected = model.predict(pd.DataFrame(X, columns=scorer.feature_cols))
+    actual = scorer.predict(X)
+    if not np.allclose(actual, expected, rtol=VERIFY_RTOL, atol=VERIFY_ATOL):
+        raise AssertionError(f"Scorer differs from model.predict by up to {np.max(np.abs(actual - expected)):.3e}")
+    return float(np.max(np.abs(actual - expected))) if len(X) else 0.0
+
+
+def export_scorer(artifact_path=None, out_path=None, X_check=None):
+    """
+    Reduce the trained artifact and write it as .npz/.json
+
+    The reduced scorer is checked against model.predict on X_check (default:
+    256 random rows around the scaler statistics) before anything is written.
+
+    Returns:
+        RidgeScorer
+    """
+    artifact_path = artifact_path or MODEL_CONFIG['path']
+    out_path = out_path or MODEL_CONFIG['scorer_path']
+
+    artifact = load_model(artifact_path)
+    model, feature_cols = artifact['model'], artifact['feature_cols']
+    coef, intercept = reduce_model(model)
+    scorer = RidgeScorer(feature_cols, coef, intercept, source_digest=file_digest(artifact_path))
+
+    if X_check is None:
+        rng = np.random.default_rng(0)
+        first = model.steps[0][1] if hasattr(model, 'steps') else None
+        center = getattr(first, 'mean_', None)
+        spread = getattr(first, 'scale_', None)
+        center = np.zeros(len(feature_cols)) if center is None else center
+        spread = np.ones(len(feature_cols)) if spread is None else spread
+        X_check = center + spread * rng.standard_normal((256, len(feature_cols)))
+
+    max_diff = verify_scorer(model, scorer, X_check)
+    scorer.save(out_path)
+    logger.info(f"✅ Exported {len(feature_cols)} coefficients to {out_path} (max diff vs. predict {max_diff:.2e})")
+    return scorer
+
+
+def load_scorer(path=None):
+    """Cached RidgeScorer (reloaded when the file changes), None if no export exists"""
+    path = path or MODEL_CONFIG['scorer_path']
+    if not os.path.exists(path):
+        return None
+    return load_model(path, loader=RidgeScorer.load)
+
+
+if __name__ == "__main__":
+    from config.logging_config import setup_logging
+    logger = setup_logging("ridge_scorer")
+
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "export":
+        export_scorer(*sys.argv[2:4])
+    else:
+        print(__doc__)
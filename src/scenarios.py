@@ -0,0 +1,126 @@
+"""
+Scenarios - batch what-if walk-in predictions under alternative weather
+All scenario rows are generated as one stacked (scenarios × days, features) array,
+the weather-dependent features are recomputed with weather_features, and the
+whole stack is scored in a single call.
+"""
+import sys
+import os
+import logging
+import time
+from itertools import product
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from src.predict_walkins import WEATHER_INPUT_COLUMNS, weather_features
+
+logger = logging.getLogger("scenarios")
+
+# Ein Szenario: Name + Abweichungen von der Vorhersage (fehlender Schlüssel = unverändert)
+#   temp_delta            °C auf Höchst- und Tiefsttemperatur
+#   precipitation         Regen in mm (überschreibt die Vorhersage)
+#   precipitation_factor  Regen × Faktor
+#   cloud_cover           Bewölkung in % (überschreibt)
+#   sunshine_factor       Sonnenscheindauer × Faktor
+DEFAULT_SCENARIOS = [
+    {'name': 'Prognose'},
+    {'name': '-3°C', 'temp_delta': -3.0},
+    {'name': '+3°C', 'temp_delta': 3.0},
+    {'name': 'Trocken', 'precipitation': 0.0, 'cloud_cover': 20.0, 'sunshine_factor': 1.5},
+    {'name': 'Regen', 'precipitation': 10.0, 'cloud_cover': 90.0, 'sunshine_factor': 0.2}
+]
+
+
+def scenario_grid(temp_deltas=(-3, -2, -1, 0, 1, 2, 3), precipitation=(None, 0.0, 5.0, 15.0)):
+    """Cartesian product of temperature shifts and rain amounts (None = forecast rain)"""
+    scenarios = []
+    for delta, rain in product(temp_deltas, precipitation):
+        scenario = {'name': f"{delta:+g}°C / " + ("Prognose" if rain is None else f"{rain:g} mm")}
+        if delta:
+            scenario['temp_delta'] = float(delta)
+        if rain is not None:
+            scenario['precipitation'] = float(rain)
+        scenarios.append(scenario)
+    return scenarios
+
+
+def _parameter(scenarios, key, default):
+    """Per-scenario column vector (k, 1) of one perturbation, NaN where an override is absent"""
+    return np.array([s.get(key, default) for s in scenarios], dtype=float)[:, None]
+
+
+def perturb_weather(features, scenarios):
+    """
+    Weather inputs for every scenario, stacked scenario-major
+
+    Returns:
+        dict: WEATHER_INPUT_COLUMNS → array of length len(scenarios) * len(features)
+    """
+    base = {col: features[col].to_numpy(dtype=float)[None, :] for col in WEATHER_INPUT_COLUMNS}
+    temp_delta = _parameter(scenarios, 'temp_delta', 0.0)
+    precipitation = _parameter(scenarios, 'precipitation', np.nan)
+    precipitation_factor = _parameter(scenarios, 'precipitation_factor', 1.0)
+    cloud_cover = _parameter(scenarios, 'cloud_cover', np.nan)
+    sunshine_factor = _parameter(scenarios, 'sunshine_factor', 1.0)
+
+    shape = (len(scenarios), len(features))
+    weather = {
+        'temperature_2m_max': base['temperature_2m_max'] + temp_delta,
+        'temperature_2m_min': base['temperature_2m_min'] + temp_delta,
+        'precipitation_sum': np.where(
+            np.isnan(precipitation), base['precipitation_sum'] * precipitation_factor, precipitation
+        ),
+        'sunshine_duration': base['sunshine_duration'] * sunshine_factor,
+        'wind_speed_10m_max': base['wind_speed_10m_max'],
+        'cloud_cover_mean': np.where(np.isnan(cloud_cover), base['cloud_cover_mean'], cloud_cover)
+    }
+    return {col: np.broadcast_to(values, shape).ravel() for col, values in weather.items()}
+
+
+def run_scenarios(features, predict, feature_cols, scenarios=None):
+    """
+    Walk-in predictions for every (day, scenario)
+
+    Args:
+        features: feature frame of the forecast days (feature_engineering / feature store)
+        predict: scoring function over a DataFrame with feature_cols (RidgeScorer.predict or model.predict)
+        feature_cols: model input columns
+        scenarios: list of scenario dicts (default: DEFAULT_SCENARIOS)
+
+    Returns:
+        pd.DataFrame: index target_date, one column per scenario name (rounded, >= 0)
+    """
+    scenarios = scenarios or DEFAULT_SCENARIOS
+    if features.empty:
+        return pd.DataFrame(columns=[s['name'] for s in scenarios])
+
+    t0 = time.perf_counter()
+    n_days, n_scenarios = len(features), len(scenarios)
+
+    # Basismatrix einmal pro Szenario stapeln, dann die wetterabhängigen Spalten überschreiben
+    X = np.tile(features[feature_cols].to_numpy(dtype=float), (n_scenarios, 1))
+    column_index = {col: i for i, col in enumerate(feature_cols)}
+
+    weather = perturb_weather(features, scenarios)
+    derived = weather_features(
+        weather,
+        np.tile(features['reservations_people'].to_numpy(dtype=float), n_scenarios),
+        np.tile(features['is_weekend'].to_numpy(dtype=float), n_scenarios)
+    )
+    for col, values in {**weather, **derived}.items():
+        if col in column_index:
+            X[:, column_index[col]] = values
+
+    preds = np.asarray(predict(pd.DataFrame(X, columns=feature_cols)), dtype=float)
+    cube = np.maximum(0, np.round(preds)).reshape(n_scenarios, n_days).T
+
+    result = pd.DataFrame(
+        cube,
+        index=pd.Index(pd.to_datetime(features['target_date']).dt.date, name='target_date'),
+        columns=[s['name'] for s in scenarios]
+    )
+    logger.debug(f"{n_scenarios} scenarios × {n_days} days scored in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    return result
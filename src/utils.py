@@ -6,29 +6,146 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import json
+import hashlib
+import threading
+import time
 from datetime import datetime
 
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    # Optional: orjson is ~5x faster, the stdlib encoder produces the same compact output
+    orjson = None
+
+# Fields that make up the content hash (fixed order, id excluded)
+HASH_FIELDS = (
+    'booking_date', 'booking_tags_count', 'cancelled', 'end_date', 'host', 'no_show',
+    'payment', 'people', 'rating', 'source', 'tag_ids', 'tracking', 'walk_in'
+)
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls at least 1/rate seconds apart"""
+
+    def __init__(self, rate_per_second):
+        self.interval = 1.0 / rate_per_second if rate_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        """Block until the caller may fire its next request"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
 def unix_to_datetime(unix_ms):
     """Convert Unix milliseconds to datetime"""
     if unix_ms is None:
         return None
     return datetime.fromtimestamp(unix_ms / 1000)
 
+def dumps_json(value):
+    """Compact JSON (orjson if installed), identical output for our API payloads"""
+    if orjson is not None:
+        return orjson.dumps(value).decode('utf-8')
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+_hash_encoder = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+
+def _hash_values(values):
+    payload = _hash_encoder.encode(values)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+def booking_content_hash(booking):
+    """Stable fingerprint of a parsed booking (all fields except the id)"""
+    return _hash_values([
+        booking[key].isoformat(timespec='milliseconds') if isinstance(booking[key], datetime) else booking[key]
+        for key in HASH_FIELDS
+    ])
+
 def parse_booking(raw_booking):
-    """Convert GraphQL booking to PostgreSQL format"""
-    return {
+    """Convert GraphQL booking to PostgreSQL format (incl. content_hash for change detection)"""
+    booking = {
         'id': raw_booking['_id'],
         'booking_date': unix_to_datetime(raw_booking['date']),
         'end_date': unix_to_datetime(raw_booking['endDate']),
-        'people': raw_booking['people'],
+        'people': raw_booking.get('people'),
         'cancelled': raw_booking.get('cancelled') or False,
         'no_show': raw_booking.get('noShow') or False,
         'walk_in': raw_booking.get('walkIn') or False,
         'source': raw_booking.get('source'),
         'host': raw_booking.get('host'),
-        'tracking': json.dumps(raw_booking.get('tracking')) if raw_booking.get('tracking') else None,
+        'tracking': dumps_json(raw_booking.get('tracking')) if raw_booking.get('tracking') else None,
         'tag_ids': raw_booking.get('tagIds') or [],
-        'booking_tags_count': json.dumps(raw_booking.get('bookingTagsCount')) if raw_booking.get('bookingTagsCount') else None,
-        'payment': json.dumps(raw_booking.get('payment')) if raw_booking.get('payment') else None,
+        'booking_tags_count': dumps_json(raw_booking.get('bookingTagsCount')) if raw_booking.get('bookingTagsCount') else None,
+        'payment': dumps_json(raw_booking.get('payment')) if raw_booking.get('payment') else None,
         'rating': raw_booking.get('rating')
-    }
\ No newline at end of file
+    }
+    booking['content_hash'] = booking_content_hash(booking)
+    return booking
+
+def _epoch_ms_to_local(values):
+    """Epoch milliseconds (None allowed) → naive local datetime64[ms], like datetime.fromtimestamp"""
+    ms = np.array(values, dtype='float64')
+    valid = ~np.isnan(ms)
+    ms_int = np.where(valid, ms, 0).astype(np.int64)
+
+    # UTC-Offset nur einmal pro Stunde nachschlagen (DST-Wechsel liegen auf vollen Stunden)
+    hours, inverse = np.unique(ms_int // 3_600_000, return_inverse=True)
+    offsets_ms = np.array([time.localtime(h * 3600).tm_gmtoff * 1000 for h in hours], dtype=np.int64)
+
+    local = (ms_int + offsets_ms[inverse]).astype('datetime64[ms]')
+    local[~valid] = np.datetime64('NaT')
+    return local
+
+def _json_column(values):
+    return np.array([dumps_json(v) if v else None for v in values], dtype=object)
+
+def parse_bookings_page(raw_bookings):
+    """
+    Columnar parse_booking for a whole API page
+
+    Returns:
+        dict: column name → NumPy array (datetime64[ms] timestamps, bool flags,
+              people as objects with None kept, pre-serialized JSON strings), same values and
+              content_hash as parse_booking; accepted directly by upsert_bookings
+    """
+    n = len(raw_bookings)
+    columns = {
+        'id': np.array([b['_id'] for b in raw_bookings], dtype=object),
+        'booking_date': _epoch_ms_to_local([b['date'] for b in raw_bookings]),
+        'end_date': _epoch_ms_to_local([b['endDate'] for b in raw_bookings]),
+        # Nullable wie source/rating: fehlende Personenzahl bleibt None (→ NULL)
+        'people': np.array([b.get('people') for b in raw_bookings] + [None], dtype=object)[:n],
+        'cancelled': np.fromiter((bool(b.get('cancelled')) for b in raw_bookings), dtype=bool, count=n),
+        'no_show': np.fromiter((bool(b.get('noShow')) for b in raw_bookings), dtype=bool, count=n),
+        'walk_in': np.fromiter((bool(b.get('walkIn')) for b in raw_bookings), dtype=bool, count=n),
+        'source': np.array([b.get('source') for b in raw_bookings] + [None], dtype=object)[:n],
+        'host': np.array([b.get('host') for b in raw_bookings] + [None], dtype=object)[:n],
+        'tracking': _json_column([b.get('tracking') for b in raw_bookings]),
+        'booking_tags_count': _json_column([b.get('bookingTagsCount') for b in raw_bookings]),
+        'payment': _json_column([b.get('payment') for b in raw_bookings]),
+        'rating': np.array([b.get('rating') for b in raw_bookings] + [None], dtype=object)[:n]
+    }
+    # Lists must stay list objects, not become a 2D array
+    tag_ids = np.empty(n, dtype=object)
+    tag_ids[:] = [b.get('tagIds') or [] for b in raw_bookings]
+    columns['tag_ids'] = tag_ids
+
+    # Hash inputs in HASH_FIELDS order with the same canonical values as booking_content_hash
+    hash_inputs = {
+        key: np.where(
+            np.isnat(columns[key]), None, np.datetime_as_string(columns[key], unit='ms')
+        ) if key in ('booking_date', 'end_date') else columns[key].tolist()
+        for key in HASH_FIELDS
+    }
+    columns['content_hash'] = np.array(
+        [_hash_values(list(row)) for row in zip(*(list(hash_inputs[key]) for key in HASH_FIELDS))],
+        dtype=object
+    )
+    return columns
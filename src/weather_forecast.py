@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from src.database import save_weather_forecast, save_weather_forecast_batch
 from config.logging_config import setup_logging
+from src import http_client
 
 # Load environment variables
 load_dotenv()
@@ -43,10 +44,10 @@ def fetch_weather_forecast(forecast_date=None):
     }
     
     try:
-        response = requests.get(
+        response = http_client.get(
+            'openmeteo_forecast',
             'https://api.open-meteo.com/v1/forecast',
-            params=params,
-            timeout=30
+            params=params
         )
         response.raise_for_status()
         data = response.json()
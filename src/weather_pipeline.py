@@ -3,11 +3,14 @@ Weather Data Pipeline: API → JSON → Database
 Fetches from OpenMeteo, saves JSON backup, stores in PostgreSQL
 """
 import requests
+import hashlib
 import json
 import os
 import psycopg2
 import sys
-from datetime import datetime, timedelta
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
 import logging
 from dotenv import load_dotenv
 
@@ -15,7 +18,14 @@ load_dotenv()
 # Add project root to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config.settings import DB_CONFIG
+from config.settings import ARCHIVE_CONFIG, WEATHER_BACKFILL_CONFIG
+from src.archive import archive_available, write_weather_archive
+from src.database import (
+    get_db_connection, get_weather_daily_counts, get_weather_daily_gaps, get_weather_import_manifest,
+    import_weather_file, save_weather_daily_rows
+)
+from src.utils import RateLimiter
+from src import http_client
 
 # Simple logging setup
 logging.basicConfig(
@@ -24,15 +34,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def get_db_connection():
-    """Create database connection using config.settings"""
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
-    except psycopg2.Error as e:
-        logger.error(f"Database connection failed: {e}")
-        return None
-
 def fetch_openmeteo_historical(start_date, end_date):
     """Fetch historical weather data from OpenMeteo API"""
     
@@ -63,10 +64,10 @@ def fetch_openmeteo_historical(start_date, end_date):
     try:
         logger.info(f"Fetching weather: {start_date} to {end_date}")
         
-        response = requests.get(
-            url="https://archive-api.open-meteo.com/v1/era5",
-            params=params,
-            timeout=30
+        response = http_client.get(
+            'openmeteo_archive',
+            "https://archive-api.open-meteo.com/v1/era5",
+            params=params
         )
         
         response.raise_for_status()
@@ -80,7 +81,19 @@ def fetch_openmeteo_historical(start_date, end_date):
         return None
 
 def save_json_backup(data, filename):
-    """Save weather data as JSON backup"""
+    """Save weather data as JSON backup (or into the Parquet archive with BACKUP_FORMAT=parquet)"""
+    if ARCHIVE_CONFIG['backup_format'] == 'parquet':
+        if archive_available():
+            try:
+                paths = write_weather_archive(data)
+                logger.info(f"Archive backup saved: {', '.join(paths)}")
+                return paths[0] if paths else None
+            except Exception as e:
+                # Die Daten sind schon geholt - lieber JSON-Backup als gar keins
+                logger.error(f"Archive backup failed ({e!r}), writing JSON")
+        else:
+            logger.warning("BACKUP_FORMAT=parquet but pyarrow is missing, writing JSON")
+    
     os.makedirs('data', exist_ok=True)
     filepath = os.path.join('data', filename)
     
@@ -95,98 +108,54 @@ def save_json_backup(data, filename):
     logger.info(f"JSON backup saved: {filepath}")
     return filepath
 
-def save_weather_to_database(weather_data):
-    """Save single day weather data to PostgreSQL"""
-    conn = get_db_connection()
-    if not conn:
-        return False
+def weather_daily_rows(api_data):
+    """
+    Turn an OpenMeteo daily block into weather_daily rows, column by column
+
+    Same defaults as the former per-day path: missing variables fall back to
+    neutral values, sunshine_duration is converted from seconds to hours.
+
+    Returns:
+        list: Tuples in database.WEATHER_DAILY_COLUMNS order
+    """
+    daily = api_data['daily']
+    dates = daily['time']
+    n = len(dates)
     
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO weather_daily (
-                    date, location, temp_max, temp_min, temp_mean,
-                    precipitation_sum, precipitation_hours, humidity,
-                    windspeed_max, pressure_msl, sunshine_duration,
-                    cloudcover_mean, visibility, weathercode,
-                    data_source, is_forecast, forecast_created_at
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                ) ON CONFLICT (date) DO UPDATE SET
-                    temp_max = EXCLUDED.temp_max,
-                    temp_min = EXCLUDED.temp_min,
-                    precipitation_sum = EXCLUDED.precipitation_sum,
-                    precipitation_hours = EXCLUDED.precipitation_hours,
-                    humidity = EXCLUDED.humidity,
-                    windspeed_max = EXCLUDED.windspeed_max,
-                    pressure_msl = EXCLUDED.pressure_msl,
-                    sunshine_duration = EXCLUDED.sunshine_duration,
-                    cloudcover_mean = EXCLUDED.cloudcover_mean,
-                    weathercode = EXCLUDED.weathercode,
-                    updated_at = NOW()
-            """, (
-                weather_data['date'],
-                'Kiel',
-                weather_data.get('temp_max'),
-                weather_data.get('temp_min'),
-                weather_data.get('temp_mean'),
-                weather_data.get('precipitation_sum', 0),
-                weather_data.get('precipitation_hours', 0),
-                weather_data.get('humidity', 70),
-                weather_data.get('windspeed_max', 0),
-                weather_data.get('pressure_msl', 1013),
-                weather_data.get('sunshine_duration', 0),
-                weather_data.get('cloudcover_mean', 50),
-                15000,  # visibility default
-                weather_data.get('weathercode', 1),
-                'openmeteo',
-                False,  # is_forecast
-                None    # forecast_created_at
-            ))
-            
-        conn.commit()
-        return True
-        
-    except psycopg2.Error as e:
-        logger.error(f"Database save failed for {weather_data.get('date')}: {e}")
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
+    def column(key, default):
+        return daily.get(key) or [default] * n
+    
+    sunshine_hours = [s / 3600 if s else 0 for s in column('sunshine_duration', 0)]
+    
+    return list(zip(
+        [datetime.strptime(d, '%Y-%m-%d').date() for d in dates],
+        ['Kiel'] * n,
+        column('temperature_2m_max', None),
+        column('temperature_2m_min', None),
+        [None] * n,  # temp_mean: Calculate if needed
+        column('precipitation_sum', 0),
+        column('precipitation_hours', 0),
+        column('relative_humidity_2m_mean', 70),
+        column('windspeed_10m_max', 0),
+        column('pressure_msl_mean', 1013),
+        sunshine_hours,
+        column('cloudcover_mean', 50),
+        [15000] * n,  # visibility default
+        column('weathercode', 1),
+        ['openmeteo'] * n,
+        [False] * n,  # is_forecast
+        [None] * n    # forecast_created_at
+    ))
 
 def process_weather_data(api_data):
-    """Process API JSON data and save to database"""
+    """Process API JSON data and save to database (one bulk upsert)"""
     if not api_data or 'daily' not in api_data:
         logger.error("Invalid API data")
         return 0
     
-    daily = api_data['daily']
-    dates = daily['time']
-    
-    successful_saves = 0
-    
-    for i, date_str in enumerate(dates):
-        weather_entry = {
-            'date': datetime.strptime(date_str, '%Y-%m-%d').date(),
-            'temp_max': daily.get('temperature_2m_max', [None] * len(dates))[i],
-            'temp_min': daily.get('temperature_2m_min', [None] * len(dates))[i],
-            'temp_mean': None,  # Calculate if needed
-            'precipitation_sum': daily.get('precipitation_sum', [0] * len(dates))[i],
-            'precipitation_hours': daily.get('precipitation_hours', [0] * len(dates))[i],
-            'weathercode': daily.get('weathercode', [1] * len(dates))[i],
-            'sunshine_duration': daily.get('sunshine_duration', [0] * len(dates))[i] / 3600 if daily.get('sunshine_duration', [0] * len(dates))[i] else 0,
-            'windspeed_max': daily.get('windspeed_10m_max', [0] * len(dates))[i],
-            'pressure_msl': daily.get('pressure_msl_mean', [1013] * len(dates))[i],
-            'cloudcover_mean': daily.get('cloudcover_mean', [50] * len(dates))[i],
-            'humidity': daily.get('relative_humidity_2m_mean', [70] * len(dates))[i]
-        }
-        
-        if save_weather_to_database(weather_entry):
-            successful_saves += 1
-        
-        # Progress every 10 days
-        if (i + 1) % 10 == 0:
-            logger.info(f"Processed {i + 1}/{len(dates)} days...")
+    rows = weather_daily_rows(api_data)
+    successful_saves = save_weather_daily_rows(rows)
+    logger.info(f"Saved {successful_saves}/{len(rows)} days in one batch")
     
     return successful_saves
 
@@ -225,33 +194,250 @@ def import_weather_range(start_date, end_date):
     logger.info(f"Import completed: {result['message']}")
     return result
 
+def split_weather_range(start_date, end_date, chunk_months):
+    """
+    Split the inclusive date range into calendar-aligned chunks of chunk_months
+    (12 → calendar years), so chunk keys and backup files stay stable between runs
+    """
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        month_index = chunk_start.year * 12 + chunk_start.month - 1
+        next_index = (month_index // chunk_months + 1) * chunk_months
+        next_start = date(next_index // 12, next_index % 12 + 1, 1)
+        chunk_end = min(next_start - timedelta(days=1), end_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+def plan_weather_backfill(start_date, end_date, chunk_months, force=False):
+    """
+    Chunks of [start_date, end_date] that still miss days in weather_daily
+    
+    Coverage is checked with one COUNT per chunk; complete chunks are skipped.
+    """
+    chunks = split_weather_range(start_date, end_date, chunk_months)
+    if force:
+        return chunks
+    
+    counts = get_weather_daily_counts(chunks)
+    if counts is None:
+        logger.warning("Coverage check failed, planning all chunks")
+        return chunks
+    
+    return [
+        (chunk_start, chunk_end) for chunk_start, chunk_end in chunks
+        if counts.get((chunk_start, chunk_end), 0) < (chunk_end - chunk_start).days + 1
+    ]
+
+def _fetch_weather_chunk(chunk_start, chunk_end, rate_limiter):
+    """Fetch one chunk under the shared rate limit and keep its JSON backup"""
+    start_str, end_str = chunk_start.isoformat(), chunk_end.isoformat()
+    rate_limiter.wait()
+    api_data = fetch_openmeteo_historical(start_str, end_str)
+    if api_data:
+        save_json_backup(api_data, f"weather_{start_str}_{end_str}.json")
+    return api_data
+
+def backfill_ranges(ranges, max_workers=None, requests_per_second=None):
+    """
+    Fetch date ranges concurrently and bulk-upsert each one as it arrives
+    
+    Args:
+        ranges: list of (start, end) dates
+        max_workers: parallel API requests (default WEATHER_BACKFILL_CONFIG)
+        requests_per_second: shared rate limit across all workers
+    """
+    max_workers = max_workers or WEATHER_BACKFILL_CONFIG['max_workers']
+    if requests_per_second is None:
+        requests_per_second = WEATHER_BACKFILL_CONFIG['requests_per_second']
+    rate_limiter = RateLimiter(requests_per_second)
+    
+    stats = {"chunks": len(ranges), "fetched_days": 0, "saved": 0, "failed_chunks": []}
+    if not ranges:
+        return stats
+    
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather-backfill") as executor:
+        futures = {
+            executor.submit(_fetch_weather_chunk, chunk_start, chunk_end, rate_limiter): (chunk_start, chunk_end)
+            for chunk_start, chunk_end in ranges
+        }
+        
+        # DB writes stay in this thread: one bulk upsert per finished chunk
+        for future in as_completed(futures):
+            chunk_start, chunk_end = futures[future]
+            try:
+                api_data = future.result()
+            except Exception as e:
+                logger.error(f"Chunk {chunk_start} to {chunk_end} failed: {e}")
+                api_data = None
+            
+            if not api_data or 'daily' not in api_data:
+                stats["failed_chunks"].append((chunk_start.isoformat(), chunk_end.isoformat()))
+                continue
+            
+            rows = weather_daily_rows(api_data)
+            saved = save_weather_daily_rows(rows)
+            stats["fetched_days"] += len(rows)
+            stats["saved"] += saved
+            if saved < len({row[0] for row in rows}):
+                stats["failed_chunks"].append((chunk_start.isoformat(), chunk_end.isoformat()))
+            
+            logger.info(f"Chunk {chunk_start} to {chunk_end}: saved {saved}/{len(rows)} days")
+    
+    return stats
+
+def backfill_weather_history(start_date, end_date=None, chunk_months=None, max_workers=None,
+                             requests_per_second=None, force=False):
+    """
+    Rebuild weather_daily history for a (multi-year) date range
+    
+    Plans the chunks that still miss days, fetches them concurrently under
+    a shared rate limit and writes every chunk with one bulk upsert.
+    
+    Args:
+        start_date (str): "YYYY-MM-DD"
+        end_date (str): "YYYY-MM-DD", default yesterday
+        force: re-import chunks that are already complete
+    """
+    t0 = time.perf_counter()
+    start = datetime.strptime(start_date, '%Y-%m-%d').date()
+    end = (datetime.strptime(end_date, '%Y-%m-%d').date() if end_date
+           else datetime.now().date() - timedelta(days=1))
+    chunk_months = chunk_months or WEATHER_BACKFILL_CONFIG['chunk_months']
+    
+    planned = plan_weather_backfill(start, end, chunk_months, force=force)
+    total_chunks = len(split_weather_range(start, end, chunk_months))
+    logger.info(f"Weather backfill {start} to {end}: {len(planned)}/{total_chunks} chunks to fetch")
+    
+    stats = backfill_ranges(planned, max_workers, requests_per_second)
+    stats["skipped_chunks"] = total_chunks - len(planned)
+    stats["seconds"] = round(time.perf_counter() - t0, 2)
+    stats["status"] = "error" if stats["failed_chunks"] else "success"
+    stats["message"] = (f"Backfilled {stats['saved']} days in {stats['seconds']}s "
+                        f"({len(stats['failed_chunks'])} failed chunks)")
+    
+    logger.info(f"Weather backfill finished: {stats['message']}")
+    return stats
+
+def coalesce_weather_gaps(gaps, merge_days=0, max_range_days=366):
+    """
+    Merge missing-day ranges into as few API ranges as possible
+    
+    Two gaps separated by at most merge_days present days become one range
+    (those days are simply fetched again); no range grows beyond max_range_days.
+    
+    Returns:
+        list: (start, end) date tuples
+    """
+    ranges = []
+    for gap_start, gap_end, _ in gaps:
+        if ranges:
+            last_start, last_end = ranges[-1]
+            if ((gap_start - last_end).days - 1 <= merge_days
+                    and (gap_end - last_start).days + 1 <= max_range_days):
+                ranges[-1] = (last_start, gap_end)
+                continue
+        
+        # Lange Lücken in API-taugliche Stücke teilen
+        chunk_start = gap_start
+        while chunk_start <= gap_end:
+            chunk_end = min(chunk_start + timedelta(days=max_range_days - 1), gap_end)
+            ranges.append((chunk_start, chunk_end))
+            chunk_start = chunk_end + timedelta(days=1)
+    return ranges
+
+def plan_weather_gaps(start_date, end_date, merge_days=None):
+    """
+    Plan the fewest API calls that close every hole in weather_daily
+    
+    Returns:
+        dict: ranges to fetch plus a report against a naive per-day refill
+              (one call per missing day) and a full re-import of the window;
+              None if the gap query failed
+    """
+    if merge_days is None:
+        merge_days = WEATHER_BACKFILL_CONFIG['gap_merge_days']
+    
+    gaps = get_weather_daily_gaps(start_date, end_date)
+    if gaps is None:
+        return None
+    
+    ranges = coalesce_weather_gaps(gaps, merge_days)
+    missing_days = sum(days for _, _, days in gaps)
+    window_days = (end_date - start_date).days + 1
+    fetch_days = sum((range_end - range_start).days + 1 for range_start, range_end in ranges)
+    
+    return {
+        "ranges": ranges,
+        "report": {
+            "window_days": window_days,
+            "missing_days": missing_days,
+            "gaps": len(gaps),
+            "api_calls": len(ranges),
+            "rows_fetched": fetch_days,
+            "calls_saved_vs_per_day": missing_days - len(ranges),
+            "rows_saved_vs_full_window": window_days - fetch_days
+        }
+    }
+
+def fill_weather_gaps(start_date=None, end_date=None, merge_days=None):
+    """
+    Find and refill missing weather_daily days (default: the last
+    gap_lookback_days up to yesterday)
+    
+    Args:
+        start_date (str): "YYYY-MM-DD"
+        end_date (str): "YYYY-MM-DD"
+    """
+    end = (datetime.strptime(end_date, '%Y-%m-%d').date() if end_date
+           else datetime.now().date() - timedelta(days=1))
+    start = (datetime.strptime(start_date, '%Y-%m-%d').date() if start_date
+             else end - timedelta(days=WEATHER_BACKFILL_CONFIG['gap_lookback_days'] - 1))
+    
+    plan = plan_weather_gaps(start, end, merge_days)
+    if plan is None:
+        return {"status": "error", "message": "Gap query failed"}
+    
+    report = plan["report"]
+    logger.info(
+        f"Weather gaps {start} to {end}: {report['missing_days']} missing days in "
+        f"{report['gaps']} gaps → {report['api_calls']} API calls "
+        f"(saves {report['calls_saved_vs_per_day']} calls vs per-day, "
+        f"{report['rows_saved_vs_full_window']} rows vs full window)"
+    )
+    
+    if not plan["ranges"]:
+        return {"status": "success", "message": "No gaps", "saved": 0, **report}
+    
+    stats = backfill_ranges(plan["ranges"])
+    return {
+        "status": "error" if stats["failed_chunks"] else "success",
+        "message": f"Filled {stats['saved']} days with {report['api_calls']} API calls",
+        "saved": stats["saved"],
+        "failed_chunks": stats["failed_chunks"],
+        **report
+    }
+
 def import_monthly_batches(year, months=None):
     """Import weather data month by month for a year"""
     if months is None:
         months = range(1, 13)  # All months
     
-    total_success = 0
-    
+    ranges = []
     for month in months:
-        start_date = f"{year}-{month:02d}-01"
+        start_date = datetime(year, month, 1).date()
         
         # Calculate end of month
         if month == 12:
-            next_month = datetime(year + 1, 1, 1)
+            next_month = datetime(year + 1, 1, 1).date()
         else:
-            next_month = datetime(year, month + 1, 1)
+            next_month = datetime(year, month + 1, 1).date()
         
-        end_date = (next_month - timedelta(days=1)).strftime('%Y-%m-%d')
-        
-        logger.info(f"Importing month {year}-{month:02d}")
-        result = import_weather_range(start_date, end_date)
-        
-        if result['status'] == 'success':
-            total_success += result['successful_saves']
-        
-        # Small delay between months
-        import time
-        time.sleep(1)
+        ranges.append((start_date, next_month - timedelta(days=1)))
+    
+    # Monate parallel, Abstand regelt der gemeinsame Rate-Limiter (statt sleep(1))
+    total_success = backfill_ranges(ranges)["saved"]
     
     logger.info(f"Year {year} import completed. Total saves: {total_success}")
     return total_success
@@ -280,8 +466,104 @@ def test_database_connection():
     finally:
         conn.close()
 
-def main():
-    """Import all weather JSON backups from /data into the database"""
+def _file_checksum(path, chunk_size=1 << 20):
+    """blake2b digest of a file, read in chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _reject_backup(entry, reason, stats):
+    """Record an unusable backup in the manifest so it is skipped until it changes"""
+    logger.warning(f"⚠️ {reason} in {entry['filename']}, skipping.")
+    stats["failed"] += 1
+    import_weather_file(entry, [], rejected=True)
+
+def import_json_backups(data_dir="data", force=False):
+    """
+    Import new or changed weather JSON backups from data_dir
+    
+    Only the weather_*.json files written by save_json_backup are considered.
+    Files whose size and mtime match the manifest are skipped without being
+    read; otherwise the file is hashed in chunks (blake2b) and only changed
+    content is parsed and bulk-upserted (one transaction per file, manifest
+    updated in the same transaction). Files without a usable daily block are
+    recorded with rows_imported = 0 and skipped until they change.
+    
+    Args:
+        force: ignore the manifest and re-import every file
+    
+    Returns:
+        dict: counts of imported / unchanged / skipped / failed files and saved days
+    """
+    stats = {"files": 0, "imported": 0, "unchanged": 0, "skipped": 0, "failed": 0, "saved": 0}
+    
+    # Nur die Wetter-Backups, alphabetisch sortiert (damit Monate in Reihenfolge)
+    json_files = sorted(
+        f for f in os.listdir(data_dir) if f.startswith("weather_") and f.endswith(".json")
+    )
+    stats["files"] = len(json_files)
+    
+    manifest = {} if force else get_weather_import_manifest()
+    if manifest is None:
+        logger.warning("Import manifest unavailable, importing all files")
+        manifest = {}
+    
+    for filename in json_files:
+        path = os.path.join(data_dir, filename)
+        stat = os.stat(path)
+        known = manifest.get(filename)
+        
+        if known and known['size_bytes'] == stat.st_size and known['mtime'] == stat.st_mtime:
+            stats["skipped"] += 1
+            continue
+        
+        entry = {
+            'filename': filename,
+            'checksum': _file_checksum(path),
+            'size_bytes': stat.st_size,
+            'mtime': stat.st_mtime
+        }
+        
+        if known and known['checksum'] == entry['checksum']:
+            # Nur angefasst (mtime), Inhalt gleich: Manifest nachziehen, nichts importieren
+            if import_weather_file(entry, []) is None:
+                stats["failed"] += 1
+            else:
+                stats["unchanged"] += 1
+            continue
+        
+        try:
+            with open(path, "rb") as f:
+                api_data = json.load(f).get("api_data")
+        except (ValueError, AttributeError) as e:
+            _reject_backup(entry, f"Unparseable JSON ({e})", stats)
+            continue
+        
+        if not api_data or 'daily' not in api_data:
+            _reject_backup(entry, "No api_data found", stats)
+            continue
+        
+        try:
+            rows = weather_daily_rows(api_data)
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            _reject_backup(entry, f"Malformed daily block ({e!r})", stats)
+            continue
+        
+        saved_days = import_weather_file(entry, rows)
+        if saved_days is None:
+            stats["failed"] += 1
+            continue
+        
+        stats["imported"] += 1
+        stats["saved"] += saved_days
+        logger.info(f"→ Saved {saved_days} days from {filename}")
+    
+    return stats
+
+def main(force=False):
+    """Import new or changed weather JSON backups from /data into the database"""
 
     logger.info("Starting JSON → Database import")
 
@@ -294,43 +576,36 @@ def main():
         logger.error(f"Data directory not found: {data_dir}")
         return
 
-    # Alle JSON-Dateien, alphabetisch sortiert (damit Monate in Reihenfolge)
-    json_files = sorted([f for f in os.listdir(data_dir) if f.endswith(".json")])
+    stats = import_json_backups(data_dir, force=force)
 
-    if not json_files:
+    if not stats["files"]:
         logger.error("No weather JSON files found in /data")
         return
 
-    logger.info(f"Found {len(json_files)} JSON files to import.")
-
-    total_saved = 0
-
-    for filename in json_files:
-        path = os.path.join(data_dir, filename)
-        logger.info(f"Processing {filename} ...")
-
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                backup = json.load(f)
-
-            api_data = backup.get("api_data")
-            if not api_data:
-                logger.warning(f"⚠️ No api_data found in {filename}, skipping.")
-                continue
-
-            saved_days = process_weather_data(api_data)
-            total_saved += saved_days
-
-            logger.info(f"→ Saved {saved_days} days from {filename}")
-
-        except Exception as e:
-            logger.error(f"Failed to process {filename}: {e}")
-
-    logger.info(f"JSON import finished. Total days saved: {total_saved}")
+    logger.info(
+        f"JSON import finished. Files: {stats['files']} "
+        f"(imported {stats['imported']}, unchanged {stats['unchanged']}, "
+        f"skipped {stats['skipped']}, failed {stats['failed']}). "
+        f"Total days saved: {stats['saved']}"
+    )
 
     # final check
     test_database_connection()
+    return stats
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # python src/weather_pipeline.py backfill 2019-01-01 [2024-12-31] [--force]
+    # python src/weather_pipeline.py gaps [2024-01-01 [2024-12-31]]
+    if len(sys.argv) > 1 and sys.argv[1] == "gaps":
+        fill_weather_gaps(*sys.argv[2:4])
+    elif len(sys.argv) > 2 and sys.argv[1] == "backfill":
+        args = [arg for arg in sys.argv[2:] if not arg.startswith("--")]
+        backfill_weather_history(
+            args[0],
+            args[1] if len(args) > 1 else None,
+            force="--force" in sys.argv
+        )
+    else:
+        # python src/weather_pipeline.py [--force]  → JSON-Backups importieren
+        main(force="--force" in sys.argv)
\ No newline at end of file